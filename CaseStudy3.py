@@ -1,55 +1,744 @@
 from abc import ABC, abstractmethod
+import argparse
+import atexit
+import bisect
+import csv
+import dbm
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from types import MappingProxyType
 import uuid
+import functools
+import gzip
 import json
+import logging
+import logging.handlers
+import lzma
+import operator
 import os
+import re
+import shutil
+import sys
+import threading
+import time
+import urllib.parse
 
-SAVE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(_file_)), "Case3_json")
+try:
+    import fcntl
+except ImportError:  # Windows: SharedAccess then relies on the version stamps alone
+    fcntl = None
 
-# Ensure the folder exists
-if not os.path.exists(SAVE_FOLDER):
-    os.makedirs(SAVE_FOLDER)
-print("Save folder initialized at:", SAVE_FOLDER)
+# Importing this module has no side effects: nothing is printed, read or created until the
+# data is loaded or saved. The folder can be overridden with CASESTUDY3_DATA or set_data_folder().
+SAVE_FOLDER = os.environ.get("CASESTUDY3_DATA") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "Case3_json")
 
+# Number of previous versions kept next to each data file (users.json.1 is the newest); 0 keeps none
+BACKUP_GENERATIONS = int(os.environ.get("CASESTUDY3_BACKUPS", "1"))
+SAVE_BUFFER_SIZE = 1024 * 1024
 
-print("Current Working Directory:", os.getcwd())
+# Storage format for saved files (reading detects the format): see set_storage_format()
+COMPRESSION = os.environ.get("CASESTUDY3_COMPRESSION") or None
+COMPACT_JSON = os.environ.get("CASESTUDY3_COMPACT") == "1"
 
+# How load_all() reads and decodes the data files: "thread" (default), "process" or "serial"
+LOAD_EXECUTOR = os.environ.get("CASESTUDY3_LOAD_EXECUTOR", "thread")
 
-def load_json(filename):
+
+def set_data_folder(path):
+    """Points loading and saving at another data folder. The folder is created on first save."""
+    global SAVE_FOLDER
+    SAVE_FOLDER = os.path.abspath(path)
+
+
+def _ensure_save_folder():
+    if not os.path.isdir(SAVE_FOLDER):
+        os.makedirs(SAVE_FOLDER, exist_ok=True)
+        logger.debug("Save folder initialized at: %s", SAVE_FOLDER)
+
+
+logger = logging.getLogger("CaseStudy3")
+logger.addHandler(logging.NullHandler())
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line, including phase counters when present."""
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("phase", "counters", "elapsed_ms"):
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def configure_logging(level=None, json_log_file=None):
+    """
+    Configure the platform logger. Quiet by default: only warnings and errors reach the console.
+    The level and an optional JSON log file can also come from the CASESTUDY3_LOG_LEVEL and
+    CASESTUDY3_LOG_FILE environment variables. JSON records are buffered in memory and written
+    in batches (immediately for errors) so logging never dominates load or save time.
+    """
+    level = level or os.environ.get("CASESTUDY3_LOG_LEVEL", "WARNING")
+    json_log_file = json_log_file or os.environ.get("CASESTUDY3_LOG_FILE")
+
+    for handler in list(logger.handlers):
+        if not isinstance(handler, logging.NullHandler):
+            logger.removeHandler(handler)
+            handler.close()
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    logger.addHandler(console)
+
+    if json_log_file:
+        file_handler = logging.FileHandler(json_log_file, encoding="utf-8")
+        file_handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(logging.handlers.MemoryHandler(1000, flushLevel=logging.ERROR, target=file_handler))
+
+
+@contextmanager
+def log_phase(phase, warn_on=()):
+    """
+    Collects counters for one phase (e.g. loading enrollments) and logs a single summary line
+    when the phase ends, instead of one line per record. The summary is a warning if any of the
+    counters named in warn_on is non-zero.
+    """
+    counters = Counter()
+    start = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+        level = logging.WARNING if any(counters[name] for name in warn_on) else logging.INFO
+        if logger.isEnabledFor(level):
+            summary = ", ".join(f"{name}={count}" for name, count in counters.items()) or "nothing to do"
+            logger.log(level, "%s: %s (%.1f ms)", phase, summary, elapsed_ms,
+                       extra={"phase": phase, "counters": dict(counters), "elapsed_ms": elapsed_ms})
+
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "lzma": ".xz"}
+GZIP_MAGIC = b"\x1f\x8b"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+
+
+def set_storage_format(compression=None, compact=False):
     """
-    Load JSON data from a file in SAVE_FOLDER.
-    Handles file not existing or corrupted JSON gracefully.
+    Chooses how data files are written: compression None, "gzip" (users.json.gz) or "lzma"
+    (users.json.xz), and compact=True for JSON without indentation. Files are read in any format.
     """
+    global COMPRESSION, COMPACT_JSON
+    if compression == "none":
+        compression = None
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression {compression!r}. Expected gzip, lzma or none.")
+    COMPRESSION = compression
+    COMPACT_JSON = compact
+
+
+def _data_path(filename):
+    """Returns the existing variant (plain, .gz or .xz) of a data file, the newest if several exist."""
     filepath = os.path.join(SAVE_FOLDER, filename)
-    if not os.path.exists(filepath):
-        print(f"DEBUG: {filename} not found. Returning an empty list.")
+    variants = [filepath + suffix for suffix in COMPRESSION_SUFFIXES.values() if os.path.exists(filepath + suffix)]
+    if not variants:
+        return None
+    return max(variants, key=os.path.getmtime)
+
+
+def _read_json(filepath):
+    """Reads a JSON file, decompressing it if it starts with the gzip or xz magic bytes."""
+    with open(filepath, "rb") as file:
+        magic = file.read(len(XZ_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        opener = gzip.open
+    elif magic.startswith(XZ_MAGIC):
+        opener = lzma.open
+    else:
+        opener = open
+    with opener(filepath, "rt") as file:
+        return json.load(file)
+
+
+class DataFileError(ValueError):
+    """Raised when a data file exists but neither it nor any of its backups can be decoded."""
+
+
+def load_json(filename):
+    """
+    Load JSON data from a file in SAVE_FOLDER (plain, gzip or xz compressed).
+    A missing file gives an empty list. If the file is corrupt, the newest readable backup
+    generation (see save_json) is used instead; if there is none, DataFileError is raised rather
+    than returning nothing, so a later save cannot overwrite the file with an empty list.
+    """
+    filepath = _data_path(filename)
+    if filepath is None:
+        logger.debug("%s not found. Returning an empty list.", filename)
         return []
     try:
-        with open(filepath, "r") as file:
-            return json.load(file)
-    except json.JSONDecodeError as e:
-        print(f"ERROR: Failed to decode {filename}. Error: {e}")
-        return []
+        return _read_json(filepath)
     except Exception as e:
-        print(f"ERROR: Unexpected error loading {filename}. Error: {e}")
-        return []
+        logger.error("Failed to decode %s. Error: %s", os.path.basename(filepath), e)
+        error = e
+
+    for generation in range(1, BACKUP_GENERATIONS + 1):
+        backup_path = f"{filepath}.{generation}"
+        if not os.path.exists(backup_path):
+            break
+        try:
+            data = _read_json(backup_path)
+        except Exception as e:
+            logger.error("Backup %s is unreadable too. Error: %s", os.path.basename(backup_path), e)
+            continue
+        logger.warning("Recovered %s from backup %s.", os.path.basename(filepath), os.path.basename(backup_path))
+        return data
+    raise DataFileError(f"{filepath} cannot be decoded and has no readable backup: {error}")
+
+
+def _rotate_backups(filepath):
+    """Shifts filepath.1 .. filepath.N-1 up one generation and hard-links the current file as filepath.1."""
+    if BACKUP_GENERATIONS <= 0 or not os.path.exists(filepath):
+        return
+    for generation in range(BACKUP_GENERATIONS - 1, 0, -1):
+        older = f"{filepath}.{generation}"
+        if os.path.exists(older):
+            os.replace(older, f"{filepath}.{generation + 1}")
+    # Link (or copy) under a temporary name first so that filepath itself never disappears
+    staged = f"{filepath}.1.tmp"
+    if os.path.exists(staged):
+        os.remove(staged)
+    try:
+        os.link(filepath, staged)
+    except OSError:
+        shutil.copy2(filepath, staged)
+    os.replace(staged, f"{filepath}.1")
+
+
+def _fsync_directory(path):
+    """Makes a rename in `path` durable. Platforms that cannot open directories are skipped."""
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def _encode_json(data):
+    if COMPACT_JSON:
+        return json.dumps(data, separators=(",", ":"))  # one-shot C encoder
+    return json.dumps(data, indent=4)
+
+
+def _encode_row(row):
+    return json.dumps(row, separators=(",", ":"))
+
 
 def save_json(filename, data):
+    """Save JSON data to a file in SAVE_FOLDER; see save_json_text."""
+    return save_json_text(filename, _encode_json(data))
+
+
+def save_json_text(filename, text):
     """
-    Save JSON data to a file in SAVE_FOLDER.
-    Handles any file-writing issues gracefully.
+    Save already-encoded JSON (str or bytes) to a file in SAVE_FOLDER, atomically, in the
+    configured storage format (users.json, users.json.gz or users.json.xz; other variants of
+    the file are removed).
+    The text is written to a temporary file next to the target through a large buffer, flushed
+    to disk with fsync and renamed over the target, so a crash at any point leaves either the old
+    or the new file, never a truncated one. The previous version is kept as a backup generation.
+    Handles any file-writing issues gracefully: they are logged and False is returned, so callers
+    can keep their changes pending. Returns True once the file is written.
     """
-    filepath = os.path.join(SAVE_FOLDER, filename)
+    payload = text.encode() if isinstance(text, str) else text
+    base_path = os.path.join(SAVE_FOLDER, filename)
+    filepath = base_path + COMPRESSION_SUFFIXES[COMPRESSION]
+    temp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        with open(filepath, "w") as file:
-            json.dump(data, file, indent=4)
-        print(f"DEBUG: Data successfully saved to {filepath}.")
+        _ensure_save_folder()
+        try:
+            with open(temp_path, "wb", buffering=SAVE_BUFFER_SIZE) as file:
+                if COMPRESSION == "gzip":
+                    with gzip.GzipFile(filename=filename, mode="wb", compresslevel=6, fileobj=file) as stream:
+                        stream.write(payload)
+                elif COMPRESSION == "lzma":
+                    with lzma.LZMAFile(file, "wb") as stream:
+                        stream.write(payload)
+                else:
+                    file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            with HotReloader._io_lock:
+                _rotate_backups(filepath)
+                os.replace(temp_path, filepath)
+                HotReloader._saved(filename, filepath, payload)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        for suffix in COMPRESSION_SUFFIXES.values():
+            if base_path + suffix != filepath and os.path.exists(base_path + suffix):
+                os.remove(base_path + suffix)  # a stale copy in another format
+        _fsync_directory(SAVE_FOLDER)
+        logger.debug("Data successfully saved to %s.", filepath)
+        return True
     except Exception as e:
-        print(f"ERROR: Failed to save data to {filename}. Error: {e}")
+        logger.error("Failed to save data to %s. Error: %s", filename, e)
+        return False
+
+
+def discard_from_index(index, keys, dropped):
+    """Filters the dropped entries out of index[key] for each key, deleting keys left empty."""
+    for key in keys:
+        remaining = [entry for entry in index.get(key, ()) if entry not in dropped]
+        if remaining:
+            index[key] = remaining
+        else:
+            index.pop(key, None)
+
+
+def add_to_registry(registry, positions, entry):
+    """Appends an entry to a registry list, recording its position (see discard_from_registry)."""
+    positions[id(entry)] = len(registry)
+    registry.append(entry)
+
 
+def discard_from_registry(registry, positions, dropped):
+    """
+    Removes the dropped entries from a registry list in place. Each one is overwritten by the
+    last entry (so the registry keeps insertion order only until something is removed), which
+    makes a removal O(1) instead of a pass over the whole registry. positions maps id(entry) to
+    its index; a stale map (the registry was reloaded, rolled back or filled without it) is
+    rebuilt once here.
+    """
+    for entry in dropped:
+        position = positions.get(id(entry))
+        if position is None or position >= len(registry) or registry[position] is not entry:
+            positions.clear()
+            positions.update((id(item), index) for index, item in enumerate(registry))
+            position = positions.get(id(entry))
+            if position is None:
+                continue
+        del positions[id(entry)]
+        last = registry.pop()
+        if last is not entry:
+            registry[position] = last
+            positions[id(last)] = position
+
+
+def read_score_rows(source):
+    """
+    Reads the rows of a bulk grade import as (row number, fields) pairs.
+    `source` is a CSV file path, an open CSV file, or an iterable of (student_id, score) pairs.
+    A leading "student_id,score" header row is skipped.
+    """
+    if isinstance(source, str):
+        with open(source, "r", newline="") as file:
+            return read_score_rows(file)
+    if hasattr(source, "read"):
+        source = csv.reader(source)
+
+    rows = []
+    for row_number, row in enumerate(source, start=1):
+        row = list(row)
+        if row_number == 1 and row and str(row[0]).strip().lower() in ("student_id", "student id"):
+            continue
+        rows.append((row_number, row))
+    return rows
+
+
+def validate_score_rows(rows, check):
+    """
+    Validates every row of a bulk grade import in a single pass.
+    check(student, score) returns an error message for a row that cannot be applied, or None.
+    Returns the valid (student, score) pairs and a per-row error report.
+    """
+    valid, errors, seen = [], [], set()
+    for row_number, row in rows:
+        student_id = str(row[0]).strip() if row else ""
+        student = UserManager._users_by_id.get(student_id)
+        error = None
+        if len(row) != 2:
+            error = "Expected two fields: student_id, score."
+        else:
+            try:
+                score = float(row[1])
+            except (TypeError, ValueError):
+                error = f"Score {row[1]!r} is not a number."
+        if error is None:
+            if not isinstance(student, Student):
+                error = "Student not found."
+            elif student_id in seen:
+                error = "Duplicate row for this student."
+            else:
+                error = check(student, score)
+        seen.add(student_id)
+
+        if error:
+            errors.append({"row": row_number, "student_id": student_id, "error": error})
+        else:
+            valid.append((student, score))
+    return valid, errors
+
+
+class ReadWriteLock:
+    """
+    Re-entrant readers-writer lock.
+    Any number of threads may hold it shared, or a single thread may hold it exclusively.
+    The exclusive holder may re-acquire it in either mode; a shared holder cannot upgrade.
+    Waiting writers block new (but not re-entrant) readers so they are not starved.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}  # thread ident -> shared hold count
+        self._writer = None
+        self._writer_count = 0
+        self._writers_waiting = 0
+
+    def acquire_shared(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_shared(self):
+        me = threading.get_ident()
+        with self._cond:
+            count = self._readers[me] - 1
+            if count:
+                self._readers[me] = count
+            else:
+                del self._readers[me]
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_exclusive(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_count += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a shared lock to an exclusive lock.")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_count = 1
+
+    def holds_shared(self):
+        """Whether the calling thread holds the lock shared (and so cannot take it exclusively)."""
+        return threading.get_ident() in self._readers
+
+    def release_exclusive(self):
+        with self._cond:
+            self._writer_count -= 1
+            if not self._writer_count:
+                self._writer = None
+                self._cond.notify_all()
+
+
+class LockManager:
+    """
+    Coordinates concurrent access to the manager registries.
+
+    Mutations confined to one course or one assignment hold the state lock shared plus
+    that entity's own lock, so work on unrelated courses runs in parallel.
+    Structural changes (loading, removing users or courses) hold the state lock exclusively.
+    Plain reads take no locks at all.
+
+    Every mutation bumps a version number and records which course or assignment it touched,
+    once per consumer of that record: SnapshotManager reuses the unchanged parts of the previous
+    snapshot and ShardStore re-encodes only the shards of the touched courses.
+    """
+    _state_lock = ReadWriteLock()
+    _entity_locks = {}  # (kind, entity id) -> RLock
+    _entity_locks_guard = threading.Lock()
+
+    _version = 0
+    _structure_version = 0  # bumped by every exclusive (structural) mutation
+    _touched = {consumer: {"course": set(), "assignment": set()} for consumer in ("snapshots", "shards")}
+    _structural_change = {"snapshots": False, "shards": False}
+
+    @staticmethod
+    def _entity_lock(kind, key):
+        lock = LockManager._entity_locks.get((kind, key))
+        if lock is None:
+            with LockManager._entity_locks_guard:
+                lock = LockManager._entity_locks.setdefault((kind, key), threading.RLock())
+        return lock
+
+    @staticmethod
+    def _touch(kind=None, key=None):
+        """
+        Records a mutation. Without a kind the whole state is considered changed;
+        "course" and "assignment" mark a single entity, "registry" only bumps the version.
+        """
+        with LockManager._entity_locks_guard:
+            LockManager._version += 1
+            if kind is None:
+                LockManager._structural_change = dict.fromkeys(LockManager._structural_change, True)
+                LockManager._structure_version += 1
+            elif kind in ("course", "assignment"):
+                for touched in LockManager._touched.values():
+                    touched[kind].add(key)
+
+    @staticmethod
+    def _drain_touched(consumer):
+        """Returns and resets (structural_change, touched course ids, touched assignment ids) for a consumer."""
+        with LockManager._entity_locks_guard:
+            touched = LockManager._touched[consumer]
+            drained = (LockManager._structural_change[consumer], touched["course"], touched["assignment"])
+            LockManager._structural_change[consumer] = False
+            LockManager._touched[consumer] = {"course": set(), "assignment": set()}
+        return drained
+
+    @staticmethod
+    def version():
+        """Returns a number that changes whenever the manager state is mutated."""
+        return LockManager._version
+
+    @staticmethod
+    def structure_version():
+        """Returns a number that changes whenever the state is mutated under the exclusive lock."""
+        return LockManager._structure_version
+
+    @staticmethod
+    @contextmanager
+    def shared():
+        """Hold the state lock shared, e.g. while appending a new entity to a registry."""
+        LockManager._state_lock.acquire_shared()
+        try:
+            yield
+        finally:
+            LockManager._touch("registry")
+            LockManager._state_lock.release_shared()
+
+    @staticmethod
+    @contextmanager
+    def exclusive(readonly=False):
+        """
+        Hold the state lock exclusively; no other mutation runs meanwhile.
+        Pass readonly=True when only reading (saving, snapshotting) so cached snapshots stay valid.
+        """
+        LockManager._state_lock.acquire_exclusive()
+        try:
+            yield
+        finally:
+            if not readonly:
+                LockManager._touch()
+            LockManager._state_lock.release_exclusive()
+
+    @staticmethod
+    @contextmanager
+    def course(course_id):
+        """Serialize check-then-act sequences on a single course (capacity, enrollments, grades)."""
+        LockManager._state_lock.acquire_shared()
+        try:
+            with LockManager._entity_lock("course", course_id):
+                yield
+        finally:
+            LockManager._touch("course", course_id)
+            LockManager._state_lock.release_shared()
+
+    @staticmethod
+    @contextmanager
+    def assignment(assignment_id):
+        """Serialize submissions and grading on a single assignment."""
+        LockManager._state_lock.acquire_shared()
+        try:
+            with LockManager._entity_lock("assignment", assignment_id):
+                yield
+        finally:
+            LockManager._touch("assignment", assignment_id)
+            LockManager._state_lock.release_shared()
+
+
+def _encode_float(value):
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+# Exact-type encoders matching the json module's output for scalars
+_SCALAR_ENCODERS = {
+    str: json.encoder.encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+}
+
+
+def _tuple_getter(getter_type, names):
+    """attrgetter/itemgetter for several names that also returns a tuple for a single name."""
+    getter = getter_type(*names)
+    if len(names) == 1:
+        return lambda source: (getter(source),)
+    return getter
+
+
+class RecordCodec:
+    """
+    Precompiled serializer for a persisted class, built from the class's _FIELDS table of
+    (JSON key, attribute, kind, argument) entries. Kinds:
+      "value"     the attribute as is; required when loading
+      "optional"  the attribute as is; argument is the default for a missing key
+      "constant"  argument is written under the key; nothing is loaded
+      "ref"       an object or None, written as the object's `argument` attribute (its ID)
+      "refs"      a list of objects, written as a list of IDs
+      "ref_map"   an {object: value} dict, written as {ID: value}
+    References are loaded empty and linked by the managers. Rows are encoded straight to text,
+    byte-for-byte what json.dumps(rows, indent=4) (or the compact separators) would produce,
+    and objects are built without running __init__, so no throwaway IDs are generated.
+    """
+    _codecs = {}  # class -> RecordCodec
+
+    @staticmethod
+    def of(cls):
+        codec = RecordCodec._codecs.get(cls)
+        if codec is None:
+            codec = RecordCodec._codecs[cls] = RecordCodec(cls)
+        return codec
+
+    @staticmethod
+    def dumps(objects, compact=False):
+        """Encodes a list of persisted objects (of any mix of classes) as a JSON array."""
+        codecs = RecordCodec._codecs
+        rows = []
+        for obj in objects:
+            codec = codecs.get(type(obj)) or RecordCodec.of(type(obj))
+            rows.append(codec.encode_row(obj, compact))
+        if not rows:
+            return "[]"
+        if compact:
+            return "[" + ",".join(rows) + "]"
+        return "[\n    " + ",\n    ".join(rows) + "\n]"
+
+    def __init__(self, cls):
+        fields = cls._FIELDS
+        self._cls = cls
+        self._keys = tuple(key for key, _, _, _ in fields)
+        # One call fetches every attribute of a row; constants fetch a placeholder
+        self._getter = _tuple_getter(operator.attrgetter, [attr or "__class__" for _, attr, _, _ in fields])
+        self._converters = tuple(self._converter(kind, argument) for _, _, kind, argument in fields)
+        self._layouts = {compact: self._layout(fields, compact) for compact in (False, True)}
+
+        required = [(key, attr) for key, attr, kind, _ in fields if kind == "value"]
+        self._required_attrs = [attr for _, attr in required]
+        self._required_getter = _tuple_getter(operator.itemgetter, [key for key, _ in required])
+        self._optional = [(key, attr, default) for key, attr, kind, default in fields if kind == "optional"]
+        self._empty = [(attr, {"ref": None, "refs": list, "ref_map": dict}[kind])
+                       for _, attr, kind, _ in fields if kind in ("ref", "refs", "ref_map")]
+
+    @staticmethod
+    def _converter(kind, argument):
+        if kind == "constant":
+            return lambda _: argument
+        if kind == "ref":
+            return lambda obj: getattr(obj, argument) if obj else None
+        if kind == "refs":
+            return lambda objects: [getattr(obj, argument) for obj in objects]
+        if kind == "ref_map":
+            return lambda mapping: {getattr(obj, argument): value for obj, value in mapping.items()}
+        return lambda value: value
+
+    @staticmethod
+    def _layout(fields, compact):
+        """Returns (row opening, field separator, row closing, [(key prefix, value encoder)])."""
+        row_indent = "" if compact else "\n" + " " * 8
+        item_indent = "" if compact else "\n" + " " * 12
+        key_separator = ":" if compact else ": "
+        item_separator = "," + item_indent
+
+        def encode_value(value, depth=8):
+            encode = _SCALAR_ENCODERS.get(type(value))
+            if encode:
+                return encode(value)
+            if compact:
+                return json.dumps(value, separators=(",", ":"))
+            return json.dumps(value, indent=4).replace("\n", "\n" + " " * depth)
+
+        def encode_key(key):
+            return json.encoder.encode_basestring_ascii(str(key))
+
+        def value_encoder(kind, argument):
+            if kind == "constant":
+                text = encode_value(argument)
+                return lambda _: text
+            if kind == "ref":
+                return lambda obj: encode_value(getattr(obj, argument)) if obj else "null"
+            if kind == "refs":
+                return lambda objects: (
+                    "[" + item_indent
+                    + item_separator.join([encode_value(getattr(obj, argument), 12) for obj in objects])
+                    + row_indent + "]"
+                ) if objects else "[]"
+            if kind == "ref_map":
+                return lambda mapping: (
+                    "{" + item_indent
+                    + item_separator.join([encode_key(getattr(obj, argument)) + key_separator + encode_value(value, 12)
+                                           for obj, value in mapping.items()])
+                    + row_indent + "}"
+                ) if mapping else "{}"
+            return encode_value
+
+        columns = [(encode_key(key) + key_separator, value_encoder(kind, argument))
+                   for key, _, kind, argument in fields]
+        return "{" + row_indent, "," + row_indent, row_indent[:-4] + "}", columns
+
+    def encode_row(self, obj, compact=False):
+        opening, separator, closing, columns = self._layouts[compact]
+        return opening + separator.join([
+            prefix + encode(value) for (prefix, encode), value in zip(columns, self._getter(obj))
+        ]) + closing
+
+    def to_dict(self, obj):
+        return dict(zip(self._keys, [convert(value) for convert, value in zip(self._converters, self._getter(obj))]))
+
+    def build(self, data):
+        """Creates an instance from a dictionary without calling __init__."""
+        obj = self._cls.__new__(self._cls)
+        state = obj.__dict__
+        state.update(zip(self._required_attrs, self._required_getter(data)))
+        for key, attr, default in self._optional:
+            state[attr] = data.get(key, default)
+        for attr, empty in self._empty:
+            state[attr] = empty() if empty else None
+        return obj
 
 
 # Base Abstract Class: Person
 class Person(ABC):
+    _FIELDS = (
+        ("id", "_id", "value", None),
+        ("first_name", "_first_name", "value", None),
+        ("last_name", "_last_name", "value", None),
+        ("age", "_age", "value", None),
+        ("sex", "_sex", "value", None),
+        ("birthdate", "_birthdate", "value", None),
+        ("place_of_birth", "_place_of_birth", "value", None),
+        ("email", "email", "optional", ""),
+        ("password", "password", "optional", ""),
+    )
+
     def __init__(self, first_name, last_name, age, sex, birthdate, place_of_birth):
         self._id = self._generate_id()
         self._first_name = first_name
@@ -72,22 +761,17 @@ class Person(ABC):
     
     def to_dict(self):
         """
-        Converts the common Person attributes into a dictionary.
+        Converts the user into a dictionary for JSON serialization, following its class's _FIELDS.
         """
-        return {
-            "id": self._id,
-            "first_name": self._first_name,
-            "last_name": self._last_name,
-            "age": self._age,
-            "sex": self._sex,
-            "birthdate": self._birthdate,
-            "place_of_birth": self._place_of_birth,
-            "email": self.email,
-            "password": self.password,
-        }
+        return RecordCodec.of(type(self)).to_dict(self)
 
 # Subclass: Student
 class Student(Person):
+    _FIELDS = Person._FIELDS + (
+        ("type", None, "constant", "Student"),
+        ("enrolled_courses", "_enrolled_courses", "refs", "_course_id"),
+    )
+
     def __init__(self, first_name, last_name, age, sex, birthdate, place_of_birth):
         super().__init__(first_name, last_name, age, sex, birthdate, place_of_birth)
         self._id = UserManager._generate_user_id("Student")  # Consistent ID
@@ -117,34 +801,12 @@ class Student(Person):
               f"Enrolled Courses: {enrolled_courses}")
     
     # New JSON Deserialization Method
-    def to_dict(self):
-        """
-        Converts the Student object into a dictionary for JSON serialization.
-        """
-        return {
-            **super().to_dict(),
-            "type": "Student",
-            "enrolled_courses": [course._course_id for course in self._enrolled_courses]
-        }
-
     @staticmethod
     def from_dict(data):
         """
-        Rebuilds a Student object from a dictionary.
+        Rebuilds a Student object from a dictionary. Courses are linked after loading.
         """
-        student = Student(
-            data["first_name"],
-            data["last_name"],
-            data["age"],
-            data["sex"],
-            data["birthdate"],
-            data["place_of_birth"]
-        )
-        student._id = data["id"]
-        student.email = data.get("email", "")
-        student.password = data.get("password", "")
-        student._enrolled_courses = []  # Link courses after loading
-        return student
+        return RecordCodec.of(Student).build(data)
     
     @classmethod
     def motivation_assignment(cls):
@@ -178,6 +840,11 @@ class Student(Person):
 
 # Subclass: Instructor
 class Instructor(Person):
+    _FIELDS = Person._FIELDS + (
+        ("type", None, "constant", "Instructor"),
+        ("assigned_courses", "_assigned_courses", "refs", "_course_id"),
+    )
+
     def __init__(self, first_name, last_name, age, sex, birthdate, place_of_birth):
         super().__init__(first_name, last_name, age, sex, birthdate, place_of_birth)
         self._id = UserManager._generate_user_id("Instructor")  # Consistent ID
@@ -208,34 +875,12 @@ class Instructor(Person):
               f"Password: {self.password}\n"
               f"Assigned Courses: {assigned_courses}")
     
-    def to_dict(self):
-        """
-        Converts the Instructor object into a dictionary for JSON serialization.
-        """
-        return {
-            **super().to_dict(),
-            "type": "Instructor",
-            "assigned_courses": [course._course_id for course in self._assigned_courses],
-        }
-
     @staticmethod
     def from_dict(data):
         """
-        Rebuilds an Instructor object from a dictionary.
+        Rebuilds an Instructor object from a dictionary. Courses are linked after loading.
         """
-        instructor = Instructor(
-            data["first_name"],
-            data["last_name"],
-            data["age"],
-            data["sex"],
-            data["birthdate"],
-            data["place_of_birth"],
-        )
-        instructor._id = data["id"]
-        instructor.email = data.get("email", "")
-        instructor.password = data.get("password", "")
-        instructor._assigned_courses = []  # Link courses after loading
-        return instructor
+        return RecordCodec.of(Instructor).build(data)
     
     @classmethod
     def motivation_teaching(cls):
@@ -268,6 +913,17 @@ class Instructor(Person):
         print("\n🤝 Collaboration among educators sparks creativity and innovation. Share your ideas!")
 
 class Course:
+    _FIELDS = (
+        ("course_id", "_course_id", "value", None),
+        ("name", "_name", "value", None),
+        ("start_date", "_start_date", "value", None),
+        ("end_date", "_end_date", "value", None),
+        ("description", "_description", "value", None),
+        ("capacity", "_capacity", "value", None),
+        ("enrolled_students", "_enrolled_students", "refs", "_id"),
+        ("instructor", "_instructor", "ref", "_id"),
+    )
+
     def __init__(self, course_id, name, start_date, end_date, description, capacity):
         self._course_id = course_id
         self._name = name
@@ -280,13 +936,14 @@ class Course:
 
     def assign_instructor(self, instructor):
         """Assigns an instructor to the course."""
-        if self._instructor:
-            print(f"Course {self._name} already has an assigned instructor.")
-            return
+        with LockManager.course(self._course_id):
+            if self._instructor:
+                print(f"Course {self._name} already has an assigned instructor.")
+                return
 
-        self._instructor = instructor
-        if self not in instructor._assigned_courses:
-            instructor._assigned_courses.append(self)  # Update instructor's assigned courses
+            self._instructor = instructor
+            if self not in instructor._assigned_courses:
+                instructor._assigned_courses.append(self)  # Update instructor's assigned courses
         print(f"Instructor {instructor._first_name} {instructor._last_name} has been assigned to course {self._name}.")
 
     def __str__(self):
@@ -297,8 +954,13 @@ class Course:
                 f"Instructor: {instructor_name}\nEnrolled Students: {len(self._enrolled_students)} / {self._capacity}")
   
     def add_student(self, student):
-        if len(self._enrolled_students) < self._capacity:
-            self._enrolled_students.append(student)
+        with LockManager.course(self._course_id):
+            has_room = len(self._enrolled_students) < self._capacity
+            if has_room:
+                self._enrolled_students.append(student)
+                if self not in student._enrolled_courses:
+                    student._enrolled_courses.append(self)
+        if has_room:
             print(f"Student {student._first_name} {student._last_name} added to course {self._name}.")
         else:
             print(f"Course {self._name} is full. Cannot add student {student._first_name} {student._last_name}.")
@@ -307,32 +969,15 @@ class Course:
         """
         Converts the Course object into a dictionary for JSON serialization.
         """
-        return {
-            "course_id": self._course_id,
-            "name": self._name,
-            "start_date": self._start_date,
-            "end_date": self._end_date,
-            "description": self._description,
-            "capacity": self._capacity,
-            "enrolled_students": [student._id for student in self._enrolled_students],
-            "instructor": self._instructor._id if self._instructor else None,
-        }
+        return RecordCodec.of(Course).to_dict(self)
 
     @staticmethod
     def from_dict(data):
         """
         Rebuilds a Course object from a dictionary.
+        Enrolled students and instructor will be linked separately.
         """
-        course = Course(
-            course_id=data["course_id"],
-            name=data["name"],
-            start_date=data["start_date"],
-            end_date=data["end_date"],
-            description=data["description"],
-            capacity=data["capacity"],
-        )
-        # Enrolled students and instructor will be linked separately
-        return course
+        return RecordCodec.of(Course).build(data)
 
     def __str__(self):
         instructor_name = f"{self._instructor._first_name} {self._instructor._last_name}" if self._instructor else "None"
@@ -349,6 +994,14 @@ class Course:
 
 # Class: Enrollment
 class Enrollment:
+    _FIELDS = (
+        ("enrollment_id", "_enrollment_id", "value", None),
+        ("student_id", "_student", "ref", "_id"),
+        ("course_id", "_course", "ref", "_course_id"),
+        ("payment_status", "_payment_status", "value", None),
+        ("enrollment_status", "_enrollment_status", "value", None),
+    )
+
     def __init__(self, student, course, payment_status="Pending", enrollment_status="Pending"):
         self._enrollment_id = self._generate_enrollment_id()
         self._student = student
@@ -357,18 +1010,34 @@ class Enrollment:
         self._enrollment_status = enrollment_status
 
     def approve(self):
-        """Approves the enrollment and adds the student to the course."""
-        self._enrollment_status = "Approved"
-
-        # Add student to the course's enrolled students list if not already present
-        if self._student not in self._course._enrolled_students:
-            self._course._enrolled_students.append(self._student)
+        """
+        Approves the enrollment and adds the student to the course, unless the course is full.
+        Returns whether the enrollment was approved.
+        """
+        with LockManager.course(self._course._course_id):
+            # Add student to the course's enrolled students list if not already present
+            newly_added = self._student not in self._course._enrolled_students
+            full = newly_added and len(self._course._enrolled_students) >= self._course._capacity
+            if not full:
+                self._enrollment_status = "Approved"
+                if newly_added:
+                    self._course._enrolled_students.append(self._student)
+                if self._course not in self._student._enrolled_courses:
+                    self._student._enrolled_courses.append(self._course)
+        if full:
+            print(f"Course {self._course._name} is full. Enrollment not approved.")
+            return False
+        if newly_added:
             print(f"Student {self._student._first_name} {self._student._last_name} added to course {self._course._name}.")
         else:
             print(f"Student {self._student._first_name} {self._student._last_name} is already enrolled in course {self._course._name}.")
+        EventBus.publish("enrollment_approved", enrollment=self)
+        return True
    
     def decline(self):
-        self._enrollment_status = "Declined"
+        with LockManager.course(self._course._course_id):
+            self._enrollment_status = "Declined"
+        EventBus.publish("enrollment_declined", enrollment=self)
 
     def is_approved(self):
         return self._enrollment_status == "Approved"
@@ -382,13 +1051,7 @@ class Enrollment:
         """
         Converts the Enrollment object into a dictionary for JSON serialization.
         """
-        return {
-            "enrollment_id": self._enrollment_id,
-            "student_id": self._student._id if self._student else None,
-            "course_id": self._course._course_id if self._course else None,
-            "payment_status": self._payment_status,
-            "enrollment_status": self._enrollment_status,
-        }
+        return RecordCodec.of(Enrollment).to_dict(self)
 
     @staticmethod
     def from_dict(data):
@@ -396,14 +1059,7 @@ class Enrollment:
         Rebuilds an Enrollment object from a dictionary.
         Student and Course will be linked separately.
         """
-        enrollment = Enrollment(
-            student=None,  # Link later
-            course=None,   # Link later
-            payment_status=data["payment_status"],
-            enrollment_status=data["enrollment_status"],
-        )
-        enrollment._enrollment_id = data["enrollment_id"]
-        return enrollment
+        return RecordCodec.of(Enrollment).build(data)
     
     @staticmethod
     def _generate_enrollment_id():
@@ -411,6 +1067,16 @@ class Enrollment:
 
 # Class: Assignment
 class Assignment:
+    _FIELDS = (
+        ("assignment_id", "_assignment_id", "value", None),
+        ("course_id", "_course", "ref", "_course_id"),
+        ("due_date", "_due_date", "value", None),
+        ("description", "_description", "value", None),
+        ("max_grade", "_max_grade", "optional", 10.0),
+        ("submitted_students", "_submitted_students", "ref_map", "_id"),
+        ("graded_students", "_graded_students", "ref_map", "_id"),
+    )
+
     def __init__(self, assignment_id, course, due_date, description, max_grade):
         self._assignment_id = assignment_id
         self._course = course
@@ -424,8 +1090,12 @@ class Assignment:
         """
         Allows a student to submit an assignment.
         """
-        if student not in self._submitted_students:
-            self._submitted_students[student] = "Submitted"
+        with LockManager.assignment(self._assignment_id):
+            first_submission = student not in self._submitted_students
+            if first_submission:
+                self._submitted_students[student] = "Submitted"
+                AssignmentManager._submissions_by_student.setdefault(student._id, {})[self] = None
+        if first_submission:
             print(f"Assignment submitted by {student._first_name} {student._last_name}.")
         else:
             print(f"Duplicate Submission: {student._first_name} {student._last_name} has already submitted this assignment.")
@@ -435,16 +1105,20 @@ class Assignment:
         """
         Grades a student's submission, ensuring it doesn't exceed the max grade.
         """
-        if student not in self._submitted_students:
+        with LockManager.assignment(self._assignment_id):
+            submitted = student in self._submitted_students
+            if submitted and grade <= self._max_grade:
+                self._graded_students[student] = grade
+
+        if not submitted:
             print(f"Error: {student._first_name} {student._last_name} has not submitted this assignment.")
             return
 
         if grade > self._max_grade:
             print(f"Error: Grade {grade} exceeds the maximum grade of {self._max_grade}.")
             return
-
-        self._graded_students[student] = grade
         print(f"{student._first_name} {student._last_name} has been graded {grade}/{self._max_grade} for assignment {self._assignment_id}.") 
+        EventBus.publish("submission_graded", assignment=self, student=student, grade=grade)
 
     def __str__(self):
         return (f"Assignment ID: {self._assignment_id}\n"
@@ -458,15 +1132,7 @@ class Assignment:
         """
         Converts the Assignment object into a dictionary for JSON serialization.
         """
-        return {
-            "assignment_id": self._assignment_id,
-            "course_id": self._course._course_id if self._course else None,
-            "due_date": self._due_date,
-            "description": self._description,
-            "max_grade": self._max_grade,  # Include max grade
-            "submitted_students": {student._id: status for student, status in self._submitted_students.items()},
-            "graded_students": {student._id: grade for student, grade in self._graded_students.items()},
-        }
+        return RecordCodec.of(Assignment).to_dict(self)
 
 
     @staticmethod
@@ -475,20 +1141,19 @@ class Assignment:
         Rebuilds an Assignment object from a dictionary.
         Submitted and graded students will be linked later.
         """
-        max_grade = data.get("max_grade", 10.0)  # Default max grade to 10.0 if not present
-        assignment = Assignment(
-            assignment_id=data["assignment_id"],
-            course=course,
-            due_date=data["due_date"],
-            description=data["description"],
-            max_grade=max_grade  # Pass max grade to the constructor
-        )
-        assignment._submitted_students = {}  # Link later
-        assignment._graded_students = {}    # Link later
+        assignment = RecordCodec.of(Assignment).build(data)  # max_grade defaults to 10.0
+        assignment._course = course
         return assignment
 
 # Class: Grade
 class Grade:
+    _FIELDS = (
+        ("grade_id", "_grade_id", "value", None),
+        ("student_id", "_student", "ref", "_id"),
+        ("course_id", "_course", "ref", "_course_id"),
+        ("grade_value", "_grade_value", "value", None),
+    )
+
     def __init__(self, student, course, grade_value):
         self._grade_id = self._generate_grade_id()
         self._student = student
@@ -514,12 +1179,7 @@ class Grade:
         """
         Converts the Grade object into a dictionary for JSON serialization.
         """
-        return {
-            "grade_id": self._grade_id,
-            "student_id": self._student._id if self._student else None,
-            "course_id": self._course._course_id if self._course else None,
-            "grade_value": self._grade_value,
-        }
+        return RecordCodec.of(Grade).to_dict(self)
 
     @staticmethod
     def from_dict(data):
@@ -527,13 +1187,7 @@ class Grade:
         Rebuilds a Grade object from a dictionary.
         Student and Course will be linked separately.
         """
-        grade = Grade(
-            student=None,  # Link later
-            course=None,   # Link later
-            grade_value=data["grade_value"],
-        )
-        grade._grade_id = data["grade_id"]
-        return grade
+        return RecordCodec.of(Grade).build(data)
 
     def __str__(self):
         return (
@@ -545,9 +1199,69 @@ class Grade:
 
 class UserManager:
     _users = []
+    _users_by_id = {}  # Index of _users by user ID
+    _user_positions = {}  # id(user) -> index in _users
+
+    @staticmethod
+    def _add_user(user):
+        """Adds a user to the registry and its ID index. The caller holds the state lock."""
+        add_to_registry(UserManager._users, UserManager._user_positions, user)
+        UserManager._users_by_id.setdefault(getattr(user, "_id", None), user)
+
+    @staticmethod
+    def remove_users(user_ids, user_type=None):
+        """
+        Deletes users (optionally only those of user_type) together with everything that refers
+        to them: course rosters and instructor slots, enrollments, submissions and grades,
+        instructor applications and notifications. Each user's records are found through the
+        reverse indexes and every removal from a registry is O(1), so the cost follows the
+        users' own records rather than the size of the data. Returns the removed users.
+        """
+        if RecordStore.active():
+            for user_id in user_ids:
+                RecordStore.fetch_user(user_id)  # their whole working set, so the cascade is complete
+        with LockManager.exclusive():
+            users = [
+                user for user in map(UserManager._users_by_id.get, dict.fromkeys(user_ids))
+                if user is not None and (user_type is None or isinstance(user, user_type))
+            ]
+            enrollments, grades = [], []
+            for user in users:
+                if isinstance(user, Student):
+                    for course in user._enrolled_courses:
+                        if user in course._enrolled_students:
+                            course._enrolled_students.remove(user)
+                    user._enrolled_courses = []
+                    for assignment in AssignmentManager._submissions_by_student.pop(user._id, ()):
+                        assignment._submitted_students.pop(user, None)
+                        assignment._graded_students.pop(user, None)
+                    enrollments.extend(EnrollmentManager._enrollments_by_student.get(user._id, ()))
+                    grades.extend(GradeManager._grades_by_student.get(user._id, ()))
+                elif isinstance(user, Instructor):
+                    for course in user._assigned_courses:
+                        if course._instructor is user:
+                            course._instructor = None
+                    user._assigned_courses = []
+                if NotificationManager._inboxes.pop(user._id, None) is not None:
+                    NotificationManager._dirty = True
+
+            removed = set(users)
+            if any(isinstance(user, Instructor) for user in users):
+                for applicants in CourseManager._applications.values():
+                    applicants[:] = [applicant for applicant in applicants if applicant not in removed]
+            EnrollmentManager._discard_enrollments(enrollments)
+            GradeManager._discard_grades(grades)
+            discard_from_registry(UserManager._users, UserManager._user_positions, users)
+            for user in users:
+                if UserManager._users_by_id.get(user._id) is user:
+                    del UserManager._users_by_id[user._id]
+        RecordStore.record_deletions("users", [user._id for user in users])
+        return users
 
     @staticmethod
     def login(email, password):
+        if RecordStore.active():
+            RecordStore.fetch_user_by_email(email)
         for user in UserManager._users:
             if user.email == email and user.password == password:
                 print("Login successful!")
@@ -573,18 +1287,20 @@ class UserManager:
             return None
         user.email = email
         user.password = password
-        UserManager._users.append(user)
+        with LockManager.shared():
+            UserManager._add_user(user)
         print(f"Account created! Email: {email} Password: {password}")
         return user
 
     @staticmethod
     def find_user_by_id(user_id):
         """Finds and returns a user by their ID."""
-        for user in UserManager._users:
-            if getattr(user, "_id", None) == user_id:  # Safely check _id attribute
-                return user
-        print("User not found.")
-        return None
+        user = UserManager._users_by_id.get(user_id)
+        if RecordStore.active():
+            user = RecordStore.fetch_user(user_id)
+        if user is None:
+            print("User not found.")
+        return user
 
 
     @staticmethod
@@ -635,30 +1351,24 @@ class UserManager:
     @staticmethod
     def remove_student(student_id):
         """
-        Removes a student by their ID and updates JSON files.
+        Removes a student and everything that refers to them by their ID, and updates JSON files.
         """
-        for user in UserManager._users:
-            if isinstance(user, Student) and user._id == student_id:
-                UserManager._users.remove(user)
-                print(f"Student with ID {student_id} has been removed.")
-                UserManager.save_users()
-                CourseManager.save_courses()  # Update courses JSON
-                return
+        if UserManager.remove_users([student_id], Student):
+            print(f"Student with ID {student_id} has been removed.")
+            SaveScheduler.mark_dirty(*SaveScheduler.COLLECTIONS)  # The removal cascades into every data file
+            return
         print(f"Student with ID {student_id} not found.")
 
 
     @staticmethod
     def remove_instructor(instructor_id):
         """
-        Removes an instructor by their ID and updates JSON files.
+        Removes an instructor and everything that refers to them by their ID, and updates JSON files.
         """
-        for user in UserManager._users:
-            if isinstance(user, Instructor) and user._id == instructor_id:
-                UserManager._users.remove(user)
-                print(f"Instructor with ID {instructor_id} has been removed.")
-                UserManager.save_users()
-                CourseManager.save_courses()  # Update courses JSON
-                return
+        if UserManager.remove_users([instructor_id], Instructor):
+            print(f"Instructor with ID {instructor_id} has been removed.")
+            SaveScheduler.mark_dirty(*SaveScheduler.COLLECTIONS)  # The removal cascades into every data file
+            return
         print(f"Instructor with ID {instructor_id} not found.")
 
 
@@ -736,11 +1446,9 @@ class UserManager:
                 return
 
             student = UserManager.find_user_by_id(student_id)
-            if not student or student not in course._enrolled_students:
+            if not student or not CourseManager.drop_student(course, student):
                 print("Student not found in this course.")
             else:
-                course._enrolled_students.remove(student)
-                student._enrolled_courses.remove(course)
                 print(f"Student {student._first_name} {student._last_name} has been dropped from course {course._name}.")
                 return
 
@@ -769,9 +1477,14 @@ class UserManager:
             confirmation = input("Do you want to unassign this instructor? (yes/no or 'R' to return): ").strip().lower()
 
             if confirmation == "yes":
-                instructor = course._instructor
-                course._instructor = None
-                instructor._assigned_courses.remove(course)
+                with LockManager.course(course._course_id):
+                    instructor = course._instructor
+                    course._instructor = None
+                    if instructor and course in instructor._assigned_courses:
+                        instructor._assigned_courses.remove(course)
+                if not instructor:
+                    print(f"No instructor is assigned to the course {course._name}.")
+                    return
                 print(f"Instructor {instructor._first_name} {instructor._last_name} has been unassigned from course {course._name}.")
                 return
             elif confirmation == "no":
@@ -787,41 +1500,58 @@ class UserManager:
 
     
     @staticmethod
-    def load_users():
+    def load_users(users_data=None):
         """
-        Load users from JSON and link assigned courses for instructors.
+        Load users from JSON (or from already decoded rows) and link assigned courses for instructors.
         """
-        users_data = load_json("users.json")
-        for user_data in users_data:
-            if user_data["type"] == "Student":
-                student = Student.from_dict(user_data)
-                UserManager._users.append(student)
-            elif user_data["type"] == "Instructor":
-                instructor = Instructor.from_dict(user_data)
-                UserManager._users.append(instructor)
-            elif user_data["type"] == "Admin":
-                admin = PlatformAdmin.from_dict(user_data)
-                UserManager._users.append(admin)
-
-        # Link assigned courses for instructors
-        for user in UserManager._users:
-            if isinstance(user, Instructor):
-                user._assigned_courses = [
-                    CourseManager.get_course_by_id(course_id)
-                    for course_id in user_data.get("assigned_courses", [])
-                    if CourseManager.get_course_by_id(course_id)
+        if users_data is None:
+            users_data = load_json("users.json")
+        with log_phase("load_users", warn_on=("unknown_type",)) as counters, LockManager.exclusive():
+            UserManager._users = []  # Clear existing users to avoid duplication
+            UserManager._users_by_id, UserManager._user_positions = {}, {}
+            assigned_course_ids = []  # (instructor, course IDs from that instructor's own record)
+
+            for user_data in users_data:
+                if user_data["type"] == "Student":
+                    student = Student.from_dict(user_data)
+                    UserManager._add_user(student)
+                elif user_data["type"] == "Instructor":
+                    instructor = Instructor.from_dict(user_data)
+                    UserManager._add_user(instructor)
+                    assigned_course_ids.append((instructor, user_data.get("assigned_courses", [])))
+                elif user_data["type"] == "Admin":
+                    admin = PlatformAdmin.from_dict(user_data)
+                    UserManager._add_user(admin)
+                else:
+                    counters["unknown_type"] += 1
+                    continue
+                counters[user_data["type"].lower()] += 1
+
+            # Link assigned courses for instructors (courses loaded later link themselves in load_courses)
+            for instructor, course_ids in assigned_course_ids:
+                instructor._assigned_courses = [
+                    course for course in map(CourseManager.get_course_by_id, course_ids) if course
                 ]
 
 
     @staticmethod
     def save_users():
         """Save users to JSON."""
-        print("DEBUG: Saving users to users.json...")
-        users_data = [user.to_dict() for user in UserManager._users]
-        save_json("users.json", users_data)
-        print("DEBUG: Users saved successfully.")
+        with log_phase("save_users") as counters:
+            with LockManager.exclusive(readonly=True):
+                text = RecordCodec.dumps(UserManager._users, COMPACT_JSON)
+                counters["saved"] = len(UserManager._users)
+            return save_json_text("users.json", text)
 
 class PlatformAdmin:
+    _FIELDS = (
+        ("id", "_id", "value", None),
+        ("type", None, "constant", "Admin"),
+        ("name", "_admin_name", "value", None),
+        ("email", "email", "optional", ""),
+        ("password", "password", "optional", ""),
+    )
+
     def __init__(self, admin_id, admin_name):
         self._id = admin_id  # Unique identifier for the admin
         self._admin_name = admin_name
@@ -854,23 +1584,16 @@ class PlatformAdmin:
 
     
     def to_dict(self):
-        return {
-            "id": self._id,
-            "type": "Admin",
-            "name": self._admin_name,
-            "email": self.email,
-            "password": self.password
-        }
+        return RecordCodec.of(PlatformAdmin).to_dict(self)
 
     @staticmethod
     def from_dict(data):
-        admin = PlatformAdmin(data["id"], data["name"])
-        admin.email = data.get("email", "")
-        admin.password = data.get("password", "")
-        return admin
+        return RecordCodec.of(PlatformAdmin).build(data)
 
 class CourseManager:
     _courses = []
+    _courses_by_id = {}  # Index of _courses by course ID
+    _course_positions = {}  # id(course) -> index in _courses
     _applications = {}  # Dictionary to track instructor applications by course ID
 
 
@@ -878,15 +1601,52 @@ class CourseManager:
     def create_course(name, start_date, end_date, description, capacity):
         course_id = f"CRS-{str(uuid.uuid4())[:6]}"
         course = Course(course_id, name, start_date, end_date, description, capacity)
-        CourseManager._courses.append(course)
+        with LockManager.shared():
+            add_to_registry(CourseManager._courses, CourseManager._course_positions, course)
+            CourseManager._courses_by_id.setdefault(course_id, course)
         print(f"Course created: {course}")
         return course
 
+    @staticmethod
+    def remove_courses(course_ids):
+        """
+        Deletes courses together with their roster links, instructor link, applications,
+        enrollments, assignments (and their submissions) and grades. Cost is proportional to
+        the courses' own records plus one compaction of each registry per call.
+        Returns the removed courses.
+        """
+        if RecordStore.active():
+            for course_id in course_ids:
+                if course_id not in CourseManager._courses_by_id:
+                    RecordStore.fetch_course(course_id)
+        with LockManager.exclusive():
+            courses = [course for course in map(CourseManager._courses_by_id.get, dict.fromkeys(course_ids)) if course]
+            enrollments, assignments, grades = [], [], []
+            for course in courses:
+                for student in course._enrolled_students:
+                    if course in student._enrolled_courses:
+                        student._enrolled_courses.remove(course)
+                if course._instructor and course in course._instructor._assigned_courses:
+                    course._instructor._assigned_courses.remove(course)
+                CourseManager._applications.pop(course._course_id, None)
+                enrollments.extend(EnrollmentManager._enrollments_by_course.get(course._course_id, ()))
+                assignments.extend(AssignmentManager._assignments_by_course.get(course._course_id, ()))
+                grades.extend(GradeManager._grades_by_course.get(course._course_id, ()))
+
+            EnrollmentManager._discard_enrollments(enrollments)
+            AssignmentManager._discard_assignments(assignments)
+            GradeManager._discard_grades(grades)
+            discard_from_registry(CourseManager._courses, CourseManager._course_positions, courses)
+            for course in courses:
+                del CourseManager._courses_by_id[course._course_id]
+        RecordStore.record_deletions("courses", [course._course_id for course in courses])
+        return courses
+
     @staticmethod
     def remove_course(course_id):
-        course = CourseManager.get_course_by_id(course_id)
+        course = next(iter(CourseManager.remove_courses([course_id])), None)
         if course:
-            CourseManager._courses.remove(course)
+            SaveScheduler.mark_dirty(*SaveScheduler.COLLECTIONS)
             print(f"Course {course_id} removed.")
         else:
             print("Course not found.")
@@ -894,10 +1654,9 @@ class CourseManager:
     @staticmethod
     def get_course_by_id(course_id):
         """Retrieve a course by its ID."""
-        for course in CourseManager._courses:
-            if course._course_id == course_id:
-                return course
-        return None
+        if RecordStore.active():
+            return RecordStore.fetch_course(course_id)
+        return CourseManager._courses_by_id.get(course_id)
 
     @staticmethod
     def view_all_courses():
@@ -983,18 +1742,20 @@ class CourseManager:
     @staticmethod
     def apply_to_course(instructor, course):
         """Allows an instructor to apply for a course if it has no assigned instructor."""
-        if course._instructor:
-            print(f"Course {course._name} already has an assigned instructor: {course._instructor._first_name} {course._instructor._last_name}. You cannot apply.")
-            return
-
-        if course._course_id not in CourseManager._applications:
-            CourseManager._applications[course._course_id] = []
-
-        # Check for duplicate applications
-        if instructor in CourseManager._applications[course._course_id]:
+        with LockManager.course(course._course_id):
+            assigned = course._instructor
+            if not assigned:
+                applications = CourseManager._applications.setdefault(course._course_id, [])
+                # Check for duplicate applications
+                duplicate = instructor in applications
+                if not duplicate:
+                    applications.append(instructor)
+
+        if assigned:
+            print(f"Course {course._name} already has an assigned instructor: {assigned._first_name} {assigned._last_name}. You cannot apply.")
+        elif duplicate:
             print(f"Instructor {instructor._first_name} {instructor._last_name} has already applied for this course.")
         else:
-            CourseManager._applications[course._course_id].append(instructor)
             print(f"Instructor {instructor._first_name} {instructor._last_name} successfully applied for course {course._name}.")
 
     @staticmethod
@@ -1010,28 +1771,40 @@ class CourseManager:
     @staticmethod
     def view_users_in_course(course_id):
         """Displays users (instructor and students) in a specific course."""
-        course = CourseManager.get_course_by_id(course_id)
+        snapshot = SnapshotManager.take()
+        course = snapshot.courses.get(course_id)
         if not course:
             print("Course not found.")
             return
 
-        print(f"\n--- Users in Course: {course._name} ---")
-        print(f"Course ID: {course._course_id}")
-        print(f"Course Name: {course._name}")
-        print(f"Capacity: {len(course._enrolled_students)}/{course._capacity}")
+        print(f"\n--- Users in Course: {course.name} ---")
+        print(f"Course ID: {course.course_id}")
+        print(f"Course Name: {course.name}")
+        print(f"Capacity: {len(course.enrolled_ids)}/{course.capacity}")
         print("\nInstructor:")
-        if course._instructor:
-            print(f"ID: {course._instructor._id}, Name: {course._instructor._first_name} {course._instructor._last_name}")
+        if course.instructor_id:
+            print(f"ID: {course.instructor_id}, Name: {snapshot.user_name(course.instructor_id)}")
         else:
             print("No instructor assigned.")
 
         print("\nStudents:")
-        if course._enrolled_students:
-            for student in course._enrolled_students:
-                print(f"ID: {student._id}, Name: {student._first_name} {student._last_name}")
+        if course.enrolled_ids:
+            for student_id in course.enrolled_ids:
+                print(f"ID: {student_id}, Name: {snapshot.user_name(student_id)}")
         else:
             print("No students enrolled.")
     
+    @staticmethod
+    def drop_student(course, student):
+        """Removes a student from a course; returns False if the student was not enrolled in it."""
+        with LockManager.course(course._course_id):
+            if student not in course._enrolled_students:
+                return False
+            course._enrolled_students.remove(student)
+            if course in student._enrolled_courses:
+                student._enrolled_courses.remove(course)
+        return True
+
     @staticmethod
     def view_students_in_course(course):
         """Displays all students enrolled in a specific course."""
@@ -1045,71 +1818,139 @@ class CourseManager:
             print(f"Student ID: {student._id}, Student Name: {student._first_name} {student._last_name}")
     
     @staticmethod
-    def load_courses():
+    def load_courses(courses_data=None):
         """
-        Load courses from JSON and link instructors and students.
+        Load courses from JSON (or from already decoded rows) and link instructors and students.
         """
-        courses_data = load_json("courses.json")
-        CourseManager._courses = []  # Clear existing courses to avoid duplication
+        if courses_data is None:
+            courses_data = load_json("courses.json")
+        with log_phase("load_courses") as counters, LockManager.exclusive():
+            CourseManager._courses = []  # Clear existing courses to avoid duplication
+            CourseManager._courses_by_id, CourseManager._course_positions = {}, {}
+            users_by_id = UserManager._users_by_id
+
+            for course_data in courses_data:
+                # Create Course objects
+                course = Course.from_dict(course_data)
+                add_to_registry(CourseManager._courses, CourseManager._course_positions, course)
+                CourseManager._courses_by_id.setdefault(course._course_id, course)
+                CourseManager._link_course(course, course_data, users_by_id)
+
+            # On a reload, load_users resolved instructors' courses against the previous Course
+            # objects; point them at the new ones (by ID) so nothing is listed twice
+            for user in UserManager._users:
+                if isinstance(user, Instructor) and user._assigned_courses:
+                    current = (CourseManager._courses_by_id.get(course._course_id) for course in user._assigned_courses)
+                    user._assigned_courses = list(dict.fromkeys(course for course in current if course))
+            counters["loaded"] = len(CourseManager._courses)
 
-        for course_data in courses_data:
-            # Create Course objects
-            course = Course.from_dict(course_data)
-            CourseManager._courses.append(course)
-
-            # Link instructor
-            if course_data["instructor"]:
-                instructor = UserManager.find_user_by_id(course_data["instructor"])
-                if instructor:
-                    course._instructor = instructor
-                    if course not in instructor._assigned_courses:
-                        instructor._assigned_courses.append(course)
-
-            # Link enrolled students
-            course._enrolled_students = [
-                UserManager.find_user_by_id(student_id)
-                for student_id in course_data["enrolled_students"]
-                if UserManager.find_user_by_id(student_id)
-            ]
+    @staticmethod
+    def _link_course(course, course_data, users_by_id):
+        """Links a course to the instructor and students named in its row. The caller holds the state lock exclusively."""
+        # Link instructor
+        if course_data["instructor"]:
+            instructor = users_by_id.get(course_data["instructor"])
+            if instructor:
+                course._instructor = instructor
+                if course not in instructor._assigned_courses:
+                    instructor._assigned_courses.append(course)
+
+        # Link enrolled students
+        course._enrolled_students = [
+            student for student in map(users_by_id.get, course_data["enrolled_students"]) if student
+        ]
+        for student in course._enrolled_students:
+            if course not in student._enrolled_courses:
+                student._enrolled_courses.append(course)
 
     @staticmethod
     def save_courses():
         """
         Save all courses to JSON.
         """
-        courses_data = [course.to_dict() for course in CourseManager._courses]
-        save_json("courses.json", courses_data)
+        with log_phase("save_courses") as counters:
+            with LockManager.exclusive(readonly=True):
+                text = RecordCodec.dumps(CourseManager._courses, COMPACT_JSON)
+                counters["saved"] = len(CourseManager._courses)
+            return save_json_text("courses.json", text)
 
 class EnrollmentManager:
     _enrollments = []
+    _enrollments_by_id = {}  # Index of _enrollments by enrollment ID
+    _enrollments_by_student = {}  # Student ID -> that student's enrollments
+    _enrollments_by_course = {}  # Course ID -> enrollments in that course
+    _enrollment_positions = {}  # id(enrollment) -> index in _enrollments
+
+    @staticmethod
+    def _add_enrollment(enrollment):
+        """Adds an enrollment to the registry and its indexes. The caller holds the course lock or the state lock."""
+        add_to_registry(EnrollmentManager._enrollments, EnrollmentManager._enrollment_positions, enrollment)
+        EnrollmentManager._enrollments_by_id.setdefault(enrollment._enrollment_id, enrollment)
+        EnrollmentManager._enrollments_by_student.setdefault(enrollment._student._id, []).append(enrollment)
+        EnrollmentManager._enrollments_by_course.setdefault(enrollment._course._course_id, []).append(enrollment)
+
+    @staticmethod
+    def _discard_enrollments(enrollments):
+        """Removes enrollments from the registry and its indexes. The caller holds the state lock exclusively."""
+        if not enrollments:
+            return
+        dropped = set(enrollments)
+        for enrollment in enrollments:
+            if EnrollmentManager._enrollments_by_id.get(enrollment._enrollment_id) is enrollment:
+                del EnrollmentManager._enrollments_by_id[enrollment._enrollment_id]
+        discard_from_index(EnrollmentManager._enrollments_by_student, {e._student._id for e in enrollments}, dropped)
+        discard_from_index(EnrollmentManager._enrollments_by_course, {e._course._course_id for e in enrollments}, dropped)
+        discard_from_registry(EnrollmentManager._enrollments, EnrollmentManager._enrollment_positions, enrollments)
 
     
     @staticmethod
-    def create_enrollment(student, course):
+    def create_enrollment(student, course, payment_method=None):
+        """
+        Creates a pending enrollment. Prompts for the payment method unless one is given
+        (either the menu number or the method name, e.g. "GCash").
+        """
     # Check for duplicate enrollments
-        for enrollment in EnrollmentManager._enrollments:
-            if enrollment._student == student and enrollment._course == course:
-                print(f"Student {student._first_name} {student._last_name} is already enrolled or has a pending enrollment in course {course._name}.")
-                return None  # Exit if duplicate is found
+        if EnrollmentManager._has_enrollment(student, course):
+            print(f"Student {student._first_name} {student._last_name} is already enrolled or has a pending enrollment in course {course._name}.")
+            return None  # Exit if duplicate is found
 
     # Existing payment method logic
-        print("Choose Payment Method:\n1. PayPal\n2. GCash\n3. Debit Card")
-        payment_choice = input("Enter payment option (1, 2, or 3): ")
         payment_methods = { "1": "PayPal", "2": "GCash", "3": "Debit Card" }
-        payment_status = "Paid" if payment_choice in payment_methods else "Pending"
-
-        # Create and add the enrollment
-        enrollment = Enrollment(student, course, payment_status)
-        EnrollmentManager._enrollments.append(enrollment)
+        if payment_method is None:
+            print("Choose Payment Method:\n1. PayPal\n2. GCash\n3. Debit Card")
+            payment_choice = input("Enter payment option (1, 2, or 3): ")
+        else:
+            payment_choice = str(payment_method)
+        paid = payment_choice in payment_methods or payment_choice in payment_methods.values()
+        payment_status = "Paid" if paid else "Pending"
+
+        # Create and add the enrollment, re-checking for duplicates now that the course is locked
+        with LockManager.course(course._course_id):
+            if EnrollmentManager._has_enrollment(student, course):
+                enrollment = None
+            else:
+                enrollment = Enrollment(student, course, payment_status)
+                EnrollmentManager._add_enrollment(enrollment)
+        if not enrollment:
+            print(f"Student {student._first_name} {student._last_name} is already enrolled or has a pending enrollment in course {course._name}.")
+            return None
         print(f"Enrollment created: {enrollment}")
         return enrollment
 
+    @staticmethod
+    def _has_enrollment(student, course):
+        """Checks whether the student already has an enrollment (of any status) in the course."""
+        for enrollment in EnrollmentManager._enrollments_by_student.get(student._id, ()):
+            if enrollment._course == course:
+                return True
+        return False
+
     @staticmethod
     def approve_enrollment(enrollment_id):
         enrollment = EnrollmentManager.get_enrollment_by_id(enrollment_id)
         if enrollment:
-            enrollment.approve()
-            print(f"Enrollment with ID {enrollment_id} has been approved successfully.")
+            if enrollment.approve():
+                print(f"Enrollment with ID {enrollment_id} has been approved successfully.")
         else:
             print("Enrollment not found.")
     
@@ -1131,11 +1972,13 @@ class EnrollmentManager:
 
     @staticmethod
     def get_enrollment_by_id(enrollment_id):
-        for enrollment in EnrollmentManager._enrollments:
-            if enrollment._enrollment_id == enrollment_id:
-                return enrollment
-        print("Enrollment not found.")
-        return None
+        if RecordStore.active():
+            enrollment = RecordStore.fetch_enrollment(enrollment_id)
+        else:
+            enrollment = EnrollmentManager._enrollments_by_id.get(enrollment_id)
+        if enrollment is None:
+            print("Enrollment not found.")
+        return enrollment
     
     @staticmethod
     def view_enrollments_by_course(course, filter_pending_only=True):
@@ -1143,10 +1986,10 @@ class EnrollmentManager:
         Display enrollments for a specific course.
         By default, only pending enrollments are displayed.
         """
-        # Filter enrollments: show only pending if filter_pending_only is True
+        # Filter the course's enrollments: show only pending if filter_pending_only is True
         enrollments = [
-            enrollment for enrollment in EnrollmentManager._enrollments
-            if enrollment._course == course and (not filter_pending_only or enrollment._enrollment_status == "Pending")
+            enrollment for enrollment in EnrollmentManager._enrollments_by_course.get(course._course_id, ())
+            if not filter_pending_only or enrollment._enrollment_status == "Pending"
         ]
 
         if not enrollments:
@@ -1164,29 +2007,40 @@ class EnrollmentManager:
             print("-" * 40)  # Separator line for clarity
 
     @staticmethod
-    def load_enrollments():
+    def load_enrollments(enrollments_data=None):
         """
-        Load enrollments from JSON and link students and courses.
+        Load enrollments from JSON (or from already decoded rows) and link students and courses.
         Ensure student and course relationships are updated only for 'Approved' enrollments.
         """
-        enrollments_data = load_json("enrollments.json")
-        print(f"DEBUG: Loading {len(enrollments_data)} enrollments from enrollments.json")
+        if enrollments_data is None:
+            enrollments_data = load_json("enrollments.json")
 
-        EnrollmentManager._enrollments = []  # Clear existing enrollments to avoid duplication
+        with log_phase("load_enrollments", warn_on=("skipped",)) as counters, LockManager.exclusive():
+            EnrollmentManager._enrollments = []  # Clear existing enrollments to avoid duplication
+            EnrollmentManager._enrollments_by_id, EnrollmentManager._enrollment_positions = {}, {}
+            EnrollmentManager._enrollments_by_student = {}
+            EnrollmentManager._enrollments_by_course = {}
+            EnrollmentManager._link_enrollments(enrollments_data, counters)
 
+    @staticmethod
+    def _link_enrollments(enrollments_data, counters):
+        """Creates and links enrollments from rows. The caller holds the state lock exclusively."""
+        debug = logger.isEnabledFor(logging.DEBUG)
         for enrollment_data in enrollments_data:
-            student = UserManager.find_user_by_id(enrollment_data["student_id"])
+            student = UserManager._users_by_id.get(enrollment_data["student_id"])
             course = CourseManager.get_course_by_id(enrollment_data["course_id"])
 
             if not student or not course:
-                print(f"WARNING: Skipping enrollment {enrollment_data['enrollment_id']} due to missing student or course.")
+                counters["skipped"] += 1
+                if debug:
+                    logger.debug("Skipping enrollment %s due to missing student or course.", enrollment_data["enrollment_id"])
                 continue
 
             # Create and link enrollment
             enrollment = Enrollment.from_dict(enrollment_data)
             enrollment._student = student
             enrollment._course = course
-            EnrollmentManager._enrollments.append(enrollment)
+            EnrollmentManager._add_enrollment(enrollment)
 
             # Update relationships only for 'Approved' enrollments
             if enrollment._enrollment_status == "Approved":
@@ -1194,9 +2048,7 @@ class EnrollmentManager:
                     student._enrolled_courses.append(course)  # Link course to student
                 if student not in course._enrolled_students:
                     course._enrolled_students.append(student)  # Link student to course
-                print(f"DEBUG: Enrollment {enrollment._enrollment_id} APPROVED and linked: {student._id} -> {course._course_id}")
-            else:
-                print(f"DEBUG: Enrollment {enrollment._enrollment_id} NOT approved (status: {enrollment._enrollment_status}).")
+            counters[enrollment._enrollment_status.lower()] += 1
 
 
     @staticmethod
@@ -1204,14 +2056,50 @@ class EnrollmentManager:
         """
         Save all enrollments to JSON.
         """
-        enrollments_data = [enrollment.to_dict() for enrollment in EnrollmentManager._enrollments]
-        print(f"DEBUG: Saving {len(enrollments_data)} enrollments to enrollments.json")
-        for enrollment in enrollments_data:
-            print(f"DEBUG: {enrollment}")  # Log each enrollment
-        save_json("enrollments.json", enrollments_data)
+        with log_phase("save_enrollments") as counters:
+            with LockManager.exclusive(readonly=True):
+                text = RecordCodec.dumps(EnrollmentManager._enrollments, COMPACT_JSON)
+                counters["saved"] = len(EnrollmentManager._enrollments)
+            return save_json_text("enrollments.json", text)
 
 class AssignmentManager:
     _assignments = []
+    _assignments_by_id = {}  # Index of _assignments by assignment ID
+    _assignments_by_course = {}  # Course ID -> that course's assignments, in creation order
+    _submissions_by_student = {}  # Student ID -> assignments they submitted or were graded on (dict as ordered set)
+    _assignment_positions = {}  # id(assignment) -> index in _assignments
+
+    @staticmethod
+    def _add_assignment(assignment):
+        """Adds an assignment to the registry and its indexes. The caller holds the state lock."""
+        add_to_registry(AssignmentManager._assignments, AssignmentManager._assignment_positions, assignment)
+        AssignmentManager._assignments_by_id.setdefault(assignment._assignment_id, assignment)
+        AssignmentManager._assignments_by_course.setdefault(assignment._course._course_id, []).append(assignment)
+        for student in (*assignment._submitted_students, *assignment._graded_students):
+            AssignmentManager._submissions_by_student.setdefault(student._id, {})[assignment] = None
+
+    @staticmethod
+    def _discard_assignments(assignments):
+        """Removes assignments from the registry and its indexes. The caller holds the state lock exclusively."""
+        if not assignments:
+            return
+        dropped = set(assignments)
+        for assignment in assignments:
+            for student in (*assignment._submitted_students, *assignment._graded_students):
+                submissions = AssignmentManager._submissions_by_student.get(student._id)
+                if submissions is not None:
+                    submissions.pop(assignment, None)
+                    if not submissions:
+                        del AssignmentManager._submissions_by_student[student._id]
+            if AssignmentManager._assignments_by_id.get(assignment._assignment_id) is assignment:
+                del AssignmentManager._assignments_by_id[assignment._assignment_id]
+        discard_from_index(AssignmentManager._assignments_by_course, {a._course._course_id for a in assignments}, dropped)
+        discard_from_registry(AssignmentManager._assignments, AssignmentManager._assignment_positions, assignments)
+
+    @staticmethod
+    def assignments_for_course(course):
+        """Returns the assignments of a course (a copy, safe to iterate while others add assignments)."""
+        return list(AssignmentManager._assignments_by_course.get(course._course_id, ()))
 
     @staticmethod
     def add_assignment(course_id, assignment_id, due_date, description, max_grade):
@@ -1228,8 +2116,10 @@ class AssignmentManager:
             return
 
         assignment = Assignment(assignment_id, course, due_date, description, max_grade)
-        AssignmentManager._assignments.append(assignment)
+        with LockManager.course(course._course_id):
+            AssignmentManager._add_assignment(assignment)
         print(f"Assignment added:\n{assignment}")
+        EventBus.publish("assignment_added", assignment=assignment)
 
 
 
@@ -1260,19 +2150,53 @@ class AssignmentManager:
 
 
     @staticmethod
-    def get_assignment_by_id(assignment_id):
-        """Retrieves an assignment by its ID."""
-        for assignment in AssignmentManager._assignments:
-            if assignment._assignment_id == assignment_id:
-                return assignment
-        return None
-    
-    @staticmethod
-    def view_all_assignments(course):
-        """Displays all assignments for a specific course."""
-        assignments_for_course = [assignment for assignment in AssignmentManager._assignments if assignment._course == course]
-        if not assignments_for_course:
-            print(f"No assignments found for course: {course._name}")
+    def import_grades(assignment_id, source):
+        """
+        Grades many submissions of an assignment at once from a CSV file or (student_id, score) pairs.
+        Every row is validated first; the grades are only applied if all rows are valid.
+        Returns a report {"applied": count, "errors": [{"row", "student_id", "error"}, ...]}, or None if
+        the assignment does not exist.
+        """
+        assignment = AssignmentManager.get_assignment_by_id(assignment_id)
+        if not assignment:
+            print("Assignment not found.")
+            return None
+
+        def check(student, score):
+            if student not in assignment._submitted_students:
+                return "Student has not submitted this assignment."
+            if not 0 <= score <= assignment._max_grade:
+                return f"Grade {score} is outside the range 0 - {assignment._max_grade}."
+            return None
+
+        rows = read_score_rows(source)
+        with LockManager.assignment(assignment_id):
+            valid, errors = validate_score_rows(rows, check)
+            if not errors:
+                for student, score in valid:
+                    assignment._graded_students[student] = score
+
+        if errors:
+            print(f"Import rejected: {len(errors)} invalid row(s). No grades were changed.")
+            return {"applied": 0, "errors": errors}
+        print(f"Imported {len(valid)} grade(s) for assignment {assignment_id}.")
+        for student, score in valid:
+            EventBus.publish("submission_graded", assignment=assignment, student=student, grade=score)
+        return {"applied": len(valid), "errors": []}
+
+    @staticmethod
+    def get_assignment_by_id(assignment_id):
+        """Retrieves an assignment by its ID."""
+        if RecordStore.active():
+            return RecordStore.fetch_assignment(assignment_id)
+        return AssignmentManager._assignments_by_id.get(assignment_id)
+    
+    @staticmethod
+    def view_all_assignments(course):
+        """Displays all assignments for a specific course."""
+        assignments_for_course = AssignmentManager.assignments_for_course(course)
+        if not assignments_for_course:
+            print(f"No assignments found for course: {course._name}")
             return
 
         print(f"\n--- Assignments for Course: {course._name} ---")
@@ -1282,259 +2206,3863 @@ class AssignmentManager:
     @staticmethod
     def view_assignment_grades(student, course):
         """Displays the assignment grades for a student in a specific course."""
-        assignments_for_course = [assignment for assignment in AssignmentManager._assignments if assignment._course == course]
+        assignments_for_course = AssignmentManager.assignments_for_course(course)
+
+        if not assignments_for_course:
+            print(f"No assignments found for course: {course._name}")
+            return
+
+        print(f"\n--- Assignment Grades for Course: {course._name} ---")
+        for assignment in assignments_for_course:
+            grade = assignment._graded_students.get(student, "None")
+            print(f"Assignment ID: {assignment._assignment_id}, "
+                  f"Assignment Name: {assignment._description}, "
+                  f"Assignment Grade: {grade}")
+    
+    @staticmethod
+    def view_passed_assignments(course, passing_grade=5):
+        """
+        Displays all assignments and the students who passed them in a specific course.
+        Highlights ungraded submissions for the instructor's attention.
+        """
+        snapshot = SnapshotManager.take()
+        assignments_for_course = snapshot.assignments_for_course(course._course_id)
+
+        if not assignments_for_course:
+            print(f"No assignments found for course: {course._name}")
+            return
+
+        print(f"\n--- Passed Assignments for Course: {course._name} ---")
+        print(f"Course ID: {course._course_id}, Course Name: {course._name}\n")
+
+        for assignment in assignments_for_course:
+            print(f"Assignment ID: {assignment.assignment_id}, Description: {assignment.description}")
+
+            # Identify passed students
+            passed_students = [student_id for student_id, grade in assignment.graded.items() if grade is not None and grade >= passing_grade]
 
+            # Identify ungraded students
+            ungraded_students = [student_id for student_id in assignment.submitted if student_id not in assignment.graded]
+
+            if ungraded_students:
+                print("\nWarning: The following students have submitted but not yet been graded:")
+                for student_id in ungraded_students:
+                    print(f"Student Name: {snapshot.user_name(student_id)}")
+
+            if not passed_students:
+                print("\nNo students passed this assignment.\n")
+            else:
+                print("\nPassed Students:")
+                for student_id in passed_students:
+                    print(f"Student Name: {snapshot.user_name(student_id)}")
+                print()
+    
+    @staticmethod
+    def view_all_assignments(course, student=None):
+        """
+        Displays all assignments for a specific course and optionally shows the passing status for a student.
+        """
+        assignments_for_course = AssignmentManager.assignments_for_course(course)
         if not assignments_for_course:
             print(f"No assignments found for course: {course._name}")
             return
 
-        print(f"\n--- Assignment Grades for Course: {course._name} ---")
-        for assignment in assignments_for_course:
-            grade = assignment._graded_students.get(student, "None")
-            print(f"Assignment ID: {assignment._assignment_id}, "
-                  f"Assignment Name: {assignment._description}, "
-                  f"Assignment Grade: {grade}")
-    
+        print(f"\n--- Assignments for Course: {course._name} ---")
+        for assignment in assignments_for_course:
+            if student:
+                passed_status = (
+                    "Passed" if student in assignment._graded_students and assignment._graded_students[student] >= 5 else "Not Passed"
+                )
+                print(
+                    f"Assignment ID: {assignment._assignment_id}, Due Date: {assignment._due_date}, "
+                    f"Passed: {passed_status}, Description: {assignment._description}"
+                )
+            else:
+                print(
+                    f"Assignment ID: {assignment._assignment_id}, Due Date: {assignment._due_date}, "
+                    f"Description: {assignment._description}"
+                )
+    
+    @staticmethod
+    def list_assignments_for_student(student, course):
+        """
+        List all assignments for a given student in a specific course.
+        """
+        # Filter assignments for the specified course
+        assignments_for_course = AssignmentManager.assignments_for_course(course)
+
+        if not assignments_for_course:
+            print(f"No assignments found for the course: {course._name}")
+            return
+
+        print(f"\n--- Assignments for {student._first_name} {student._last_name} in Course: {course._name} ---")
+        for assignment in assignments_for_course:
+            status = "Submitted" if student in assignment._submitted_students else "Not Submitted"
+            grade = assignment._graded_students.get(student, "Not Graded")
+            print(
+                f"Assignment ID: {assignment._assignment_id}\n"
+                f"Description: {assignment._description}\n"
+                f"Due Date: {assignment._due_date}\n"
+                f"Submission Status: {status}\n"
+                f"Grade: {grade}\n"
+            )
+
+    @staticmethod
+    def load_assignments(assignments_data=None):
+        """
+        Load assignments from JSON (or from already decoded rows) and link courses, students, and grades.
+        """
+        if assignments_data is None:
+            assignments_data = load_json("assignments.json")
+        with log_phase("load_assignments", warn_on=("skipped_missing_course", "skipped_missing_max_grade")) as counters, \
+                LockManager.exclusive():
+            AssignmentManager._assignments = []  # Clear existing assignments to avoid duplication
+            AssignmentManager._assignments_by_id, AssignmentManager._assignment_positions = {}, {}
+            AssignmentManager._assignments_by_course = {}
+            AssignmentManager._submissions_by_student = {}
+            AssignmentManager._link_assignments(assignments_data, counters)
+
+    @staticmethod
+    def _link_assignments(assignments_data, counters):
+        """Creates and links assignments from rows. The caller holds the state lock exclusively."""
+        debug = logger.isEnabledFor(logging.DEBUG)
+        users_by_id = UserManager._users_by_id
+        for assignment_data in assignments_data:
+            course = CourseManager.get_course_by_id(assignment_data["course_id"])
+            if not course:
+                counters["skipped_missing_course"] += 1
+                if debug:
+                    logger.debug("Skipping assignment %s due to missing course.", assignment_data["assignment_id"])
+                continue
+
+            if "max_grade" not in assignment_data:
+                counters["skipped_missing_max_grade"] += 1
+                if debug:
+                    logger.debug("Assignment %s is missing 'max_grade'. Skipping.", assignment_data["assignment_id"])
+                continue
+
+            assignment = Assignment.from_dict(assignment_data, course)
+
+            # Link submitted students
+            assignment._submitted_students = {
+                users_by_id[student_id]: status
+                for student_id, status in assignment_data["submitted_students"].items()
+                if student_id in users_by_id
+            }
+
+            # Link graded students
+            assignment._graded_students = {
+                users_by_id[student_id]: grade
+                for student_id, grade in assignment_data["graded_students"].items()
+                if student_id in users_by_id
+            }
+
+            AssignmentManager._add_assignment(assignment)
+            counters["loaded"] += 1
+
+
+    @staticmethod
+    def save_assignments():
+        """
+        Save all assignments to JSON.
+        """
+        with log_phase("save_assignments") as counters:
+            with LockManager.exclusive(readonly=True):
+                text = RecordCodec.dumps(AssignmentManager._assignments, COMPACT_JSON)
+                counters["saved"] = len(AssignmentManager._assignments)
+            return save_json_text("assignments.json", text)
+
+class GradeManager:
+    _grades = []
+    _grades_by_course = {}  # Course ID -> grades posted in that course
+    _grades_by_student = {}  # Student ID -> that student's grades
+    _grade_positions = {}  # id(grade) -> index in _grades
+
+    @staticmethod
+    def _add_grades(grades):
+        """Adds grades to the registry and its indexes. The caller holds the course lock or the state lock."""
+        for grade in grades:
+            add_to_registry(GradeManager._grades, GradeManager._grade_positions, grade)
+            GradeManager._grades_by_course.setdefault(grade._course._course_id, []).append(grade)
+            GradeManager._grades_by_student.setdefault(grade._student._id, []).append(grade)
+
+    @staticmethod
+    def _discard_grades(grades):
+        """Removes grades from the registry and its indexes. The caller holds the state lock exclusively."""
+        if not grades:
+            return
+        dropped = set(grades)
+        discard_from_index(GradeManager._grades_by_course, {grade._course._course_id for grade in grades}, dropped)
+        discard_from_index(GradeManager._grades_by_student, {grade._student._id for grade in grades}, dropped)
+        discard_from_registry(GradeManager._grades, GradeManager._grade_positions, grades)
+
+    @staticmethod
+    def find_grade(student, course):
+        """Returns the student's grade in the course, or None if they have not been graded yet."""
+        for grade in GradeManager._grades_by_course.get(course._course_id, ()):
+            if grade._student == student:
+                return grade
+        return None
+
+    @staticmethod
+    def grades_for_student(student_id):
+        """Returns a student's grades (a copy, safe to iterate while others post grades)."""
+        return list(GradeManager._grades_by_student.get(student_id, ()))
+
+    @staticmethod
+    def assign_grade(student, course, grade_value):
+        """
+        Assign a course grade to a student using a 1-5 scale.
+        """
+        grade = Grade(student, course, grade_value)
+        with LockManager.course(course._course_id):
+            GradeManager._add_grades([grade])
+        print(f"Grade assigned: {grade}")
+        EventBus.publish("course_grade_posted", grade=grade)
+        return grade
+
+
+
+    @staticmethod
+    def view_student_grades(student):
+        """View all grades assigned to a student."""
+        snapshot = SnapshotManager.take()
+        student_grades = snapshot.grades_for_student(student._id)
+        if not student_grades:
+            print(f"No grades found for {student._first_name} {student._last_name}.")
+            return
+        for grade in student_grades:
+            course = snapshot.courses.get(grade.course_id)
+            print(
+                f"Grade ID: {grade.grade_id}\n"
+                f"Student: {snapshot.user_name(grade.student_id)} ({grade.student_id})\n"
+                f"Course: {course.name if course else 'Unknown'} ({grade.course_id})\n"
+                f"Grade: {grade.grade_value}"
+            )
+
+    @staticmethod
+    def import_grades(course_id, source, instructor=None):
+        """
+        Posts many course grades (1.0 - 5.0) at once from a CSV file or (student_id, score) pairs.
+        Every row is validated first; the grades are only posted if all rows are valid.
+        Returns a report {"applied": count, "errors": [{"row", "student_id", "error"}, ...]}, or None if
+        the course does not exist or the instructor is not assigned to it.
+        """
+        course = CourseManager.get_course_by_id(course_id)
+        if not course:
+            print("Course not found.")
+            return None
+        if instructor is not None and course._instructor != instructor:
+            print("You are not assigned to this course.")
+            return None
+
+        rows = read_score_rows(source)
+        with LockManager.course(course_id):
+            enrolled = set(course._enrolled_students)
+            graded = {grade._student for grade in GradeManager._grades_by_course.get(course_id, ())}
+
+            def check(student, score):
+                if student not in enrolled:
+                    return "Student is not enrolled in this course."
+                if student in graded:
+                    return "Student already has a grade in this course."
+                if not 1.0 <= score <= 5.0:
+                    return f"Grade {score} is outside the range 1.0 - 5.0."
+                return None
+
+            valid, errors = validate_score_rows(rows, check)
+            if not errors:
+                grades = [Grade(student, course, score) for student, score in valid]
+                GradeManager._add_grades(grades)
+
+        if errors:
+            print(f"Import rejected: {len(errors)} invalid row(s). No grades were posted.")
+            return {"applied": 0, "errors": errors}
+        print(f"Posted {len(grades)} grade(s) for course {course._name}.")
+        for grade in grades:
+            EventBus.publish("course_grade_posted", grade=grade)
+        return {"applied": len(grades), "errors": []}
+
+    @staticmethod
+    def grade_course(course_id, instructor):
+        """Allows an instructor to grade all students in a course with proper grading flow."""
+        course = CourseManager.get_course_by_id(course_id)
+        if not course:
+            print("Course not found.")
+            return
+
+        if course._instructor != instructor:
+            print("You are not assigned to this course.")
+            return
+
+        if not course._enrolled_students:
+            print(f"No students are enrolled in the course {course._name}.")
+            return
+
+        print(f"\n--- Grading Course: {course._name} ---")
+        print(f"Course ID: {course._course_id}, Course Name: {course._name}\n")
+
+        # Display students with their current grading status
+        for student in course._enrolled_students:
+            existing_grade = GradeManager.find_grade(student, course)
+            existing_grade = existing_grade._grade_value if existing_grade else "Not Yet Graded"
+            print(f"Student ID: {student._id}, Name: {student._first_name} {student._last_name}, Grade: {existing_grade}")
+
+        print("\nChoose students to grade.")
+        
+        # Grade each student
+        for student in course._enrolled_students:
+            existing_grade = GradeManager.find_grade(student, course)
+            existing_grade = existing_grade._grade_value if existing_grade else None
+            if existing_grade is not None:
+                print(f"{student._first_name} {student._last_name} is already graded with {existing_grade}. Skipping...")
+                continue
+
+            # Input grade for the student
+            try:
+                grade_value = float(input(f"Enter grade (1.0 - 5.0) for {student._first_name} {student._last_name}: "))
+                if 1.0 <= grade_value <= 5.0:
+                    # Another session may have graded the student while we were waiting for input
+                    with LockManager.course(course._course_id):
+                        graded_meanwhile = GradeManager.find_grade(student, course) is not None
+                        if not graded_meanwhile:
+                            GradeManager.assign_grade(student, course, grade_value)
+                    if graded_meanwhile:
+                        print(f"{student._first_name} {student._last_name} was graded by another session. Skipping...")
+                else:
+                    print(f"Invalid grade. Please enter a grade between 1.0 and 5.0. Skipping {student._first_name} {student._last_name}.")
+            except ValueError:
+                print(f"Invalid input. Skipping {student._first_name} {student._last_name}.")
+
+    @staticmethod
+    def load_grades(grades_data=None):
+        """
+        Load grades from JSON (or from already decoded rows) and link students and courses.
+        """
+        if grades_data is None:
+            grades_data = load_json("grades.json")
+        with log_phase("load_grades", warn_on=("skipped",)) as counters, LockManager.exclusive():
+            GradeManager._grades, GradeManager._grade_positions = [], {}  # Clear existing grades
+            GradeManager._grades_by_course = {}
+            GradeManager._grades_by_student = {}
+            GradeManager._link_grades(grades_data, counters)
+
+    @staticmethod
+    def _link_grades(grades_data, counters):
+        """Creates and links grades from rows. The caller holds the state lock exclusively."""
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for grade_data in grades_data:
+            student = UserManager._users_by_id.get(grade_data["student_id"])
+            course = CourseManager.get_course_by_id(grade_data["course_id"])
+
+            if not student or not course:
+                counters["skipped"] += 1
+                if debug:
+                    logger.debug("Skipping grade %s due to missing student or course.", grade_data["grade_id"])
+                continue
+
+            grade = Grade.from_dict(grade_data)
+            grade._student = student
+            grade._course = course
+            GradeManager._add_grades([grade])
+            counters["loaded"] += 1
+
+    @staticmethod
+    def save_grades():
+        """
+        Save all grades to JSON.
+        """
+        with log_phase("save_grades") as counters:
+            with LockManager.exclusive(readonly=True):
+                text = RecordCodec.dumps(GradeManager._grades, COMPACT_JSON)
+                counters["saved"] = len(GradeManager._grades)
+            return save_json_text("grades.json", text)
+
+UserRecord = namedtuple("UserRecord", ["user_id", "type", "first_name", "last_name", "email"])
+CourseRecord = namedtuple("CourseRecord", [
+    "course_id", "name", "start_date", "end_date", "description", "capacity", "instructor_id", "enrolled_ids"
+])
+EnrollmentRecord = namedtuple("EnrollmentRecord", [
+    "enrollment_id", "student_id", "course_id", "payment_status", "enrollment_status"
+])
+AssignmentRecord = namedtuple("AssignmentRecord", [
+    "assignment_id", "course_id", "due_date", "description", "max_grade", "submitted", "graded"
+])
+GradeRecord = namedtuple("GradeRecord", ["grade_id", "student_id", "course_id", "grade_value"])
+
+
+class StateSnapshot:
+    """
+    Immutable, versioned view of the manager state.
+    Holds plain id-based records instead of live objects, so it can be read for as long as needed
+    while enrollments and grading continue on the live managers. Enrollments and grades are kept
+    per course; the dictionaries behind a snapshot are never modified once it is published, so
+    later snapshots share the parts that did not change.
+    """
+    __slots__ = (
+        "version", "users", "courses", "assignments",
+        "_enrollments_by_course", "_grades_by_course", "_assignments_by_course", "_grades_by_student", "_counts",
+    )
+
+    def __init__(self, version, users, courses, assignments, enrollments_by_course, grades_by_course,
+                 assignments_by_course, grades_by_student, counts):
+        def read_only(mapping):
+            return mapping if isinstance(mapping, MappingProxyType) else MappingProxyType(mapping)
+
+        set_field = object.__setattr__
+        set_field(self, "version", version)
+        set_field(self, "users", read_only(users))
+        set_field(self, "courses", read_only(courses))
+        set_field(self, "assignments", read_only(assignments))
+        set_field(self, "_enrollments_by_course", enrollments_by_course)
+        set_field(self, "_grades_by_course", grades_by_course)
+        set_field(self, "_assignments_by_course", assignments_by_course)
+        set_field(self, "_grades_by_student", grades_by_student)
+        set_field(self, "_counts", counts)  # registry lengths (users, courses, assignments) the snapshot covers
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StateSnapshot is immutable.")
+
+    @property
+    def enrollments(self):
+        """Every enrollment record, grouped by course."""
+        return tuple(record for records in self._enrollments_by_course.values() for record in records)
+
+    @property
+    def grades(self):
+        """Every grade record, grouped by course."""
+        return tuple(record for records in self._grades_by_course.values() for record in records)
+
+    def user_name(self, user_id):
+        """Returns the display name of a user, or the raw ID if the user no longer exists."""
+        user = self.users.get(user_id)
+        if not user:
+            return user_id
+        return f"{user.first_name} {user.last_name}".strip()
+
+    def assignments_for_course(self, course_id):
+        return self._assignments_by_course.get(course_id, ())
+
+    def enrollments_for_course(self, course_id):
+        return self._enrollments_by_course.get(course_id, ())
+
+    def grades_for_course(self, course_id):
+        return self._grades_by_course.get(course_id, ())
+
+    def grades_for_student(self, student_id):
+        return self._grades_by_student.get(student_id, ())
+
+
+class SnapshotManager:
+    """
+    Takes StateSnapshots of the managers.
+    A snapshot is reused as-is while nothing has changed. Otherwise only what changed since the
+    previous snapshot is copied while the state lock is held: the users, courses and assignments
+    appended to the registries since then, and the courses and assignments touched through their
+    entity locks (a course lock covers that course's enrollments and grades too, which is why those
+    are kept per course). The new snapshot is then assembled outside the lock from the previous one
+    and these changes. Only after a structural change (a load, a deletion) is everything copied.
+    """
+    _latest = None
+    _build_lock = threading.Lock()
+
+    @staticmethod
+    def take():
+        """Returns a consistent snapshot of the current state."""
+        latest = SnapshotManager._latest
+        if latest is not None and latest.version == LockManager.version():
+            return latest
+
+        with SnapshotManager._build_lock:
+            with LockManager.exclusive(readonly=True):
+                latest = SnapshotManager._latest
+                version = LockManager.version()
+                if latest is not None and latest.version == version:
+                    return latest
+                structural_change, touched_courses, touched_assignments = LockManager._drain_touched("snapshots")
+                if structural_change:
+                    latest = None
+                changes = SnapshotManager._copy_changes(latest, touched_courses, touched_assignments)
+            snapshot = SnapshotManager._assemble(version, latest, *changes)
+            SnapshotManager._latest = snapshot
+        return snapshot
+
+    @staticmethod
+    def _copy_changes(previous, touched_courses, touched_assignments):
+        """
+        Records for everything that changed since previous (everything if previous is None).
+        The caller holds the state lock exclusively; the cost is proportional to the changes.
+        """
+        user_count, course_count, assignment_count = previous._counts if previous is not None else (0, 0, 0)
+        users = [SnapshotManager._user_record(user) for user in UserManager._users[user_count:]]
+
+        course_ids = dict.fromkeys(course._course_id for course in CourseManager._courses[course_count:])
+        course_ids.update(dict.fromkeys(touched_courses))
+        if previous is None:
+            course_ids.update(dict.fromkeys(EnrollmentManager._enrollments_by_course))
+            course_ids.update(dict.fromkeys(GradeManager._grades_by_course))
+        courses, enrollments, grades = {}, {}, {}
+        for course_id in course_ids:
+            course = CourseManager._courses_by_id.get(course_id)
+            if course is not None:
+                courses[course_id] = SnapshotManager._course_record(course)
+            enrollments[course_id] = tuple(
+                EnrollmentRecord(e._enrollment_id, e._student._id, course_id, e._payment_status, e._enrollment_status)
+                for e in EnrollmentManager._enrollments_by_course.get(course_id, ())
+            )
+            grades[course_id] = tuple(
+                GradeRecord(g._grade_id, g._student._id, course_id, g._grade_value)
+                for g in GradeManager._grades_by_course.get(course_id, ())
+            )
+
+        changed = dict.fromkeys(AssignmentManager._assignments[assignment_count:])
+        changed.update(dict.fromkeys(filter(None, map(AssignmentManager._assignments_by_id.get, touched_assignments))))
+        assignments = [SnapshotManager._assignment_record(assignment) for assignment in changed]
+
+        counts = (len(UserManager._users), len(CourseManager._courses), len(AssignmentManager._assignments))
+        return users, courses, enrollments, grades, assignments, counts
+
+    @staticmethod
+    def _assemble(version, previous, users, courses, enrollments, grades, assignments, counts):
+        """Builds the snapshot from previous (None for an empty one) and the copied changes, without any lock."""
+        if previous is None:
+            previous = StateSnapshot(None, {}, {}, {}, {}, {}, {}, {}, (0, 0, 0))
+
+        def merged(mapping, changes):
+            if not changes:
+                return mapping  # unchanged partitions are shared with the previous snapshot
+            mapping = dict(mapping)
+            mapping.update(changes)
+            return mapping
+
+        assignments_by_course = {}
+        for record in assignments:
+            assignments_by_course.setdefault(record.course_id, []).append(record)
+        for course_id, records in assignments_by_course.items():
+            existing = list(previous._assignments_by_course.get(course_id, ()))
+            positions = {record.assignment_id: position for position, record in enumerate(existing)}
+            for record in records:
+                if record.assignment_id in positions:
+                    existing[positions[record.assignment_id]] = record
+                else:
+                    existing.append(record)
+            assignments_by_course[course_id] = tuple(existing)
+
+        # A changed course partition replaces that course's grades in each affected student's list
+        added = {}
+        for records in grades.values():
+            for record in records:
+                added.setdefault(record.student_id, []).append(record)
+        affected = set(added)
+        for course_id in grades:
+            affected.update(record.student_id for record in previous._grades_by_course.get(course_id, ()))
+        grades_by_student = {}
+        for student_id in affected:
+            kept = [record for record in previous._grades_by_student.get(student_id, ()) if record.course_id not in grades]
+            grades_by_student[student_id] = tuple(kept + added.get(student_id, []))
+
+        return StateSnapshot(
+            version,
+            merged(previous.users, {record.user_id: record for record in users}),
+            merged(previous.courses, courses),
+            merged(previous.assignments, {record.assignment_id: record for record in assignments}),
+            merged(previous._enrollments_by_course, enrollments),
+            merged(previous._grades_by_course, grades),
+            merged(previous._assignments_by_course, assignments_by_course),
+            merged(previous._grades_by_student, grades_by_student),
+            counts,
+        )
+
+    @staticmethod
+    def _user_record(user):
+        if isinstance(user, PlatformAdmin):
+            return UserRecord(user._id, "Admin", user._admin_name, "", user.email)
+        user_type = "Student" if isinstance(user, Student) else "Instructor"
+        return UserRecord(user._id, user_type, user._first_name, user._last_name, user.email)
+
+    @staticmethod
+    def _course_record(course):
+        return CourseRecord(
+            course._course_id, course._name, course._start_date, course._end_date,
+            course._description, course._capacity,
+            course._instructor._id if course._instructor else None,
+            tuple(student._id for student in course._enrolled_students),
+        )
+
+    @staticmethod
+    def _assignment_record(assignment):
+        return AssignmentRecord(
+            assignment._assignment_id,
+            assignment._course._course_id if assignment._course else None,
+            assignment._due_date, assignment._description, assignment._max_grade,
+            MappingProxyType({student._id: status for student, status in assignment._submitted_students.items()}),
+            MappingProxyType({student._id: grade for student, grade in assignment._graded_students.items()}),
+        )
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_date_ordinal(text):
+    """Day number (date.toordinal()) of an MM/DD/YYYY date, or None if it does not parse. Cached per string."""
+    try:
+        return datetime.strptime(text.strip(), "%m/%d/%Y").toordinal()
+    except (AttributeError, ValueError):
+        return None
+
+
+def _date_argument(text):
+    """argparse type for MM/DD/YYYY dates."""
+    if parse_date_ordinal(text) is None:
+        raise argparse.ArgumentTypeError(f"invalid date {text!r}, expected MM/DD/YYYY")
+    return text
+
+
+def _day_ordinal(value=None):
+    """Day number of a date, datetime, MM/DD/YYYY string or day number; today for None."""
+    if value is None:
+        return datetime.now().toordinal()
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        ordinal = parse_date_ordinal(value)
+        if ordinal is None:
+            raise ValueError(f"Invalid date {value!r}. Expected MM/DD/YYYY.")
+        return ordinal
+    return value.toordinal()
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over (start, end, item) triples with inclusive integer bounds.
+    Each node keeps the intervals containing its center sorted by start and by end, so
+    overlapping(low, high) costs O(log n + k) for k matches.
+    """
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, intervals):
+        intervals = list(intervals)
+        self._size = len(intervals)
+        self._root = IntervalTree._build(intervals)
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _build(intervals):
+        if not intervals:
+            return None
+        endpoints = sorted([start for start, _, _ in intervals] + [end for _, end, _ in intervals])
+        center = endpoints[len(endpoints) // 2]  # an endpoint, so at least one interval contains it
+        left, here, right = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return (center,
+                sorted(here, key=operator.itemgetter(0)),
+                sorted(here, key=operator.itemgetter(1), reverse=True),
+                IntervalTree._build(left),
+                IntervalTree._build(right))
+
+    def overlapping(self, low, high):
+        """Returns the (start, end, item) triples whose interval intersects [low, high]."""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if high < center:
+                # Every interval here ends at or after the center, so it overlaps iff it starts by `high`
+                for interval in by_start:
+                    if interval[0] > high:
+                        break
+                    found.append(interval)
+                stack.append(left)
+            elif low > center:
+                for interval in by_end:
+                    if interval[1] < low:
+                        break
+                    found.append(interval)
+                stack.append(right)
+            else:
+                found.extend(by_start)
+                stack.append(left)
+                stack.append(right)
+        return found
+
+
+class DateIndex:
+    """
+    Time-window queries over course and assignment dates. The MM/DD/YYYY strings are parsed
+    once into day numbers; courses go into an IntervalTree on (start date, end date) and
+    assignments into a list sorted by due date, so active courses, upcoming deadlines and
+    overdue work are found in logarithmic time plus the size of the answer.
+
+    The indexes are derived from the registries and rebuilt lazily after structural changes
+    (anything done under LockManager.exclusive(): loading, removals, hot reloads, tenant
+    switches). Courses created since the last build are kept in a short list that is scanned
+    until REBUILD_AFTER of them pile up; new assignments are inserted in due-date order.
+    Dates that do not parse are left out of the indexes. The queries need every course and
+    assignment in memory, so they raise RuntimeError while a RecordStore is open.
+    """
+    REBUILD_AFTER = 64
+
+    _lock = threading.Lock()
+    _course_version = None  # LockManager.structure_version() the course index was built for
+    _course_tree = IntervalTree(())
+    _pending_courses = []  # (start, end, course) created since the tree was built
+    _course_count = 0  # registry entries covered by the tree and the pending list
+    _assignment_version = None
+    _due = []  # due day numbers, ascending
+    _by_due = []  # assignments in the same order as _due
+    _assignment_count = 0
+
+    @staticmethod
+    def _course_interval(course):
+        start, end = parse_date_ordinal(course._start_date), parse_date_ordinal(course._end_date)
+        if start is None or end is None or end < start:
+            return None
+        return start, end, course
+
+    @staticmethod
+    def _check_loaded():
+        if RecordStore.active():
+            raise RuntimeError("Date queries are not available while the record store is open.")
+
+    @staticmethod
+    def _course_index():
+        """Returns (tree, pending intervals) for the current course registry."""
+        DateIndex._check_loaded()
+        version = LockManager.structure_version()  # read first: a registry replaced meanwhile is rebuilt next time
+        courses = CourseManager._courses
+        with DateIndex._lock:
+            if DateIndex._course_version == version and len(courses) > DateIndex._course_count:
+                added = [DateIndex._course_interval(course) for course in courses[DateIndex._course_count:]]
+                DateIndex._pending_courses = DateIndex._pending_courses + [i for i in added if i]
+                DateIndex._course_count = len(courses)
+            if DateIndex._course_version != version or len(DateIndex._pending_courses) > DateIndex.REBUILD_AFTER:
+                with log_phase("index_course_dates", warn_on=("unparsed",)) as counters:
+                    intervals = []
+                    for course in courses:
+                        interval = DateIndex._course_interval(course)
+                        if interval is None:
+                            counters["unparsed"] += 1
+                        else:
+                            intervals.append(interval)
+                    DateIndex._course_tree = IntervalTree(intervals)
+                    DateIndex._pending_courses, DateIndex._course_count = [], len(courses)
+                    DateIndex._course_version = version
+                    counters["indexed"] = len(intervals)
+            return DateIndex._course_tree, DateIndex._pending_courses
+
+    @staticmethod
+    def _deadline_index():
+        """Returns (due day numbers, assignments) sorted by due date for the current registry."""
+        DateIndex._check_loaded()
+        version = LockManager.structure_version()
+        assignments = AssignmentManager._assignments
+        with DateIndex._lock:
+            if DateIndex._assignment_version != version:
+                with log_phase("index_due_dates", warn_on=("unparsed",)) as counters:
+                    deadlines = []
+                    for position, assignment in enumerate(assignments):
+                        due = parse_date_ordinal(assignment._due_date)
+                        if due is None:
+                            counters["unparsed"] += 1
+                        else:
+                            deadlines.append((due, position, assignment))
+                    deadlines.sort(key=operator.itemgetter(0, 1))
+                    DateIndex._due = [due for due, _, _ in deadlines]
+                    DateIndex._by_due = [assignment for _, _, assignment in deadlines]
+                    DateIndex._assignment_count = len(assignments)
+                    DateIndex._assignment_version = version
+                    counters["indexed"] = len(deadlines)
+            elif len(assignments) > DateIndex._assignment_count:
+                due, by_due = list(DateIndex._due), list(DateIndex._by_due)  # readers keep the old lists
+                for assignment in assignments[DateIndex._assignment_count:]:
+                    day = parse_date_ordinal(assignment._due_date)
+                    if day is not None:
+                        position = bisect.bisect_right(due, day)
+                        due.insert(position, day)
+                        by_due.insert(position, assignment)
+                DateIndex._due, DateIndex._by_due = due, by_due
+                DateIndex._assignment_count = len(assignments)
+            return DateIndex._due, DateIndex._by_due
+
+    @staticmethod
+    def courses_between(first, last):
+        """Courses running at any time from first through last (inclusive), by start date."""
+        low, high = _day_ordinal(first), _day_ordinal(last)
+        tree, pending = DateIndex._course_index()
+        found = tree.overlapping(low, high)
+        found += [interval for interval in pending if interval[0] <= high and interval[1] >= low]
+        found.sort(key=operator.itemgetter(0, 1))
+        return [course for _, _, course in found]
+
+    @staticmethod
+    def active_courses(on=None):
+        """Courses running on the given day (default today)."""
+        day = _day_ordinal(on)
+        return DateIndex.courses_between(day, day)
+
+    @staticmethod
+    def upcoming_assignments(days=7, today=None):
+        """Assignments due from today through `days` days later, soonest first."""
+        day = _day_ordinal(today)
+        due, by_due = DateIndex._deadline_index()
+        return by_due[bisect.bisect_left(due, day):bisect.bisect_right(due, day + days)]
+
+    @staticmethod
+    def overdue_assignments(today=None, student=None):
+        """
+        Assignments whose due date is before today, oldest first. With a student, only those of the
+        student's courses that the student has not submitted; these are read from the student's
+        courses rather than the index, so the cost follows the student's course load.
+        """
+        day = _day_ordinal(today)
+        if student is None:
+            due, by_due = DateIndex._deadline_index()
+            return by_due[:bisect.bisect_left(due, day)]
+        DateIndex._check_loaded()
+        overdue = []
+        for course in list(student._enrolled_courses):
+            for assignment in AssignmentManager._assignments_by_course.get(course._course_id, ()):
+                due = parse_date_ordinal(assignment._due_date)
+                if due is not None and due < day and student not in assignment._submitted_students:
+                    overdue.append((due, assignment))
+        overdue.sort(key=operator.itemgetter(0))
+        return [assignment for _, assignment in overdue]
+
+
+class EventBus:
+    """
+    Minimal publish/subscribe hub for domain events.
+    Handlers are called synchronously with the keyword payload given to publish().
+    """
+    _subscribers = {}  # event type -> list of handlers
+    _held = threading.local()  # events held back by an open transaction on this thread
+
+    @staticmethod
+    def subscribe(event_type, handler):
+        EventBus._subscribers.setdefault(event_type, []).append(handler)
+
+    @staticmethod
+    def publish(event_type, **payload):
+        held = getattr(EventBus._held, "events", None)
+        if held is not None:
+            held.append((event_type, payload))
+            return
+        for handler in EventBus._subscribers.get(event_type, ()):
+            handler(**payload)
+
+    @staticmethod
+    def hold():
+        """Starts holding back events published on this thread (until release() or discard())."""
+        EventBus._held.events = []
+
+    @staticmethod
+    def release():
+        """Publishes the held events and stops holding."""
+        held, EventBus._held.events = EventBus._held.events, None
+        for event_type, payload in held:
+            EventBus.publish(event_type, **payload)
+
+    @staticmethod
+    def discard():
+        """Drops the held events and stops holding."""
+        EventBus._held.events = None
+
+
+class NotificationInbox:
+    """
+    Bounded, append-only inbox of one user's notifications.
+    Entries are compact (sequence, timestamp, event type, message) tuples. When the inbox is full
+    the oldest entries fall off the front. Everything after the read cursor is unread.
+    """
+    __slots__ = ("_entries", "_next_seq", "_read_seq")
+
+    def __init__(self, capacity):
+        self._entries = deque(maxlen=capacity)
+        self._next_seq = 1
+        self._read_seq = 0
+
+    def append(self, timestamp, event_type, message):
+        self._entries.append((self._next_seq, timestamp, event_type, message))
+        self._next_seq += 1
+
+    def unread(self):
+        """Returns the unread entries, oldest first."""
+        unread = []
+        for entry in reversed(self._entries):
+            if entry[0] <= self._read_seq:
+                break
+            unread.append(entry)
+        unread.reverse()
+        return unread
+
+    def unread_count(self):
+        return min(self._next_seq - 1 - self._read_seq, len(self._entries))
+
+    def mark_read(self):
+        self._read_seq = self._next_seq - 1
+
+    def to_dict(self):
+        return {
+            "next_seq": self._next_seq,
+            "read_seq": self._read_seq,
+            "entries": [list(entry) for entry in self._entries],
+        }
+
+    @staticmethod
+    def from_dict(data, capacity):
+        inbox = NotificationInbox(capacity)
+        inbox._entries.extend(tuple(entry) for entry in data.get("entries", []))
+        inbox._next_seq = data.get("next_seq", len(inbox._entries) + 1)
+        inbox._read_seq = data.get("read_seq", 0)
+        return inbox
+
+
+class NotificationManager:
+    """
+    Turns domain events into per-user inbox entries.
+    Fan-out only touches the recipients' inboxes and marks them dirty; all dirty inboxes are
+    persisted together by save_notifications() instead of rewriting the file per event.
+    """
+    INBOX_CAPACITY = 100
+    _inboxes = {}  # user ID -> NotificationInbox
+    _dirty = False
+    _lock = threading.Lock()
+
+    @staticmethod
+    def notify(user_ids, event_type, message):
+        """Appends the same message to the inbox of every given user."""
+        timestamp = int(time.time())
+        inboxes = NotificationManager._inboxes
+        with NotificationManager._lock:
+            for user_id in user_ids:
+                inbox = inboxes.get(user_id)
+                if inbox is None:
+                    inbox = inboxes[user_id] = NotificationInbox(NotificationManager.INBOX_CAPACITY)
+                inbox.append(timestamp, event_type, message)
+                NotificationManager._dirty = True
+
+    @staticmethod
+    def unread_count(user_id):
+        inbox = NotificationManager._inboxes.get(user_id)
+        return inbox.unread_count() if inbox else 0
+
+    @staticmethod
+    def view_notifications(user):
+        """Displays the user's unread notifications (or the latest ones) and marks them as read."""
+        inbox = NotificationManager._inboxes.get(user._id)
+        if inbox is None or not inbox._entries:
+            print("You have no notifications.")
+            return
+
+        with NotificationManager._lock:
+            entries = inbox.unread()
+            heading = f"--- Notifications ({len(entries)} unread) ---"
+            if not entries:
+                entries = list(inbox._entries)[-5:]
+                heading = "--- No unread notifications. Latest notifications ---"
+            else:
+                inbox.mark_read()
+                NotificationManager._dirty = True
+
+        print(f"\n{heading}")
+        for _, timestamp, _, message in entries:
+            print(f"[{datetime.fromtimestamp(timestamp):%m/%d/%Y %H:%M}] {message}")
+
+    @staticmethod
+    def load_notifications(notifications_data=None):
+        """Load all inboxes from JSON (or from already decoded data)."""
+        if notifications_data is None:
+            notifications_data = load_json("notifications.json")
+        notifications_data = notifications_data or {}
+        with NotificationManager._lock:
+            NotificationManager._inboxes = {
+                user_id: NotificationInbox.from_dict(inbox_data, NotificationManager.INBOX_CAPACITY)
+                for user_id, inbox_data in notifications_data.items()
+            }
+            NotificationManager._dirty = False
+
+    @staticmethod
+    def save_notifications():
+        """
+        Save all inboxes to JSON in one write, skipping the write if nothing changed.
+        If the write fails the inboxes stay dirty, so the next save tries again.
+        Returns whether nothing is left unsaved.
+        """
+        with NotificationManager._lock:
+            if not NotificationManager._dirty:
+                return True
+            notifications_data = {
+                user_id: inbox.to_dict() for user_id, inbox in NotificationManager._inboxes.items()
+            }
+            NotificationManager._dirty = False  # changes made during the write mark it dirty again
+        if save_json("notifications.json", notifications_data):
+            return True
+        with NotificationManager._lock:
+            NotificationManager._dirty = True
+        return False
+
+    # Event handlers
+
+    @staticmethod
+    def _on_assignment_added(assignment):
+        course = assignment._course
+        NotificationManager.notify(
+            [student._id for student in course._enrolled_students],
+            "assignment_added",
+            f"New assignment {assignment._assignment_id} in {course._name}: {assignment._description} (due {assignment._due_date})."
+        )
+
+    @staticmethod
+    def _on_submission_graded(assignment, student, grade):
+        NotificationManager.notify(
+            [student._id],
+            "submission_graded",
+            f"Your submission for assignment {assignment._assignment_id} in {assignment._course._name} "
+            f"was graded {grade}/{assignment._max_grade}."
+        )
+
+    @staticmethod
+    def _on_enrollment_approved(enrollment):
+        NotificationManager.notify(
+            [enrollment._student._id],
+            "enrollment_approved",
+            f"Your enrollment in {enrollment._course._name} has been approved."
+        )
+
+    @staticmethod
+    def _on_enrollment_declined(enrollment):
+        NotificationManager.notify(
+            [enrollment._student._id],
+            "enrollment_declined",
+            f"Your enrollment in {enrollment._course._name} has been declined."
+        )
+
+    @staticmethod
+    def _on_course_grade_posted(grade):
+        NotificationManager.notify(
+            [grade._student._id],
+            "course_grade_posted",
+            f"Your final grade for {grade._course._name} has been posted: {grade._grade_value}."
+        )
+
+
+EventBus.subscribe("assignment_added", NotificationManager._on_assignment_added)
+EventBus.subscribe("submission_graded", NotificationManager._on_submission_graded)
+EventBus.subscribe("enrollment_approved", NotificationManager._on_enrollment_approved)
+EventBus.subscribe("enrollment_declined", NotificationManager._on_enrollment_declined)
+EventBus.subscribe("course_grade_posted", NotificationManager._on_course_grade_posted)
+
+
+class PerformanceMonitor:
+    """
+    Opt-in timing instrumentation for the public static methods of the managers.
+    enable() swaps each method for a thin wrapper that counts calls and files the latency into a
+    power-of-two histogram; disable() restores the originals. Counters are updated without a lock
+    to keep the overhead low, so concurrent calls may occasionally lose a sample.
+    """
+    HISTOGRAM_BUCKETS = 48  # bucket i holds latencies in [2^(i-1), 2^i) nanoseconds
+    # Left unwrapped besides the methods that prompt (see prompting_methods())
+    EXCLUDED_METHODS = {
+        "drop_student_menu", "drop_instructor_menu", "drop_student_from_course", "drop_instructor_from_course",
+    }
+
+    _stats = {}  # "Manager.method" -> [calls, total ns, max ns, histogram]
+    _originals = {}  # (manager class, method name) -> original staticmethod
+
+    @staticmethod
+    def instrumented_classes():
+        return (UserManager, CourseManager, EnrollmentManager, AssignmentManager, GradeManager)
+
+    @staticmethod
+    def is_enabled():
+        return bool(PerformanceMonitor._originals)
+
+    @staticmethod
+    def prompting_methods():
+        """
+        Names of the manager methods that call input(), directly, in a nested function or through
+        another such method. Their latency would mostly be the user's think time.
+        """
+        def names(code):
+            found = set(code.co_names)
+            for constant in code.co_consts:
+                if hasattr(constant, "co_names"):
+                    found |= names(constant)
+            return found
+
+        called = {
+            name: names(attribute.__func__.__code__)
+            for cls in PerformanceMonitor.instrumented_classes()
+            for name, attribute in vars(cls).items() if isinstance(attribute, staticmethod)
+        }
+        prompting = {"input"}
+        while True:
+            found = {name for name, used in called.items() if used & prompting} - prompting
+            if not found:
+                return prompting - {"input"}
+            prompting |= found
+
+    @staticmethod
+    def enable():
+        """Wraps every public static method of the managers except those that prompt. Calling it twice has no effect."""
+        if PerformanceMonitor.is_enabled():
+            return
+        excluded = PerformanceMonitor.EXCLUDED_METHODS | PerformanceMonitor.prompting_methods()
+        for cls in PerformanceMonitor.instrumented_classes():
+            for name, attribute in list(vars(cls).items()):
+                if not isinstance(attribute, staticmethod) or name.startswith("_") or name in excluded:
+                    continue
+                PerformanceMonitor._originals[(cls, name)] = attribute
+                wrapper = PerformanceMonitor._wrap(f"{cls.__name__}.{name}", attribute.__func__)
+                setattr(cls, name, staticmethod(wrapper))
+
+    @staticmethod
+    def disable():
+        """Restores the original methods; collected statistics are kept."""
+        for (cls, name), attribute in PerformanceMonitor._originals.items():
+            setattr(cls, name, attribute)
+        PerformanceMonitor._originals = {}
+
+    @staticmethod
+    def reset():
+        for stats in PerformanceMonitor._stats.values():
+            stats[0] = stats[1] = stats[2] = 0
+            stats[3][:] = [0] * PerformanceMonitor.HISTOGRAM_BUCKETS
+
+    @staticmethod
+    def _wrap(qualified_name, func):
+        stats = PerformanceMonitor._stats.setdefault(
+            qualified_name, [0, 0, 0, [0] * PerformanceMonitor.HISTOGRAM_BUCKETS]
+        )
+        histogram = stats[3]
+        last_bucket = PerformanceMonitor.HISTOGRAM_BUCKETS - 1
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+                histogram[min(elapsed.bit_length(), last_bucket)] += 1
+
+        return wrapper
+
+    @staticmethod
+    def _percentile(histogram, calls, fraction):
+        """Upper bound (in nanoseconds) of the histogram bucket containing the given percentile."""
+        target = calls * fraction
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if seen >= target:
+                return 1 << bucket
+        return 1 << (len(histogram) - 1)
+
+    @staticmethod
+    def report(top=None):
+        """Returns per-method statistics sorted by total time spent, hottest first."""
+        rows = []
+        for name, (calls, total_ns, max_ns, histogram) in PerformanceMonitor._stats.items():
+            if not calls:
+                continue
+            rows.append({
+                "method": name,
+                "calls": calls,
+                "total_ms": round(total_ns / 1e6, 3),
+                "mean_us": round(total_ns / calls / 1e3, 3),
+                "max_us": round(max_ns / 1e3, 3),
+                "p50_us": PerformanceMonitor._percentile(histogram, calls, 0.50) / 1e3,
+                "p95_us": PerformanceMonitor._percentile(histogram, calls, 0.95) / 1e3,
+                "p99_us": PerformanceMonitor._percentile(histogram, calls, 0.99) / 1e3,
+                "histogram_ns": {f"<{1 << bucket}": count for bucket, count in enumerate(histogram) if count},
+            })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows[:top] if top else rows
+
+    @staticmethod
+    def view_hot_paths(top=10):
+        """Displays the methods that consumed the most time."""
+        rows = PerformanceMonitor.report(top)
+        if not rows:
+            status = "enabled" if PerformanceMonitor.is_enabled() else "disabled"
+            print(f"No calls recorded yet (instrumentation is {status}).")
+            return
+
+        print(f"\n--- Top {len(rows)} Hot Paths ---")
+        print(f"{'Method':<45}{'Calls':>9}{'Total ms':>12}{'Mean us':>12}{'p95 us':>12}{'Max us':>12}")
+        for row in rows:
+            print(f"{row['method']:<45}{row['calls']:>9}{row['total_ms']:>12.3f}"
+                  f"{row['mean_us']:>12.3f}{row['p95_us']:>12.3f}{row['max_us']:>12.3f}")
+
+    @staticmethod
+    def export_json(path):
+        """
+        Writes the full statistics, including histograms, to a JSON file at path and returns its
+        absolute path. The data folder is refused: it only holds the platform's own data files.
+        """
+        path = os.path.abspath(path)
+        if os.path.commonpath([path, SAVE_FOLDER]) == SAVE_FOLDER:
+            raise ValueError(f"Choose a file outside the data folder {SAVE_FOLDER}.")
+        with open(path, "w") as file:
+            json.dump({
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+                "enabled": PerformanceMonitor.is_enabled(),
+                "methods": PerformanceMonitor.report(),
+            }, file, indent=4)
+        return path
+
+    @staticmethod
+    def menu():
+        """Admin menu for the performance statistics."""
+        while True:
+            status = "ON" if PerformanceMonitor.is_enabled() else "OFF"
+            print(f"\n--- Performance Stats (instrumentation {status}) ---")
+            print("1. View Top Hot Paths")
+            print("2. Export Stats to JSON")
+            print("3. Turn Instrumentation On/Off")
+            print("4. Reset Stats")
+            print("5. Return to Admin Menu")
+            choice = input("Enter your choice: ").strip()
+
+            if choice == "1":
+                PerformanceMonitor.view_hot_paths()
+            elif choice == "2":
+                path = input("Export to file [performance_stats.json]: ").strip() or "performance_stats.json"
+                try:
+                    print(f"Performance stats exported to {PerformanceMonitor.export_json(path)}.")
+                except (OSError, ValueError) as e:
+                    print(f"Could not export the stats: {e}")
+            elif choice == "3":
+                if PerformanceMonitor.is_enabled():
+                    PerformanceMonitor.disable()
+                    print("Instrumentation turned off.")
+                else:
+                    PerformanceMonitor.enable()
+                    print("Instrumentation turned on.")
+            elif choice == "4":
+                PerformanceMonitor.reset()
+                print("Performance stats reset.")
+            elif choice == "5":
+                return
+            else:
+                print("Invalid choice. Please try again.")
+
+
+def _state_attributes():
+    """(owner, attribute, factory of an empty value) for every piece of state loaded from the data folder."""
+    return [
+        (UserManager, "_users", list),
+        (UserManager, "_users_by_id", dict),
+        (UserManager, "_user_positions", dict),
+        (CourseManager, "_courses", list),
+        (CourseManager, "_courses_by_id", dict),
+        (CourseManager, "_course_positions", dict),
+        (CourseManager, "_applications", dict),
+        (EnrollmentManager, "_enrollments", list),
+        (EnrollmentManager, "_enrollments_by_id", dict),
+        (EnrollmentManager, "_enrollment_positions", dict),
+        (EnrollmentManager, "_enrollments_by_student", dict),
+        (EnrollmentManager, "_enrollments_by_course", dict),
+        (AssignmentManager, "_assignments", list),
+        (AssignmentManager, "_assignments_by_id", dict),
+        (AssignmentManager, "_assignment_positions", dict),
+        (AssignmentManager, "_assignments_by_course", dict),
+        (AssignmentManager, "_submissions_by_student", dict),
+        (GradeManager, "_grades", list),
+        (GradeManager, "_grades_by_course", dict),
+        (GradeManager, "_grades_by_student", dict),
+        (GradeManager, "_grade_positions", dict),
+        (NotificationManager, "_inboxes", dict),
+    ]
+
+
+_loaded = False
+
+
+def _tenant_attributes():
+    """_state_attributes() plus the bookkeeping that belongs to the loaded data folder (see TenantManager)."""
+    return _state_attributes() + [
+        (NotificationManager, "_dirty", bool),
+        (SnapshotManager, "_latest", lambda: None),
+        (ShardStore, "_digests", dict),
+        (ShardStore, "_manifest", lambda: None),
+        (ShardStore, "_dirty", set),
+        (HotReloader, "_baselines", lambda: None),
+        (HotReloader, "_signatures", dict),
+        (SharedAccess, "_known", dict),
+    ]
+
+
+def reset_state():
+    """Forgets all loaded data, e.g. before switching to another data folder. Pending writes are flushed first."""
+    global _loaded
+    SaveScheduler.flush()
+    HotReloader.stop()
+    RecordStore.close()
+    with LockManager.exclusive():
+        SaveScheduler._take_pending()  # saves that failed belong to the state being forgotten
+        for owner, attribute, factory in _tenant_attributes():
+            setattr(owner, attribute, factory())
+        _loaded = False
+
+
+DATA_FILES = ("users.json", "courses.json", "enrollments.json", "assignments.json", "grades.json", "notifications.json")
+
+
+def _decode_data_file(folder, filename):
+    """Reads and decodes one data file of folder; module-level so that a process pool can run it."""
+    if folder != SAVE_FOLDER:
+        set_data_folder(folder)
+    return load_json(filename)
+
+
+@contextmanager
+def _load_pool():
+    """Executor for the file reads and decoding in load_all() as set by LOAD_EXECUTOR (None for serial)."""
+    if LOAD_EXECUTOR == "serial":
+        yield None
+    elif LOAD_EXECUTOR in ("thread", "process"):
+        executor = ThreadPoolExecutor if LOAD_EXECUTOR == "thread" else ProcessPoolExecutor
+        with executor(max_workers=len(DATA_FILES)) as pool:
+            yield pool
+    else:
+        raise ValueError(f"Unknown load executor {LOAD_EXECUTOR!r}. Expected thread, process or serial.")
+
+
+def _start(pool, function, *args):
+    """Submits function(*args) to pool; returns a callable that waits for the result (runs it then without a pool)."""
+    if pool is None:
+        return functools.partial(function, *args)
+    return pool.submit(function, *args).result
+
+
+def load_all():
+    """
+    Loads every data file from SAVE_FOLDER. All files are read and decoded concurrently (see
+    LOAD_EXECUTOR) and linked in dependency order as soon as they are ready: users, courses, then
+    enrollments, assignments and grades, so the wall time approaches that of the largest file.
+    With a RecordStore open only the notifications are loaded; entities are fetched on demand.
+    """
+    global _loaded
+    with SharedAccess.loading():
+        entities = not RecordStore.active()
+        sharded = entities and ShardStore.enabled()
+        with _load_pool() as pool:
+            notifications = _start(pool, _decode_data_file, SAVE_FOLDER, "notifications.json")
+            if entities:
+                rows = {filename: _start(pool, _decode_data_file, SAVE_FOLDER, filename)
+                        for filename in DATA_FILES[:2 if sharded else 5]}
+                if sharded:
+                    # Reading shards records their digests in ShardStore, so it stays in this process
+                    shard_rows = _start(pool if LOAD_EXECUTOR == "thread" else None, ShardStore._read_shards)
+                UserManager.load_users(rows["users.json"]())
+                CourseManager.load_courses(rows["courses.json"]())
+                if sharded:
+                    shards = shard_rows()
+                    EnrollmentManager.load_enrollments(shards["enrollments"])
+                    AssignmentManager.load_assignments(shards["assignments"])
+                    GradeManager.load_grades(shards["grades"])
+                else:
+                    EnrollmentManager.load_enrollments(rows["enrollments.json"]())
+                    AssignmentManager.load_assignments(rows["assignments.json"]())
+                    GradeManager.load_grades(rows["grades.json"]())
+            NotificationManager.load_notifications(notifications())
+    _loaded = True
+
+
+def ensure_loaded():
+    """Loads the data on first use; later calls do nothing. Lets embedders start without any I/O."""
+    if not _loaded:
+        load_all()
+
+
+def save_all():
+    """
+    Saves every data file to SAVE_FOLDER (this also covers any pending coalesced writes).
+    Collections whose file could not be written stay pending in the SaveScheduler. Returns whether all were saved.
+    """
+    with SaveScheduler._flush_lock:
+        SaveScheduler._take_pending()
+        with log_phase("save_all", warn_on=("failed",)) as counters:
+            return SaveScheduler._save(SaveScheduler.COLLECTIONS, counters)
+
+
+class SaveScheduler:
+    """
+    Coalesces saves. Instead of saving right away, an operation marks the collections it changed
+    as dirty; a background thread writes them once the oldest pending change is DELAY seconds old,
+    or as soon as MAX_OPERATIONS changes are pending. Pending changes are also flushed by save_all()
+    and when the process exits, so a run of admin deletions costs a single write per file.
+    Collections whose write fails stay pending and are tried again RETRY_DELAY seconds later.
+    DELAY comes from CASESTUDY3_SAVE_DELAY (seconds); 0 saves synchronously on every change.
+    """
+    COLLECTIONS = ("users", "courses", "enrollments", "assignments", "grades", "notifications")
+    DELAY = float(os.environ.get("CASESTUDY3_SAVE_DELAY", "2.0"))
+    MAX_OPERATIONS = 1000
+    RETRY_DELAY = 5.0  # minimum wait in seconds before a failed save is tried again
+
+    _condition = threading.Condition()
+    _flush_lock = threading.Lock()  # serializes flushes with save_all so files are never written twice at once
+    _dirty = set()
+    _operations = 0
+    _deadline = None  # monotonic time by which the pending changes must be written
+    _thread = None
+
+    @staticmethod
+    def _savers():
+        if RecordStore.active():
+            records = RecordStore.flush  # one write-back covers every entity collection
+            return {"users": records, "courses": records, "enrollments": records, "assignments": records,
+                    "grades": records, "notifications": NotificationManager.save_notifications}
+        if ShardStore.enabled():
+            return {"users": UserManager.save_users, "courses": CourseManager.save_courses,
+                    "enrollments": ShardStore.save, "assignments": ShardStore.save, "grades": ShardStore.save,
+                    "notifications": NotificationManager.save_notifications}
+        return {
+            "users": UserManager.save_users,
+            "courses": CourseManager.save_courses,
+            "enrollments": EnrollmentManager.save_enrollments,
+            "assignments": AssignmentManager.save_assignments,
+            "grades": GradeManager.save_grades,
+            "notifications": NotificationManager.save_notifications,
+        }
+
+    @staticmethod
+    def configure(delay=None, max_operations=None):
+        """Changes the coalescing window; pending changes keep their current deadline."""
+        if delay is not None:
+            SaveScheduler.DELAY = delay
+        if max_operations is not None:
+            SaveScheduler.MAX_OPERATIONS = max_operations
+
+    @staticmethod
+    def mark_dirty(*collections):
+        """Records that the given collections changed and schedules a write."""
+        unknown = set(collections) - set(SaveScheduler.COLLECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown collection(s): {', '.join(sorted(unknown))}.")
+        with SaveScheduler._condition:
+            SaveScheduler._dirty.update(collections)
+            SaveScheduler._operations += 1
+            now = time.monotonic()
+            if SaveScheduler._deadline is None:
+                SaveScheduler._deadline = now + SaveScheduler.DELAY
+            if SaveScheduler._operations >= SaveScheduler.MAX_OPERATIONS:
+                SaveScheduler._deadline = now
+            synchronous = SaveScheduler.DELAY <= 0
+            if not synchronous:
+                SaveScheduler._start()
+                SaveScheduler._condition.notify()
+        if synchronous:
+            SaveScheduler.flush()
+
+    @staticmethod
+    def pending():
+        """Returns the collections waiting to be written."""
+        with SaveScheduler._condition:
+            return set(SaveScheduler._dirty)
+
+    @staticmethod
+    def _take_pending():
+        with SaveScheduler._condition:
+            dirty = SaveScheduler._dirty
+            SaveScheduler._dirty = set()
+            SaveScheduler._operations = 0
+            SaveScheduler._deadline = None
+        return dirty
+
+    @staticmethod
+    def flush():
+        """
+        Writes every pending collection now. Returns whether all of them were written (True if
+        nothing was pending); the ones that failed stay pending, as in save_all().
+        """
+        with SaveScheduler._flush_lock:
+            return SaveScheduler._flush_pending()
+
+    @staticmethod
+    def _flush_pending():
+        """flush() for a caller that already holds _flush_lock."""
+        dirty = SaveScheduler._take_pending()
+        if not dirty:
+            return True
+        with log_phase("flush", warn_on=("failed",)) as counters:
+            return SaveScheduler._save(dirty, counters)
+
+    @staticmethod
+    def _save(collections, counters):
+        """
+        Runs the savers of the collections (of every collection if a merge cascaded). Collections
+        whose save failed are marked dirty again and retried later. The caller holds _flush_lock.
+        Returns whether every save succeeded.
+        """
+        failed = set()
+        with SharedAccess.saving() as cascaded:
+            if cascaded:
+                collections = SaveScheduler.COLLECTIONS
+            results = {}
+            for name, saver in SaveScheduler._savers().items():
+                if name not in collections:
+                    continue
+                if saver not in results:
+                    results[saver] = saver()
+                    counters[name] += 1
+                if not results[saver]:
+                    failed.add(name)
+        if failed:
+            counters["failed"] = len(failed)
+            with SaveScheduler._condition:
+                SaveScheduler._dirty.update(failed)
+                retry_at = time.monotonic() + max(SaveScheduler.DELAY, SaveScheduler.RETRY_DELAY)
+                if SaveScheduler._deadline is None or SaveScheduler._deadline < retry_at:
+                    SaveScheduler._deadline = retry_at
+                SaveScheduler._start()
+                SaveScheduler._condition.notify()
+        return not failed
+
+    @staticmethod
+    def _start():
+        """Starts the flush thread and the exit hook on first use. The caller holds _condition."""
+        if SaveScheduler._thread is None:
+            SaveScheduler._thread = threading.Thread(target=SaveScheduler._run, name="save-scheduler", daemon=True)
+            SaveScheduler._thread.start()
+            atexit.register(SaveScheduler.flush)
+
+    @staticmethod
+    def _run():
+        while True:
+            with SaveScheduler._condition:
+                while SaveScheduler._deadline is None:
+                    SaveScheduler._condition.wait()
+                remaining = SaveScheduler._deadline - time.monotonic()
+                if remaining > 0:
+                    SaveScheduler._condition.wait(remaining)
+                    continue
+            try:
+                SaveScheduler.flush()
+            except Exception:
+                logger.exception("Background save failed.")
+
+
+class RecordStore:
+    """
+    On-demand storage mode backed by the stdlib dbm module (records.db in SAVE_FOLDER).
+
+    Every record is stored under its own key ("users/<id>", "courses/<id>", "enrollments/<id>",
+    "assignments/<id>", "grades/<id>") next to three lookup keys: "email/<email>" (user ID),
+    "course_records/<course id>" (the course's enrollment, assignment and grade IDs) and
+    "user_courses/<user id>" (the courses the user appears in).
+
+    Nothing is loaded up front; the manager lookups fetch entities on first access:
+      - a course is fetched as a closure: the course, its enrollments, assignments and grades,
+        and every user they refer to, linked the way the loaders link them;
+      - a user fetched directly (a root: login, find_user_by_id) also brings in the closure of
+        every course they appear in, so their own data is complete.
+    Fetched courses and roots are kept in an LRU cache of CAPACITY entries. Evicting a course
+    writes it back and unlinks it, together with the users nothing resident refers to any more.
+    Courses in a resident root's working set, or with pending instructor applications, are
+    pinned. A user fetched only as part of a course closure lists only resident courses, so
+    their stored course lists are merged on write-back rather than overwritten.
+    save_all() writes back everything resident. Listings such as view_all_users only see the
+    resident working set. While a Transaction commits, eviction is held back (see holding()) so
+    that no change it may still roll back is written to the store.
+    """
+    FILENAME = "records.db"
+    CAPACITY = max(1, int(os.environ.get("CASESTUDY3_RECORD_CACHE", "256")))
+    PREFIXES = {
+        "users": "users/", "courses": "courses/", "enrollments": "enrollments/",
+        "assignments": "assignments/", "grades": "grades/",
+    }
+
+    _db = None
+    _guard = threading.RLock()  # serializes access to the dbm handle and the bookkeeping below
+    _lru = OrderedDict()  # ("course" | "user", ID) -> None, least recently used first
+    _roots = {}  # root user ID -> course IDs of their working set
+    _pins = Counter()  # course ID -> resident roots whose working set contains it
+    _fetched = {}  # course ID -> record IDs as last read or written, to spot deleted records
+    _fetched_users = set()
+    _deleted = {"courses": set(), "users": set()}
+    _holds = 0  # open holding() blocks; nothing is evicted (or written back) while there are any
+
+    @staticmethod
+    def active():
+        return RecordStore._db is not None
+
+    @staticmethod
+    def _default_path():
+        return os.path.join(SAVE_FOLDER, RecordStore.FILENAME)
+
+    @staticmethod
+    def open(path=None):
+        """
+        Switches to on-demand mode. Unloads the current state first; if the store does not exist
+        yet it is built from the JSON data files.
+        """
+        path = path or RecordStore._default_path()
+        reset_state()
+        if dbm.whichdb(path) is None:
+            RecordStore.build(path)
+        with RecordStore._guard:
+            RecordStore._db = dbm.open(path, "w")
+        logger.info("Opened record store %s.", path)
+
+    @staticmethod
+    def close():
+        """Writes back everything resident and leaves on-demand mode."""
+        if not RecordStore.active():
+            return
+        RecordStore.flush()
+        with RecordStore._guard:
+            RecordStore._db.close()
+            RecordStore._db = None
+            RecordStore._lru = OrderedDict()
+            RecordStore._roots, RecordStore._pins = {}, Counter()
+            RecordStore._fetched, RecordStore._fetched_users = {}, set()
+            RecordStore._deleted = {"courses": set(), "users": set()}
+
+    @staticmethod
+    def build(path=None):
+        """
+        Builds the store from the JSON data files in SAVE_FOLDER, one file at a time.
+        Rows whose course does not exist are skipped, as the loaders skip them. Returns row counts.
+        """
+        path = path or RecordStore._default_path()
+        counts = Counter()
+        course_records = {}
+        user_courses = {}
+
+        def appears_in(user_id, course_id):
+            if user_id:
+                user_courses.setdefault(user_id, {})[course_id] = None
+
+        _ensure_save_folder()
+        with log_phase("build_record_store") as counters, dbm.open(path, "n") as db:
+            courses = load_json("courses.json")
+            for row in courses:
+                db["courses/" + row["course_id"]] = _encode_row(row)
+                course_records[row["course_id"]] = {"enrollments": [], "assignments": [], "grades": []}
+                appears_in(row["instructor"], row["course_id"])
+                for student_id in row["enrolled_students"]:
+                    appears_in(student_id, row["course_id"])
+            counts["courses"] = len(courses)
+            del courses
+
+            for collection, id_key in (("enrollments", "enrollment_id"), ("assignments", "assignment_id"),
+                                       ("grades", "grade_id")):
+                for row in ShardStore.read_rows(f"{collection}.json"):
+                    records = course_records.get(row["course_id"])
+                    if records is None:
+                        counters["skipped"] += 1
+                        continue
+                    db[RecordStore.PREFIXES[collection] + row[id_key]] = _encode_row(row)
+                    records[collection].append(row[id_key])
+                    if collection == "assignments":
+                        for student_id in (*row["submitted_students"], *row["graded_students"]):
+                            appears_in(student_id, row["course_id"])
+                    else:
+                        appears_in(row["student_id"], row["course_id"])
+                    counts[collection] += 1
+
+            for row in load_json("users.json"):
+                db["users/" + row["id"]] = _encode_row(row)
+                if row.get("email"):
+                    db["email/" + row["email"]] = row["id"]
+                for course_id in (*row.get("enrolled_courses", ()), *row.get("assigned_courses", ())):
+                    if course_id in course_records:
+                        appears_in(row["id"], course_id)
+                counts["users"] += 1
+            for course_id, records in course_records.items():
+                db["course_records/" + course_id] = _encode_row(records)
+            for user_id, course_ids in user_courses.items():
+                db["user_courses/" + user_id] = _encode_row(list(course_ids))
+            counters.update(counts)
+        return dict(counts)
+
+    @staticmethod
+    def export_json():
+        """Writes the store back out as the five JSON data files. Returns whether every file was written."""
+        written = True
+        with RecordStore._guard:
+            db = RecordStore._db
+            keys = sorted(key.decode() if isinstance(key, bytes) else key for key in db.keys())
+            for collection, prefix in RecordStore.PREFIXES.items():
+                rows = [json.loads(db[key]) for key in keys if key.startswith(prefix)]
+                written = ShardStore.write_rows(f"{collection}.json", rows) and written
+        return written
+
+    @staticmethod
+    def _get(key):
+        try:
+            return json.loads(RecordStore._db[key])
+        except KeyError:
+            return None
+
+    @staticmethod
+    def _touch(kind, key):
+        with RecordStore._guard:
+            RecordStore._lru[(kind, key)] = None
+            RecordStore._lru.move_to_end((kind, key))
+
+    @staticmethod
+    def _can_fetch():
+        # A thread holding the state lock shared cannot take it exclusively; it only sees resident entities
+        return RecordStore.active() and not LockManager._state_lock.holds_shared()
+
+    @staticmethod
+    def fetch_user(user_id):
+        """Returns the user, fetching them and their working set on first access."""
+        user = UserManager._users_by_id.get(user_id)
+        if not RecordStore._can_fetch():
+            return user
+        if user is not None and user_id in RecordStore._roots:
+            RecordStore._touch("user", user_id)
+            return user
+        with LockManager.exclusive(), RecordStore._guard:
+            user = RecordStore._fetch_root(user_id)
+            RecordStore._evict()
+        return user
+
+    @staticmethod
+    def fetch_user_by_email(email):
+        if not RecordStore._can_fetch():
+            return None
+        with RecordStore._guard:
+            user_id = RecordStore._db.get(("email/" + email).encode())
+        return RecordStore.fetch_user(user_id.decode()) if user_id else None
+
+    @staticmethod
+    def fetch_course(course_id):
+        """Returns the course, fetching its closure on first access."""
+        course = CourseManager._courses_by_id.get(course_id)
+        if not RecordStore._can_fetch():
+            return course
+        if course is not None:
+            RecordStore._touch("course", course_id)
+            return course
+        with LockManager.exclusive(), RecordStore._guard:
+            course = RecordStore._fetch_course(course_id)
+            RecordStore._evict()
+        return course
+
+    @staticmethod
+    def fetch_assignment(assignment_id):
+        assignment = AssignmentManager._assignments_by_id.get(assignment_id)
+        if assignment is None and RecordStore._can_fetch():
+            with RecordStore._guard:
+                row = RecordStore._get("assignments/" + assignment_id)
+            if row and RecordStore.fetch_course(row["course_id"]):
+                assignment = AssignmentManager._assignments_by_id.get(assignment_id)
+        return assignment
+
+    @staticmethod
+    def fetch_enrollment(enrollment_id):
+        enrollment = EnrollmentManager._enrollments_by_id.get(enrollment_id)
+        if enrollment is None and RecordStore._can_fetch():
+            with RecordStore._guard:
+                row = RecordStore._get("enrollments/" + enrollment_id)
+            if row and RecordStore.fetch_course(row["course_id"]):
+                enrollment = EnrollmentManager._enrollments_by_id.get(enrollment_id)
+        return enrollment
+
+    @staticmethod
+    def each(collection):
+        """
+        Yields every course ("courses") or user ("users"). Without the store these are the
+        registry's; with it, every stored one is fetched in turn (after a flush, so records created
+        since then are included), so a walk over all the data stays within the LRU working set.
+        Users are fetched as roots, with every course they appear in.
+        """
+        if not RecordStore.active():
+            yield from list(CourseManager._courses if collection == "courses" else UserManager._users)
+            return
+        RecordStore.flush()
+        prefix = RecordStore.PREFIXES[collection]
+        fetch = RecordStore.fetch_course if collection == "courses" else RecordStore.fetch_user
+        with RecordStore._guard:
+            keys = sorted(key.decode() if isinstance(key, bytes) else key for key in RecordStore._db.keys())
+        for key in keys:
+            if key.startswith(prefix):
+                record = fetch(key[len(prefix):])
+                if record is not None:
+                    yield record
+
+    @staticmethod
+    def record_deletions(collection, ids):
+        """Called by remove_users/remove_courses; the records are deleted from the store on the next flush."""
+        if RecordStore.active():
+            with RecordStore._guard:
+                RecordStore._deleted[collection].update(ids)
+
+    @staticmethod
+    def _fetch_user(user_id):
+        """Materializes a user without their working set. The caller holds the state lock exclusively."""
+        user = UserManager._users_by_id.get(user_id)
+        if user is not None or not user_id:
+            return user
+        row = RecordStore._get("users/" + user_id)
+        if row is None:
+            return None
+        user = {"Student": Student, "Instructor": Instructor, "Admin": PlatformAdmin}[row["type"]].from_dict(row)
+        UserManager._add_user(user)
+        RecordStore._fetched_users.add(user_id)
+        return user
+
+    @staticmethod
+    def _fetch_root(user_id):
+        user = RecordStore._fetch_user(user_id)
+        if user is None:
+            return None
+        if user_id not in RecordStore._roots:
+            course_ids = RecordStore._get("user_courses/" + user_id) or []
+            RecordStore._roots[user_id] = course_ids
+            RecordStore._pins.update(course_ids)
+            for course_id in course_ids:
+                RecordStore._fetch_course(course_id)
+        RecordStore._touch("user", user_id)
+        return user
+
+    @staticmethod
+    def _fetch_course(course_id):
+        """Materializes a course closure. The caller holds the state lock exclusively."""
+        course = CourseManager._courses_by_id.get(course_id)
+        if course is not None:
+            RecordStore._touch("course", course_id)
+            return course
+        row = RecordStore._get("courses/" + course_id)
+        if row is None:
+            return None
+        ids = RecordStore._get("course_records/" + course_id) or {"enrollments": [], "assignments": [], "grades": []}
+        rows = {
+            collection: [record for record in (RecordStore._get(RecordStore.PREFIXES[collection] + record_id)
+                                               for record_id in ids[collection]) if record]
+            for collection in ("enrollments", "assignments", "grades")
+        }
+        user_ids = [row["instructor"], *row["enrolled_students"]]
+        user_ids.extend(record["student_id"] for record in rows["enrollments"] + rows["grades"])
+        for record in rows["assignments"]:
+            user_ids.extend((*record["submitted_students"], *record["graded_students"]))
+        users = {user_id: RecordStore._fetch_user(user_id) for user_id in dict.fromkeys(user_ids) if user_id}
+
+        course = Course.from_dict(row)
+        add_to_registry(CourseManager._courses, CourseManager._course_positions, course)
+        CourseManager._courses_by_id.setdefault(course_id, course)
+        instructor = users.get(row["instructor"])
+        if instructor:
+            course._instructor = instructor
+            if course not in instructor._assigned_courses:
+                instructor._assigned_courses.append(course)
+        course._enrolled_students = [users[student_id] for student_id in row["enrolled_students"] if users.get(student_id)]
+        for student in course._enrolled_students:
+            if course not in student._enrolled_courses:
+                student._enrolled_courses.append(course)
+
+        for record in rows["enrollments"]:
+            student = users.get(record["student_id"])
+            if student:
+                enrollment = Enrollment.from_dict(record)
+                enrollment._student, enrollment._course = student, course
+                EnrollmentManager._add_enrollment(enrollment)
+                if enrollment._enrollment_status == "Approved":
+                    if course not in student._enrolled_courses:
+                        student._enrolled_courses.append(course)
+                    if student not in course._enrolled_students:
+                        course._enrolled_students.append(student)
+        for record in rows["assignments"]:
+            if "max_grade" in record:
+                assignment = Assignment.from_dict(record, course)
+                assignment._submitted_students = {
+                    users[student_id]: status for student_id, status in record["submitted_students"].items() if users.get(student_id)
+                }
+                assignment._graded_students = {
+                    users[student_id]: grade for student_id, grade in record["graded_students"].items() if users.get(student_id)
+                }
+                AssignmentManager._add_assignment(assignment)
+        for record in rows["grades"]:
+            student = users.get(record["student_id"])
+            if student:
+                grade = Grade.from_dict(record)
+                grade._student, grade._course = student, course
+                GradeManager._add_grades([grade])
+
+        RecordStore._fetched[course_id] = ids
+        RecordStore._touch("course", course_id)
+        return course
+
+    @staticmethod
+    @contextmanager
+    def holding():
+        """Keeps everything fetched during the block resident: nothing is evicted or written back."""
+        with RecordStore._guard:
+            RecordStore._holds += 1
+        try:
+            yield
+        finally:
+            with RecordStore._guard:
+                RecordStore._holds -= 1
+
+    @staticmethod
+    def _evict():
+        """Evicts least recently used entries until at most CAPACITY remain (pinned ones stay)."""
+        if RecordStore._holds:
+            return
+        for kind, key in list(RecordStore._lru):
+            if len(RecordStore._lru) <= RecordStore.CAPACITY:
+                break
+            if kind == "user":
+                del RecordStore._lru[(kind, key)]
+                RecordStore._pins.subtract(RecordStore._roots.pop(key, ()))
+                user = UserManager._users_by_id.get(key)
+                if user is not None and not RecordStore._is_referenced(user):
+                    RecordStore._write_user(user, set())
+                    RecordStore._drop_users([user])
+            elif RecordStore._pins[key] <= 0 and not CourseManager._applications.get(key):
+                del RecordStore._lru[(kind, key)]
+                RecordStore._evict_course(key)
+
+    @staticmethod
+    def _course_users(course):
+        users = [course._instructor, *course._enrolled_students]
+        users.extend(e._student for e in EnrollmentManager._enrollments_by_course.get(course._course_id, ()))
+        users.extend(g._student for g in GradeManager._grades_by_course.get(course._course_id, ()))
+        for assignment in AssignmentManager._assignments_by_course.get(course._course_id, ()):
+            users.extend((*assignment._submitted_students, *assignment._graded_students))
+        return [user for user in dict.fromkeys(users) if user is not None]
+
+    @staticmethod
+    def _evict_course(course_id):
+        course = CourseManager._courses_by_id.get(course_id)
+        RecordStore._fetched.pop(course_id, None)
+        if course is None:
+            return  # rolled back or deleted since it was fetched
+        users = RecordStore._course_users(course)
+        RecordStore._write_course(course)
+        for user in users:
+            RecordStore._write_user(user, set())
+        CourseManager.remove_courses([course_id])
+        RecordStore._deleted["courses"].discard(course_id)  # unloaded, not deleted
+        RecordStore._drop_users([user for user in users if user._id not in RecordStore._roots
+                                 and not RecordStore._is_referenced(user)])
+
+    @staticmethod
+    def _is_referenced(user):
+        """Whether a resident course or record still refers to the user."""
+        if isinstance(user, Student):
+            return bool(user._enrolled_courses) or any(
+                user._id in index for index in (EnrollmentManager._enrollments_by_student,
+                                                 GradeManager._grades_by_student,
+                                                 AssignmentManager._submissions_by_student))
+        if isinstance(user, Instructor):
+            return bool(user._assigned_courses) or any(user in applicants for applicants in CourseManager._applications.values())
+        return False
+
+    @staticmethod
+    def _drop_users(users):
+        if not users:
+            return
+        discard_from_registry(UserManager._users, UserManager._user_positions, users)
+        for user in users:
+            if UserManager._users_by_id.get(user._id) is user:
+                del UserManager._users_by_id[user._id]
+            RecordStore._fetched_users.discard(user._id)
+
+    @staticmethod
+    def _write_course(course):
+        db = RecordStore._db
+        course_id = course._course_id
+        records = {
+            "enrollments": EnrollmentManager._enrollments_by_course.get(course_id, []),
+            "assignments": AssignmentManager._assignments_by_course.get(course_id, []),
+            "grades": GradeManager._grades_by_course.get(course_id, []),
+        }
+        db["courses/" + course_id] = RecordCodec.of(Course).encode_row(course, True)
+        ids = {}
+        for collection, objects in records.items():
+            prefix = RecordStore.PREFIXES[collection]
+            for obj in objects:
+                db[prefix + RecordStore._record_id(obj)] = RecordCodec.of(type(obj)).encode_row(obj, True)
+            ids[collection] = [RecordStore._record_id(obj) for obj in objects]
+            for record_id in set(RecordStore._fetched.get(course_id, {}).get(collection, ())) - set(ids[collection]):
+                RecordStore._delete(prefix + record_id)
+        db["course_records/" + course_id] = _encode_row(ids)
+        RecordStore._fetched[course_id] = ids
+
+    @staticmethod
+    def _record_id(obj):
+        return getattr(obj, "_enrollment_id", None) or getattr(obj, "_assignment_id", None) or obj._grade_id
+
+    @staticmethod
+    def _delete(key):
+        try:
+            del RecordStore._db[key]
+        except KeyError:
+            pass
+
+    @staticmethod
+    def _write_user(user, deleted_courses):
+        """
+        Writes a resident user. Resident courses are complete, so they decide the user's
+        membership in them; the stored lists are kept for every course that is not resident.
+        """
+        db = RecordStore._db
+        row = user.to_dict()
+        stored = RecordStore._get("users/" + user._id) or {}
+        resident = CourseManager._courses_by_id
+
+        def merge(stored_ids, current_ids):
+            kept = [course_id for course_id in stored_ids if course_id not in resident and course_id not in deleted_courses]
+            return kept + [course_id for course_id in current_ids if course_id not in kept]
+
+        for field in ("enrolled_courses", "assigned_courses"):
+            if field in row:
+                row[field] = merge(stored.get(field, ()), row[field])
+        db["users/" + user._id] = _encode_row(row)
+        if stored.get("email") and stored["email"] != row.get("email"):
+            RecordStore._delete("email/" + stored["email"])
+        if row.get("email"):
+            db["email/" + row["email"]] = user._id
+
+        appears_in = [course._course_id for course in getattr(user, "_enrolled_courses", ())]
+        appears_in += [course._course_id for course in getattr(user, "_assigned_courses", ())]
+        appears_in += [e._course._course_id for e in EnrollmentManager._enrollments_by_student.get(user._id, ())]
+        appears_in += [g._course._course_id for g in GradeManager._grades_by_student.get(user._id, ())]
+        appears_in += [a._course._course_id for a in AssignmentManager._submissions_by_student.get(user._id, ())]
+        stored_courses = RecordStore._get("user_courses/" + user._id) or []
+        db["user_courses/" + user._id] = _encode_row(merge(stored_courses, dict.fromkeys(appears_in)))
+        RecordStore._fetched_users.add(user._id)
+
+    @staticmethod
+    def _unlink_stored_user(user_id, course_ids):
+        """Removes deleted courses from a user who is not resident."""
+        row = RecordStore._get("users/" + user_id)
+        if row is None:
+            return
+        for field in ("enrolled_courses", "assigned_courses"):
+            if field in row:
+                row[field] = [course_id for course_id in row[field] if course_id not in course_ids]
+        RecordStore._db["users/" + user_id] = _encode_row(row)
+        stored_courses = RecordStore._get("user_courses/" + user_id) or []
+        RecordStore._db["user_courses/" + user_id] = _encode_row([c for c in stored_courses if c not in course_ids])
+
+    @staticmethod
+    def _delete_course(course_id):
+        """Deletes a course and its records from the store; returns the IDs of the users it referred to."""
+        row = RecordStore._get("courses/" + course_id) or {"instructor": None, "enrolled_students": []}
+        ids = RecordStore._get("course_records/" + course_id) or {}
+        user_ids = [row["instructor"], *row["enrolled_students"]]
+        for collection, record_ids in ids.items():
+            for record_id in record_ids:
+                key = RecordStore.PREFIXES[collection] + record_id
+                record = RecordStore._get(key) or {}
+                user_ids.append(record.get("student_id"))
+                user_ids.extend((*record.get("submitted_students", ()), *record.get("graded_students", ())))
+                RecordStore._delete(key)
+        RecordStore._delete("courses/" + course_id)
+        RecordStore._delete("course_records/" + course_id)
+        RecordStore._fetched.pop(course_id, None)
+        return [user_id for user_id in dict.fromkeys(user_ids) if user_id]
+
+    @staticmethod
+    def flush():
+        """Writes every resident record back and applies pending deletions. Returns True (errors raise)."""
+        if not RecordStore.active():
+            return True
+        with log_phase("flush_record_store") as counters, LockManager.exclusive(readonly=True), RecordStore._guard:
+            deleted_courses = RecordStore._deleted["courses"]
+            affected_users = set()
+            for course_id in deleted_courses:
+                affected_users.update(RecordStore._delete_course(course_id))
+            for user_id in RecordStore._deleted["users"]:
+                row = RecordStore._get("users/" + user_id)
+                if row and row.get("email"):
+                    RecordStore._delete("email/" + row["email"])
+                RecordStore._delete("users/" + user_id)
+                RecordStore._delete("user_courses/" + user_id)
+                RecordStore._fetched_users.discard(user_id)
+            for user_id in affected_users - RecordStore._deleted["users"] - UserManager._users_by_id.keys():
+                RecordStore._unlink_stored_user(user_id, deleted_courses)
+
+            for course in CourseManager._courses:
+                RecordStore._write_course(course)
+                RecordStore._lru.setdefault(("course", course._course_id))
+            for user in UserManager._users:
+                RecordStore._write_user(user, deleted_courses)
+                if user._id not in RecordStore._roots and not RecordStore._is_referenced(user):
+                    RecordStore._roots[user._id] = []  # e.g. a new account: cached like a fetched user
+                    RecordStore._lru.setdefault(("user", user._id))
+            counters["courses"] = len(CourseManager._courses)
+            counters["users"] = len(UserManager._users)
+            counters["deleted"] = len(deleted_courses) + len(RecordStore._deleted["users"])
+            RecordStore._deleted = {"courses": set(), "users": set()}
+            if hasattr(RecordStore._db, "sync"):
+                RecordStore._db.sync()
+        return True
+
+
+class ShardStore:
+    """
+    Optional per-course layout for enrollments, assignments and grades. Instead of the three
+    global files, SAVE_FOLDER/shards/<course ID>.json holds
+    {"enrollments": [...], "assignments": [...], "grades": [...]} for one course and
+    shards/manifest.json lists the shards with their record counts. users.json and courses.json
+    stay global. The layout is in use whenever the manifest exists (see convert()).
+
+    Saving encodes, with RecordCodec, only the shards of the courses LockManager recorded as
+    touched since the last save (all of them after a structural change), rewrites those whose
+    bytes differ from what was last read or written, and removes the shards of deleted courses,
+    so a change to one course encodes and rewrites one shard. Shards whose write failed are
+    encoded again on the next save. Loading reads and decodes the shards in a thread pool;
+    load(course_ids) reloads only the records of the given courses.
+    """
+    FOLDER = "shards"
+    MANIFEST = "manifest.json"
+    COLLECTIONS = ("enrollments", "assignments", "grades")
+    FILES = {"enrollments.json": "enrollments", "assignments.json": "assignments", "grades.json": "grades"}
+
+    _digests = {}  # course ID -> hash of the shard bytes last read or written
+    _manifest = None  # manifest as last read or written
+    _dirty = set()  # course IDs whose shards still have to be written
+
+    @staticmethod
+    def enabled():
+        return _data_path(os.path.join(ShardStore.FOLDER, ShardStore.MANIFEST)) is not None
+
+    @staticmethod
+    def _shard_name(course_id):
+        return os.path.join(ShardStore.FOLDER, urllib.parse.quote(course_id, safe="") + ".json")
+
+    @staticmethod
+    def _read_manifest():
+        manifest = load_json(os.path.join(ShardStore.FOLDER, ShardStore.MANIFEST)) or {}
+        manifest.setdefault("shards", {})
+        return manifest
+
+    @staticmethod
+    def _read_shard(filename):
+        """Returns (shard, hash of its decompressed bytes); the hash is None if it came from a backup."""
+        filepath = _data_path(filename)
+        if filepath is None:
+            return {}, None
+        try:
+            with open(filepath, "rb") as file:
+                payload = file.read()
+            if payload.startswith(GZIP_MAGIC):
+                payload = gzip.decompress(payload)
+            elif payload.startswith(XZ_MAGIC):
+                payload = lzma.decompress(payload)
+            return json.loads(payload), hash(payload)
+        except Exception:
+            return load_json(filename) or {}, None  # falls back to the backups, raises DataFileError without one
+
+    @staticmethod
+    def _read_shards(course_ids=None, workers=None):
+        """Reads the shards (all, or those of course_ids) in parallel; returns {collection: rows}."""
+        manifest = ShardStore._read_manifest()
+        ShardStore._manifest = manifest
+        entries = [(course_id, entry["file"]) for course_id, entry in manifest["shards"].items()
+                   if course_ids is None or course_id in course_ids]
+        rows = {collection: [] for collection in ShardStore.COLLECTIONS}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            shards = pool.map(ShardStore._read_shard, [filename for _, filename in entries])
+            for (course_id, _), (shard, digest) in zip(entries, shards):
+                ShardStore._digests[course_id] = digest
+                for collection in ShardStore.COLLECTIONS:
+                    rows[collection].extend(shard.get(collection, ()))
+        return rows
+
+    @staticmethod
+    def load(course_ids=None, workers=None):
+        """
+        Loads the sharded records after users and courses are loaded. With course_ids only those
+        courses' records are replaced; everything else stays as it is.
+        """
+        rows = ShardStore._read_shards(None if course_ids is None else set(course_ids), workers)
+        if course_ids is None:
+            EnrollmentManager.load_enrollments(rows["enrollments"])
+            AssignmentManager.load_assignments(rows["assignments"])
+            GradeManager.load_grades(rows["grades"])
+            return
+        with log_phase("load_shards", warn_on=("skipped", "skipped_missing_course")) as counters, LockManager.exclusive():
+            course_ids = set(course_ids)
+            EnrollmentManager._discard_enrollments(
+                [e for course_id in course_ids for e in EnrollmentManager._enrollments_by_course.get(course_id, ())])
+            AssignmentManager._discard_assignments(
+                [a for course_id in course_ids for a in AssignmentManager._assignments_by_course.get(course_id, ())])
+            GradeManager._discard_grades(
+                [g for course_id in course_ids for g in GradeManager._grades_by_course.get(course_id, ())])
+            EnrollmentManager._link_enrollments(rows["enrollments"], counters)
+            AssignmentManager._link_assignments(rows["assignments"], counters)
+            GradeManager._link_grades(rows["grades"], counters)
+            counters["shards"] = len(course_ids)
+
+    @staticmethod
+    def save():
+        """Rewrites the shards of the courses that changed, then the manifest; removes shards of deleted courses."""
+        with log_phase("save_shards") as counters:
+            with LockManager.exclusive(readonly=True):
+                structural_change, courses, assignments = LockManager._drain_touched("shards")
+                complete = structural_change or ShardStore._manifest is None
+                if complete:
+                    course_ids = [course._course_id for course in CourseManager._courses]
+                else:
+                    assignments_by_id = AssignmentManager._assignments_by_id
+                    course_ids = ShardStore._dirty | courses | {
+                        assignments_by_id[assignment_id]._course._course_id
+                        for assignment_id in assignments if assignment_id in assignments_by_id
+                    }
+                shards = {course_id: ShardStore._encode(course_id) for course_id in course_ids}
+            counters["encoded"] = len(shards)
+            return ShardStore._write(shards, counters, complete)
+
+    @staticmethod
+    def _encode(course_id):
+        """(text, record counts) of a course's shard; None if the course has no records."""
+        sections = (
+            ("enrollments", EnrollmentManager._enrollments_by_course.get(course_id, ())),
+            ("assignments", AssignmentManager._assignments_by_course.get(course_id, ())),
+            ("grades", GradeManager._grades_by_course.get(course_id, ())),
+        )
+        if not any(records for _, records in sections):
+            return None
+        key_separator, separator = (":", ",") if COMPACT_JSON else (": ", ",\n")
+        text = "{" + separator.join(
+            f'"{collection}"{key_separator}{RecordCodec.dumps(records, COMPACT_JSON)}' for collection, records in sections
+        ) + "}"
+        return text, {collection: len(records) for collection, records in sections}
+
+    @staticmethod
+    def _write(shards, counters, complete=True):
+        """
+        Writes the shards whose content changed and the manifest. shards maps course IDs to
+        (text, record counts), or None for a course without records; with complete=False the
+        courses not in it keep their manifest entries. Returns whether every write succeeded.
+        """
+        previous = ShardStore._manifest if ShardStore._manifest is not None else ShardStore._read_manifest()
+        os.makedirs(os.path.join(SAVE_FOLDER, ShardStore.FOLDER), exist_ok=True)
+        manifest = {"version": 1, "collections": list(ShardStore.COLLECTIONS),
+                    "shards": {} if complete else dict(previous["shards"])}
+        written = True
+        for course_id, shard in shards.items():
+            if shard is None:
+                manifest["shards"].pop(course_id, None)
+                ShardStore._dirty.discard(course_id)
+                continue
+            text, counts = shard
+            filename = ShardStore._shard_name(course_id)
+            payload = text.encode()
+            digest = hash(payload)
+            if ShardStore._digests.get(course_id) != digest:
+                if save_json_text(filename, payload):
+                    ShardStore._digests[course_id] = digest
+                    counters["written"] += 1
+                else:
+                    written = False
+                    ShardStore._dirty.add(course_id)
+                    if course_id in previous["shards"]:
+                        manifest["shards"][course_id] = previous["shards"][course_id]  # still the old shard
+                    continue
+            ShardStore._dirty.discard(course_id)
+            manifest["shards"][course_id] = {"file": filename, **counts}
+        if manifest != previous and not save_json(os.path.join(ShardStore.FOLDER, ShardStore.MANIFEST), manifest):
+            ShardStore._dirty.update(shards)
+            if complete:
+                ShardStore._manifest = None  # the next save is complete again and removes what this one could not
+            return False  # the old manifest stays in effect, so its shards are kept as well
+        ShardStore._manifest = manifest
+        for course_id, entry in previous["shards"].items():
+            if course_id not in manifest["shards"]:
+                ShardStore._digests.pop(course_id, None)
+                for suffix in COMPRESSION_SUFFIXES.values():
+                    if os.path.exists(os.path.join(SAVE_FOLDER, entry["file"] + suffix)):
+                        os.remove(os.path.join(SAVE_FOLDER, entry["file"] + suffix))
+                counters["removed"] += 1
+        counters["shards"] = len(manifest["shards"])
+        return written
+
+    @staticmethod
+    def read_rows(filename):
+        """Rows of a data file in whichever layout is in use (for fsck and the record store)."""
+        collection = ShardStore.FILES.get(filename)
+        if collection is None or not ShardStore.enabled():
+            return load_json(filename)
+        return ShardStore._read_shards()[collection]
+
+    @staticmethod
+    def write_rows(filename, rows):
+        """Replaces all rows of a data file in whichever layout is in use. Returns whether every write succeeded."""
+        collection = ShardStore.FILES.get(filename)
+        if collection is None or not ShardStore.enabled():
+            return save_json(filename, rows)
+        shards = {}
+        for course_id, entry in ShardStore._read_manifest()["shards"].items():
+            shards[course_id] = ShardStore._read_shard(entry["file"])[0]
+            shards[course_id][collection] = []
+        for row in rows:
+            shard = shards.setdefault(row["course_id"], {name: [] for name in ShardStore.COLLECTIONS})
+            shard.setdefault(collection, []).append(row)
+        with log_phase("save_shards") as counters:
+            return ShardStore._write({
+                course_id: (_encode_json(shard), {name: len(shard.get(name, ())) for name in ShardStore.COLLECTIONS})
+                for course_id, shard in shards.items() if any(shard.values())
+            }, counters)
+
+    @staticmethod
+    def convert(layout):
+        """
+        Rewrites the data folder in the given layout ("sharded" or "flat") and removes the files of
+        the other one. The data is loaded first, so records the loaders skip are dropped. The other
+        layout is only removed once every file of the new one is written; if a write fails, what
+        was written is removed again, the old files stay in effect and OSError is raised.
+        """
+        if layout not in ("sharded", "flat"):
+            raise ValueError(f"Unknown layout {layout!r}. Expected sharded or flat.")
+        reset_state()
+        load_all()
+        was_sharded = ShardStore.enabled()
+        if layout == "sharded":
+            ShardStore._digests, ShardStore._manifest = {}, {"shards": {}}
+            if not ShardStore.save():
+                if not was_sharded:
+                    shutil.rmtree(os.path.join(SAVE_FOLDER, ShardStore.FOLDER), ignore_errors=True)
+                    ShardStore._digests, ShardStore._manifest = {}, None
+                raise OSError(f"Could not write the sharded layout to {SAVE_FOLDER}; the old files were kept.")
+            ShardStore._remove_files(ShardStore.FILES)
+        else:
+            saved = [EnrollmentManager.save_enrollments(), AssignmentManager.save_assignments(),
+                     GradeManager.save_grades()]
+            if not all(saved):
+                if was_sharded:
+                    ShardStore._remove_files(ShardStore.FILES)
+                raise OSError(f"Could not write the flat layout to {SAVE_FOLDER}; the old files were kept.")
+            shutil.rmtree(os.path.join(SAVE_FOLDER, ShardStore.FOLDER), ignore_errors=True)
+            ShardStore._digests, ShardStore._manifest = {}, None
+
+    @staticmethod
+    def _remove_files(filenames):
+        """Removes every variant (plain, .gz, .xz) of the given data files."""
+        for filename in filenames:
+            for suffix in COMPRESSION_SUFFIXES.values():
+                if os.path.exists(os.path.join(SAVE_FOLDER, filename + suffix)):
+                    os.remove(os.path.join(SAVE_FOLDER, filename + suffix))
+
+
+def rebuild_indexes():
+    """Recomputes every index from the registries, e.g. after a rollback."""
+    UserManager._users_by_id = {}
+    UserManager._user_positions = {id(user): index for index, user in enumerate(UserManager._users)}
+    for user in UserManager._users:
+        UserManager._users_by_id.setdefault(getattr(user, "_id", None), user)
+    CourseManager._courses_by_id = {}
+    CourseManager._course_positions = {id(course): index for index, course in enumerate(CourseManager._courses)}
+    for course in CourseManager._courses:
+        CourseManager._courses_by_id.setdefault(course._course_id, course)
+
+    enrollments, EnrollmentManager._enrollments = EnrollmentManager._enrollments, []
+    EnrollmentManager._enrollments_by_id, EnrollmentManager._enrollment_positions = {}, {}
+    EnrollmentManager._enrollments_by_student, EnrollmentManager._enrollments_by_course = {}, {}
+    for enrollment in enrollments:
+        EnrollmentManager._add_enrollment(enrollment)
+
+    assignments, AssignmentManager._assignments = AssignmentManager._assignments, []
+    AssignmentManager._assignments_by_id, AssignmentManager._assignments_by_course = {}, {}
+    AssignmentManager._submissions_by_student, AssignmentManager._assignment_positions = {}, {}
+    for assignment in assignments:
+        AssignmentManager._add_assignment(assignment)
+
+    grades, GradeManager._grades = GradeManager._grades, []
+    GradeManager._grades_by_course, GradeManager._grades_by_student = {}, {}
+    GradeManager._grade_positions = {}
+    GradeManager._add_grades(grades)
+
+
+def open_dataset(path):
+    """Switches the process to another, isolated data folder and loads it."""
+    reset_state()
+    set_data_folder(path)
+    load_all()
+
+
+class HotReloader:
+    """
+    Picks up data files edited by other programs while this process runs. A poll compares each
+    data file's (path, inode, mtime, size) with the version last read or written here; a changed
+    file is decoded and its records are diffed, by ID, against per-record fingerprints of that
+    version. Only the records the other program added, changed or removed are applied, through
+    the managers' indexes, so records changed here but not yet saved are kept unless the other
+    program changed the same record (its version wins). Applied records already equal to the
+    in-memory ones are skipped.
+
+    watch() polls from a daemon thread; poll() can also be called directly. Not available with a
+    RecordStore open.
+    """
+    KEYS = {"users": "id", "courses": "course_id", "enrollments": "enrollment_id",
+            "assignments": "assignment_id", "grades": "grade_id"}
+    FILES = ("users.json", "courses.json", "enrollments.json", "assignments.json", "grades.json", "notifications.json")
+    INTERVAL = 1.0
+
+    _baselines = None  # filename -> {(collection, record ID): fingerprint}; None while not watching
+    _signatures = {}  # filename -> (path, inode, mtime_ns, size) of the version in _baselines
+    _io_lock = threading.RLock()  # orders polls against this process's own saves
+    _thread = None
+    _stop = None
+
+    @staticmethod
+    def watching():
+        return HotReloader._baselines is not None
+
+    @staticmethod
+    def _is_data_file(filename):
+        if filename in HotReloader.FILES:
+            return True
+        folder, name = os.path.split(filename)
+        return folder == ShardStore.FOLDER and name != ShardStore.MANIFEST
+
+    @staticmethod
+    def _data_files():
+        """The data files currently in use, shard files included."""
+        if not ShardStore.enabled():
+            return list(HotReloader.FILES)
+        filenames = ["users.json", "courses.json", "notifications.json"]
+        with os.scandir(os.path.join(SAVE_FOLDER, ShardStore.FOLDER)) as entries:
+            for entry in entries:
+                for suffix in COMPRESSION_SUFFIXES.values():
+                    if entry.name.endswith(".json" + suffix):
+                        filename = os.path.join(ShardStore.FOLDER, entry.name[:len(entry.name) - len(suffix)])
+                        if HotReloader._is_data_file(filename) and filename not in filenames:
+                            filenames.append(filename)
+        return filenames
+
+    @staticmethod
+    def _signature(filepath):
+        stat = os.stat(filepath)
+        return filepath, stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _records(filename, data):
+        """Yields ((collection, record ID), row) for every record of a decoded data file."""
+        if filename == "notifications.json":
+            for user_id, inbox in (data or {}).items():
+                yield ("notifications", user_id), inbox
+            return
+        if os.path.dirname(filename) == ShardStore.FOLDER:
+            sections = data.items() if isinstance(data, dict) else ()
+        else:
+            sections = [(filename[:-len(".json")], data)]
+        for collection, rows in sections:
+            key = HotReloader.KEYS.get(collection)
+            if key is not None:
+                for row in rows or ():
+                    yield (collection, row[key]), row
+
+    @staticmethod
+    def _fingerprint(row):
+        # repr is much cheaper than re-encoding and just as stable for rows decoded from JSON
+        return hash(repr(row))
+
+    @staticmethod
+    def _fingerprints(filename, data):
+        fingerprint = HotReloader._fingerprint
+        return {record: fingerprint(row) for record, row in HotReloader._records(filename, data)}
+
+    @staticmethod
+    def track():
+        """Records the current version of every data file as the baseline later changes are diffed against."""
+        with HotReloader._io_lock:
+            HotReloader._baselines, HotReloader._signatures = {}, {}
+            for filename in HotReloader._data_files():
+                filepath = _data_path(filename)
+                if filepath is not None:
+                    try:
+                        signature = HotReloader._signature(filepath)
+                        HotReloader._baselines[filename] = HotReloader._fingerprints(filename, _read_json(filepath))
+                        HotReloader._signatures[filename] = signature
+                    except (OSError, ValueError, EOFError, lzma.LZMAError) as e:
+                        logger.warning("Not tracking %s for now: %s", filename, e)
+
+    @staticmethod
+    def watch(interval=None):
+        """
+        Starts polling the data files every interval seconds (recording their current version
+        first unless that is already tracked). Returns False (and does nothing) when a RecordStore is open.
+        """
+        if RecordStore.active():
+            logger.warning("Hot reload is not available while the record store is open.")
+            return False
+        ensure_loaded()
+        HotReloader.stop()
+        if not HotReloader.watching():
+            HotReloader.track()
+        HotReloader._stop = threading.Event()
+        HotReloader._thread = threading.Thread(
+            target=HotReloader._run, args=(HotReloader._stop, interval or HotReloader.INTERVAL),
+            name="hot-reload", daemon=True)
+        HotReloader._thread.start()
+        return True
+
+    @staticmethod
+    def stop():
+        """Stops polling. Outside shared access (see SharedAccess) the recorded versions are forgotten too."""
+        if HotReloader._thread is not None:
+            HotReloader._stop.set()
+            HotReloader._thread.join()
+            HotReloader._thread = HotReloader._stop = None
+        if not SharedAccess.enabled():
+            with HotReloader._io_lock:
+                HotReloader._baselines, HotReloader._signatures = None, {}
+
+    @staticmethod
+    def _run(stop, interval):
+        while not stop.wait(interval):
+            try:
+                HotReloader.poll()
+            except Exception:
+                logger.exception("Hot reload poll failed.")
+
+    @staticmethod
+    def _saved(filename, filepath, payload):
+        """Called by save_json_text under _io_lock: this process's own write is the new baseline."""
+        if HotReloader._baselines is None or not HotReloader._is_data_file(filename):
+            return
+        HotReloader._baselines[filename] = HotReloader._fingerprints(filename, json.loads(payload))
+        HotReloader._signatures[filename] = HotReloader._signature(filepath)
+        SharedAccess._written.add(filename)
+
+    @staticmethod
+    def poll():
+        """
+        Applies the records changed in data files since their last recorded version. Files that
+        are missing or cannot be decoded yet (e.g. half-written) are retried on the next poll.
+        Returns the number of records applied.
+        """
+        applied, cascaded = HotReloader._poll()
+        if cascaded:
+            SaveScheduler.mark_dirty(*SaveScheduler.COLLECTIONS)  # the removals cascade into the other files
+        return applied
+
+    @staticmethod
+    def _registry(collection):
+        """Record ID -> in-memory record (inbox for notifications) of a collection."""
+        if collection == "users":
+            return UserManager._users_by_id
+        if collection == "courses":
+            return CourseManager._courses_by_id
+        if collection == "enrollments":
+            return EnrollmentManager._enrollments_by_id
+        if collection == "assignments":
+            return AssignmentManager._assignments_by_id
+        if collection == "grades":
+            return {g._grade_id: g for g in GradeManager._grades}
+        return NotificationManager._inboxes
+
+    @staticmethod
+    def _poll(prefer="theirs"):
+        """
+        poll() without scheduling saves; returns (records applied, whether user or course removals
+        cascaded into other collections). A record changed both in a file and in memory since the
+        baseline is a conflict: prefer="theirs" takes the file's version, "ours" keeps memory's.
+        """
+        with HotReloader._io_lock:
+            if HotReloader._baselines is None:
+                return 0, False
+            upserts = {collection: {} for collection in (*HotReloader.KEYS, "notifications")}
+            removals = {collection: set() for collection in upserts}
+            changed_files = {}
+            registries = {}
+            conflicts = 0
+
+            def changed_here(record, base, theirs):
+                collection, record_id = record
+                if collection not in registries:
+                    registries[collection] = HotReloader._registry(collection)
+                obj = registries[collection].get(record_id)
+                ours = None if obj is None else HotReloader._fingerprint(obj.to_dict())
+                return ours != base and ours != theirs
+
+            for filename in HotReloader._data_files():
+                filepath = _data_path(filename)
+                if filepath is None:
+                    continue
+                try:
+                    signature = HotReloader._signature(filepath)
+                    if signature == HotReloader._signatures.get(filename):
+                        continue
+                    data = _read_json(filepath)
+                except (OSError, ValueError, EOFError, lzma.LZMAError) as e:
+                    logger.debug("Skipping %s until the next poll: %s", filename, e)
+                    continue
+                baseline = HotReloader._baselines.get(filename, {})
+                fingerprints = {}
+                for record, row in HotReloader._records(filename, data):
+                    fingerprints[record] = fingerprint = HotReloader._fingerprint(row)
+                    if baseline.get(record) != fingerprint:
+                        if prefer == "ours" and changed_here(record, baseline.get(record), fingerprint):
+                            conflicts += 1
+                            continue
+                        upserts[record[0]][record[1]] = row
+                for record in baseline.keys() - fingerprints.keys():
+                    if prefer == "ours" and changed_here(record, baseline[record], None):
+                        conflicts += 1
+                        continue
+                    removals[record[0]].add(record[1])
+                changed_files[filename] = (fingerprints, signature)
+            if not changed_files:
+                return 0, False
+            for collection, records in upserts.items():
+                removals[collection] -= records.keys()  # moved to another shard, not removed
+            applied, cascaded = HotReloader._apply(upserts, removals)
+            for filename, (fingerprints, signature) in changed_files.items():
+                HotReloader._baselines[filename] = fingerprints
+                HotReloader._signatures[filename] = signature
+        if conflicts:
+            logger.warning("%d records were changed both here and in %s; kept this process's version.",
+                           conflicts, ", ".join(sorted(changed_files)))
+        if applied:
+            logger.info("Applied %d records changed in %s.", applied, ", ".join(sorted(changed_files)))
+        return applied, cascaded
+
+    @staticmethod
+    def _unchanged(obj, row):
+        return obj is not None and obj.to_dict() == row
+
+    @staticmethod
+    def _copy_fields(target, source):
+        """Copies the plain (non-reference) persisted fields of source onto target."""
+        for _, attr, kind, _ in type(target)._FIELDS:
+            if kind in ("value", "optional"):
+                setattr(target, attr, getattr(source, attr))
+
+    @staticmethod
+    def _apply(upserts, removals):
+        """
+        Applies record changes in dependency order. Returns (records applied, whether user or
+        course removals cascaded into other collections).
+        """
+        user_types = {"Student": Student, "Instructor": Instructor, "Admin": PlatformAdmin}
+        with log_phase("hot_reload", warn_on=("skipped", "unknown_type")) as counters, LockManager.exclusive():
+            users_by_id = UserManager._users_by_id
+            assigned_course_ids = []
+            for user_id, row in upserts["users"].items():
+                user, cls = users_by_id.get(user_id), user_types.get(row.get("type"))
+                if cls is None:
+                    counters["unknown_type"] += 1
+                    continue
+                if HotReloader._unchanged(user, row):
+                    continue
+                if user is not None and type(user) is not cls:
+                    UserManager.remove_users([user_id])
+                    user = None
+                if user is None:
+                    UserManager._add_user(cls.from_dict(row))
+                    counters["users_added"] += 1
+                else:
+                    HotReloader._copy_fields(user, cls.from_dict(row))
+                    counters["users_changed"] += 1
+                if cls is Instructor:
+                    assigned_course_ids.append((users_by_id[user_id], row.get("assigned_courses", [])))
+
+            for course_id, row in upserts["courses"].items():
+                course = CourseManager._courses_by_id.get(course_id)
+                if HotReloader._unchanged(course, row):
+                    continue
+                if course is None:
+                    course = Course.from_dict(row)
+                    add_to_registry(CourseManager._courses, CourseManager._course_positions, course)
+                    CourseManager._courses_by_id[course_id] = course
+                    counters["courses_added"] += 1
+                else:
+                    instructor, listed = course._instructor, set(row["enrolled_students"])
+                    if instructor and instructor._id != row["instructor"] and course in instructor._assigned_courses:
+                        instructor._assigned_courses.remove(course)
+                    course._instructor = None
+                    for student in course._enrolled_students:
+                        if student._id not in listed and course in student._enrolled_courses:
+                            student._enrolled_courses.remove(course)
+                    HotReloader._copy_fields(course, Course.from_dict(row))
+                    counters["courses_changed"] += 1
+                CourseManager._link_course(course, row, users_by_id)
+
+            for instructor, course_ids in assigned_course_ids:
+                linked = [course for course in map(CourseManager._courses_by_id.get, course_ids) if course]
+                instructor._assigned_courses = list(dict.fromkeys(
+                    linked + [course for course in instructor._assigned_courses if course._instructor is instructor]))
+
+            leaves = (
+                ("enrollments", EnrollmentManager._discard_enrollments, EnrollmentManager._link_enrollments),
+                ("assignments", AssignmentManager._discard_assignments, AssignmentManager._link_assignments),
+                ("grades", GradeManager._discard_grades, GradeManager._link_grades),
+            )
+            for collection, discard, link in leaves:
+                if not upserts[collection] and not removals[collection]:
+                    continue
+                existing = dict(HotReloader._registry(collection))
+                rows = [row for record_id, row in upserts[collection].items()
+                        if not HotReloader._unchanged(existing.get(record_id), row)]
+                removed = [existing[record_id] for record_id in removals[collection] if record_id in existing]
+                discard([existing[row[HotReloader.KEYS[collection]]] for row in rows
+                         if row[HotReloader.KEYS[collection]] in existing] + removed)
+                link(rows, counters)
+                counters[f"{collection}_applied"] += len(rows) + len(removed)
+
+            removed_courses = CourseManager.remove_courses(removals["courses"])
+            removed_users = UserManager.remove_users(removals["users"])
+            counters["courses_removed"], counters["users_removed"] = len(removed_courses), len(removed_users)
+
+        with NotificationManager._lock:
+            for user_id, inbox in upserts["notifications"].items():
+                NotificationManager._inboxes[user_id] = NotificationInbox.from_dict(
+                    inbox, NotificationManager.INBOX_CAPACITY)
+            for user_id in removals["notifications"]:
+                NotificationManager._inboxes.pop(user_id, None)
+
+        applied = sum(count for name, count in counters.items() if name.endswith(("_added", "_changed", "_applied", "_removed")))
+        applied += len(upserts["notifications"]) + len(removals["notifications"])
+        return applied, bool(removed_courses or removed_users)
+
+
+class SharedAccess:
+    """
+    Lets several processes (e.g. staff sessions) work on one data folder at once without lost
+    updates. Each process still loads everything and saves whole files, but:
+      - loads and saves hold an fcntl advisory lock on SAVE_FOLDER/.lock (shared for loading,
+        exclusive for saving), so no process reads a half-finished round of saves;
+      - versions.json keeps a version stamp per data file, bumped by every save;
+      - a save first compares the stamps with those this process last saw. If another process
+        saved meanwhile, its records are merged in first: HotReloader diffs the files against the
+        versions this process last read or wrote and applies the other process's changes unless
+        the same record was changed here too, in which case this process's version wins.
+    Only the merge-then-write step is serialized; sessions otherwise run independently. Without
+    fcntl (Windows) the lock is skipped and the stamps alone detect conflicting saves.
+    Enable it before the data is loaded; loading then also records the per-record baselines.
+    """
+    LOCK_FILE = ".lock"
+    VERSIONS = "versions.json"
+
+    _enabled = False
+    _guard = threading.RLock()  # the flock is per process; threads take turns holding it
+    _depth = 0
+    _fd = None
+    _exclusive = False
+    _known = {}  # filename -> version stamp as of this process's last load or save
+    _written = set()  # data files written during the current saving() block
+
+    @staticmethod
+    def enabled():
+        return SharedAccess._enabled
+
+    @staticmethod
+    def enable():
+        """Turns shared access on. Returns False (and does nothing) when a RecordStore is open."""
+        if RecordStore.active():
+            logger.warning("Shared access is not available while the record store is open.")
+            return False
+        SharedAccess._enabled = True
+        if _loaded:
+            with SharedAccess.locked(exclusive=False):
+                HotReloader.track()
+                SharedAccess._known = SharedAccess._read_versions()
+        return True
+
+    @staticmethod
+    @contextmanager
+    def locked(exclusive=True):
+        """Holds the data folder's advisory lock, shared or exclusive, across processes (re-entrant)."""
+        if not SharedAccess._enabled or fcntl is None:
+            yield
+            return
+        with SharedAccess._guard:
+            if SharedAccess._depth == 0:
+                _ensure_save_folder()
+                fd = os.open(os.path.join(SAVE_FOLDER, SharedAccess.LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                SharedAccess._fd, SharedAccess._exclusive = fd, exclusive
+            elif exclusive and not SharedAccess._exclusive:
+                fcntl.flock(SharedAccess._fd, fcntl.LOCK_EX)  # upgraded until the outermost block ends
+                SharedAccess._exclusive = True
+            SharedAccess._depth += 1
+            try:
+                yield
+            finally:
+                SharedAccess._depth -= 1
+                if SharedAccess._depth == 0:
+                    fcntl.flock(SharedAccess._fd, fcntl.LOCK_UN)
+                    os.close(SharedAccess._fd)
+                    SharedAccess._fd = None
+
+    @staticmethod
+    def _read_versions():
+        try:
+            return load_json(SharedAccess.VERSIONS) or {}
+        except DataFileError as e:
+            logger.warning("Ignoring the version stamps: %s", e)  # every file then counts as changed elsewhere
+            return {}
+
+    @staticmethod
+    @contextmanager
+    def loading():
+        """Wraps load_all(): holds the lock shared and records the baselines and version stamps."""
+        with SharedAccess.locked(exclusive=False):
+            yield
+            if SharedAccess._enabled and not RecordStore.active():
+                HotReloader.track()
+                SharedAccess._known = SharedAccess._read_versions()
+
+    @staticmethod
+    @contextmanager
+    def saving():
+        """
+        Wraps a round of saves: holds the lock exclusively, merges other processes' saves first if
+        the stamps moved, and bumps the stamps of the files written. Yields whether the merge
+        removed users or courses (their removal cascades, so every collection must be written).
+        """
+        if not SharedAccess._enabled:
+            yield False
+            return
+        with SharedAccess.locked():
+            versions = SharedAccess._read_versions()
+            cascaded = False
+            if versions != SharedAccess._known:
+                with log_phase("merge") as counters:
+                    counters["applied"], cascaded = HotReloader._poll(prefer="ours")
+            SharedAccess._written = set()
+            try:
+                yield cascaded
+            finally:
+                if SharedAccess._written:
+                    for filename in SharedAccess._written:
+                        versions[filename] = versions.get(filename, 0) + 1
+                    save_json(SharedAccess.VERSIONS, versions)
+                    SharedAccess._written = set()
+                SharedAccess._known = versions
+
+
+class TenantManager:
+    """
+    Serves several institutions (tenants) from one process. Each tenant has its own data folder,
+    ROOT/<tenant ID>. The managers keep their state at class level, so one tenant is active at a
+    time: use(tenant_id) installs that tenant's state (see _tenant_attributes) and any number of
+    threads may work inside use() blocks of the active tenant at once. Switching to another tenant
+    waits for them to leave, flushes pending saves, and keeps the outgoing tenant's state in a
+    cache of at most CAPACITY loaded tenants (least recently used evicted first), so switching
+    back does not reload its files. A tenant changed since it was loaded is saved to its own
+    folder before it is evicted; if that save fails it stays cached and is tried again on the next
+    eviction. save_all() saves every changed tenant, cached or active, and runs at exit once a
+    tenant was used. The state present before the first switch is kept under the tenant ID None.
+    Not available with a RecordStore open.
+    """
+    ROOT = os.environ.get("CASESTUDY3_TENANTS") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants")
+    CAPACITY = max(1, int(os.environ.get("CASESTUDY3_TENANT_CACHE", "8")))
+    EXIT_TIMEOUT = 10.0  # seconds the exit hook waits for use() blocks still running
+    _ID_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]*")
+
+    _condition = threading.Condition()
+    _active = None  # tenant whose state is installed in the managers
+    _users = 0  # threads inside use() blocks of the active tenant
+    _switches_waiting = 0
+    _cache = OrderedDict()  # tenant ID -> state captured when it was switched out, oldest first
+    _unsaved = set()  # tenants (cached or active) whose changes may not be written yet
+    _clean_version = None  # LockManager.version() once the active tenant was loaded, restored or saved
+    _exit_hook = False
+    _local = threading.local()
+
+    @staticmethod
+    def configure(root=None, capacity=None):
+        if root is not None:
+            TenantManager.ROOT = os.path.abspath(root)
+        if capacity is not None:
+            TenantManager.CAPACITY = max(1, capacity)
+
+    @staticmethod
+    def folder(tenant_id):
+        """The tenant's data folder. Tenant IDs are letters, digits, '_', '-' and '.' (not leading)."""
+        if not TenantManager._ID_PATTERN.fullmatch(tenant_id or ""):
+            raise ValueError(f"Invalid tenant ID {tenant_id!r}.")
+        return os.path.join(TenantManager.ROOT, tenant_id)
+
+    @staticmethod
+    def active():
+        return TenantManager._active
+
+    @staticmethod
+    def cached():
+        """IDs of the tenants kept loaded besides the active one, least recently used first."""
+        with TenantManager._condition:
+            return list(TenantManager._cache)
+
+    @staticmethod
+    @contextmanager
+    def use(tenant_id):
+        """Runs the block against the tenant's data, loading or restoring it first if needed."""
+        folder = TenantManager.folder(tenant_id) if tenant_id is not None else None
+        inside = getattr(TenantManager._local, "stack", None)
+        if inside is None:
+            inside = TenantManager._local.stack = []
+        if inside and inside[-1] != tenant_id:
+            raise RuntimeError(f"Cannot switch to tenant {tenant_id!r} inside a block of tenant {inside[-1]!r}.")
+        with TenantManager._condition:
+            if not inside:
+                switching = TenantManager._active != tenant_id
+                TenantManager._switches_waiting += switching
+                try:
+                    # Like waiting writers in ReadWriteLock, a pending switch holds back new users
+                    while (TenantManager._users and TenantManager._active != tenant_id) or \
+                            (TenantManager._active == tenant_id and TenantManager._switches_waiting > switching):
+                        TenantManager._condition.wait()
+                finally:
+                    TenantManager._switches_waiting -= switching
+                if TenantManager._active != tenant_id:
+                    TenantManager._switch(tenant_id, folder)
+            TenantManager._users += 1
+            inside.append(tenant_id)
+        try:
+            yield
+        finally:
+            with TenantManager._condition:
+                inside.pop()
+                TenantManager._users -= 1
+                TenantManager._condition.notify_all()
+
+    @staticmethod
+    def _capture():
+        return SAVE_FOLDER, _loaded, [getattr(owner, attribute) for owner, attribute, _ in _tenant_attributes()]
+
+    @staticmethod
+    def _install(state):
+        global SAVE_FOLDER, _loaded
+        SAVE_FOLDER, _loaded, values = state
+        for (owner, attribute, _), value in zip(_tenant_attributes(), values):
+            setattr(owner, attribute, value)
+
+    @staticmethod
+    def _switch(tenant_id, folder):
+        """Swaps the active tenant's state for tenant_id's. The caller holds _condition and no one uses the active tenant."""
+        if RecordStore.active():
+            raise RuntimeError("Tenants cannot be switched while the record store is open.")
+        if not TenantManager._exit_hook:
+            atexit.register(TenantManager.save_all, TenantManager.EXIT_TIMEOUT)
+            TenantManager._exit_hook = True
+        with log_phase("switch_tenant", warn_on=("unsaved",)) as counters:
+            with SaveScheduler._flush_lock:
+                SaveScheduler._flush_pending()  # the outgoing tenant's changes go to its own folder
+                with HotReloader._io_lock, LockManager.exclusive():
+                    outgoing = TenantManager._active
+                    failed = SaveScheduler._take_pending()  # saves that failed belong to the outgoing tenant
+                    TenantManager._note_changes(outgoing, failed)
+                    TenantManager._cache[outgoing] = TenantManager._capture()
+                    state = TenantManager._cache.pop(tenant_id, None)
+                    if state is None:
+                        state = (folder, False, [factory() for _, _, factory in _tenant_attributes()])
+                    for evicted in list(TenantManager._cache):
+                        if len(TenantManager._cache) < TenantManager.CAPACITY:
+                            break
+                        if not TenantManager._save_cached(evicted, counters):
+                            continue
+                        del TenantManager._cache[evicted]
+                        logger.debug("Evicted tenant %s from the cache.", evicted)
+                        counters["evicted"] += 1
+                    TenantManager._install(state)
+                    TenantManager._active = tenant_id
+            counters["restored" if state[1] else "loaded"] += 1
+            ensure_loaded()
+            TenantManager._clean_version = LockManager.version()
+
+    @staticmethod
+    def _note_changes(tenant_id, failed):
+        """Marks the active tenant unsaved if it changed since it was loaded or saved, or has failed saves."""
+        if failed or LockManager.version() != TenantManager._clean_version:
+            TenantManager._unsaved.add(tenant_id)
+
+    @staticmethod
+    def save_all(timeout=None):
+        """
+        Saves every tenant with unsaved changes, cached or active, to its own folder. Waits (at most
+        timeout seconds) for the use() blocks of the active tenant to end first. Tenants whose save
+        fails stay unsaved. Returns whether all were saved.
+        """
+        if RecordStore.active():
+            raise RuntimeError("Tenants cannot be saved while the record store is open.")
+        if getattr(TenantManager._local, "stack", None):
+            raise RuntimeError("Tenants cannot be saved inside a use() block.")
+        with TenantManager._condition:
+            TenantManager._switches_waiting += 1  # holds back new users like a pending switch
+            try:
+                if not TenantManager._condition.wait_for(lambda: not TenantManager._users, timeout):
+                    logger.warning("Tenants not saved: use() blocks were still running.")
+                    return False
+            finally:
+                TenantManager._switches_waiting -= 1
+                TenantManager._condition.notify_all()
+            with log_phase("save_tenants", warn_on=("unsaved",)) as counters:
+                with SaveScheduler._flush_lock:
+                    SaveScheduler._flush_pending()
+                    with HotReloader._io_lock, LockManager.exclusive():
+                        active = TenantManager._active
+                        TenantManager._note_changes(active, SaveScheduler._take_pending())
+                        TenantManager._cache[active] = TenantManager._capture()
+                        try:
+                            saved = True
+                            for tenant_id in list(TenantManager._cache):
+                                saved = TenantManager._save_cached(tenant_id, counters) and saved
+                        finally:
+                            TenantManager._install(TenantManager._cache.pop(active))
+                TenantManager._clean_version = LockManager.version() if active not in TenantManager._unsaved else None
+            return saved
+
     @staticmethod
-    def view_passed_assignments(course, passing_grade=5):
+    def _save_cached(tenant_id, counters):
         """
-        Displays all assignments and the students who passed them in a specific course.
-        Highlights ungraded submissions for the instructor's attention.
+        Saves a cached tenant's unsaved changes to its own folder, e.g. before it is evicted. The
+        caller holds SaveScheduler._flush_lock and the state lock exclusively. Returns whether the
+        tenant has nothing left to save.
         """
-        assignments_for_course = [assignment for assignment in AssignmentManager._assignments if assignment._course == course]
+        folder, loaded, _ = state = TenantManager._cache[tenant_id]
+        if tenant_id not in TenantManager._unsaved or not loaded:
+            TenantManager._unsaved.discard(tenant_id)
+            return True
+        TenantManager._install(state)
+        saved = SaveScheduler._save(SaveScheduler.COLLECTIONS, counters)
+        SaveScheduler._take_pending()  # failures are not retried in another tenant's folder
+        TenantManager._cache[tenant_id] = TenantManager._capture()  # keeps what the save recorded
+        if not saved:
+            logger.warning("Could not save tenant %s to %s; it stays unsaved.", tenant_id, folder)
+            counters["unsaved"] += 1
+            return False
+        TenantManager._unsaved.discard(tenant_id)
+        counters["saved"] += 1
+        return True
+
+
+class IntegrityChecker:
+    """
+    Checks every cross-file reference in the five data files (fsck).
+    Each file is read once and IDs are looked up in hash indexes, so the check is linear in the
+    number of rows. courses.json is taken as the source of truth for rosters and instructors, as
+    the loaders do. With repair=True dangling references, duplicate rows and user links that
+    disagree with courses.json are removed or corrected and the changed files are rewritten.
+    Run it on the files while no session is using them; already loaded data is not updated.
+    """
+    FILES = ("users.json", "courses.json", "enrollments.json", "assignments.json", "grades.json")
 
-        if not assignments_for_course:
-            print(f"No assignments found for course: {course._name}")
-            return
+    @staticmethod
+    def check(repair=False):
+        """
+        Returns {"issues": [{"file", "record", "problem", "reference"}, ...], "counts": {problem: n},
+        "repaired": [rewritten files], "failed": [files that needed repair but could not be written]}.
+        """
+        issues = []
+        changed = set()
+
+        def report(filename, record, problem, reference=None, repairable=True):
+            issues.append({"file": filename, "record": record, "problem": problem, "reference": reference})
+            if repairable:
+                changed.add(filename)
+
+        def unique(filename, rows, key):
+            """Indexes rows by key, reporting (and dropping) rows whose key was already seen."""
+            index = {}
+            for row in rows:
+                if row.get(key) in index:
+                    report(filename, row.get(key), "duplicate record")
+                else:
+                    index[row.get(key)] = row
+            return index
+
+        def valid_references(filename, record, ids, exists, problem):
+            """Returns the IDs that pass exists(), reporting the others."""
+            valid = []
+            for referenced_id in ids:
+                if exists(referenced_id):
+                    valid.append(referenced_id)
+                else:
+                    report(filename, record, problem, referenced_id)
+            return valid
+
+        with log_phase("fsck", warn_on=("issues", "failed_files")) as counters:
+            data = {filename: ShardStore.read_rows(filename) for filename in IntegrityChecker.FILES}
+            users = unique("users.json", data["users.json"], "id")
+            courses = unique("courses.json", data["courses.json"], "course_id")
+            user_types = {user_id: user.get("type") for user_id, user in users.items()}
+
+            def is_student(user_id):
+                return user_types.get(user_id) == "Student"
+
+            def is_instructor(user_id):
+                return user_types.get(user_id) == "Instructor"
+
+            # Reverse indexes built from courses.json: user ID -> course IDs, in course order
+            courses_of_student = {}
+            courses_of_instructor = {}
+            for course_id, course in courses.items():
+                if course.get("instructor") and not is_instructor(course["instructor"]):
+                    report("courses.json", course_id, "unknown instructor", course["instructor"])
+                    course["instructor"] = None
+                if course.get("instructor"):
+                    courses_of_instructor.setdefault(course["instructor"], []).append(course_id)
+
+                students = valid_references("courses.json", course_id, course.get("enrolled_students", []),
+                                            is_student, "unknown student")
+                course["enrolled_students"] = list(dict.fromkeys(students))
+                if len(course["enrolled_students"]) != len(students):
+                    report("courses.json", course_id, "student listed twice")
+                for student_id in course["enrolled_students"]:
+                    courses_of_student.setdefault(student_id, []).append(course_id)
+
+            for user_id, user in users.items():
+                if user.get("type") == "Student":
+                    field, expected = "enrolled_courses", courses_of_student.get(user_id, [])
+                elif user.get("type") == "Instructor":
+                    field, expected = "assigned_courses", courses_of_instructor.get(user_id, [])
+                else:
+                    if user.get("type") != "Admin":
+                        report("users.json", user_id, "unknown user type", user.get("type"), repairable=False)
+                    continue
+
+                listed = valid_references("users.json", user_id, user.get(field, []), courses.__contains__,
+                                          "unknown course")
+                expected_set = set(expected)
+                for course_id in listed:
+                    if course_id not in expected_set:
+                        report("users.json", user_id, f"{field} lists a course that does not list this user", course_id)
+                listed_set = set(listed)
+                for course_id in expected:
+                    if course_id not in listed_set:
+                        report("users.json", user_id, f"{field} is missing a course that lists this user", course_id)
+                user[field] = expected
+
+            enrollments = unique("enrollments.json", data["enrollments.json"], "enrollment_id")
+            for enrollment_id, enrollment in list(enrollments.items()):
+                if not is_student(enrollment.get("student_id")):
+                    report("enrollments.json", enrollment_id, "unknown student", enrollment.get("student_id"))
+                    del enrollments[enrollment_id]
+                elif enrollment.get("course_id") not in courses:
+                    report("enrollments.json", enrollment_id, "unknown course", enrollment.get("course_id"))
+                    del enrollments[enrollment_id]
+
+            assignments = unique("assignments.json", data["assignments.json"], "assignment_id")
+            for assignment_id, assignment in list(assignments.items()):
+                if assignment.get("course_id") not in courses:
+                    report("assignments.json", assignment_id, "unknown course", assignment.get("course_id"))
+                    del assignments[assignment_id]
+                    continue
+                if "max_grade" not in assignment:
+                    report("assignments.json", assignment_id, "missing max_grade", repairable=False)
+                for field in ("submitted_students", "graded_students"):
+                    entries = assignment.get(field, {})
+                    valid = valid_references("assignments.json", assignment_id, entries, is_student, "unknown student")
+                    assignment[field] = {student_id: entries[student_id] for student_id in valid}
+                for student_id in assignment["graded_students"]:
+                    if student_id not in assignment["submitted_students"]:
+                        report("assignments.json", assignment_id, "graded without a submission", student_id,
+                               repairable=False)
+
+            grades = unique("grades.json", data["grades.json"], "grade_id")
+            for grade_id, grade in list(grades.items()):
+                if not is_student(grade.get("student_id")):
+                    report("grades.json", grade_id, "unknown student", grade.get("student_id"))
+                    del grades[grade_id]
+                elif grade.get("course_id") not in courses:
+                    report("grades.json", grade_id, "unknown course", grade.get("course_id"))
+                    del grades[grade_id]
+
+            counters["rows"] = sum(len(rows) for rows in data.values())
+            counters["issues"] = len(issues)
+
+            repaired, failed = [], []
+            if repair:
+                rebuilt = {
+                    "users.json": users, "courses.json": courses, "enrollments.json": enrollments,
+                    "assignments.json": assignments, "grades.json": grades,
+                }
+                for filename in IntegrityChecker.FILES:
+                    if filename in changed:
+                        written = ShardStore.write_rows(filename, list(rebuilt[filename].values()))
+                        (repaired if written else failed).append(filename)
+                counters["repaired_files"] = len(repaired)
+                counters["failed_files"] = len(failed)
 
-        print(f"\n--- Passed Assignments for Course: {course._name} ---")
-        print(f"Course ID: {course._course_id}, Course Name: {course._name}\n")
+        return {
+            "issues": issues,
+            "counts": dict(Counter(issue["problem"] for issue in issues)),
+            "repaired": repaired,
+            "failed": failed,
+        }
 
-        for assignment in assignments_for_course:
-            print(f"Assignment ID: {assignment._assignment_id}, Description: {assignment._description}")
 
-            # Identify passed students
-            passed_students = [student for student, grade in assignment._graded_students.items() if grade is not None and grade >= passing_grade]
+class BatchError(ValueError):
+    """Raised by a batch operation that cannot be applied."""
 
-            # Identify ungraded students
-            ungraded_students = [student for student in assignment._submitted_students.keys() if student not in assignment._graded_students]
 
-            if ungraded_students:
-                print("\nWarning: The following students have submitted but not yet been graded:")
-                for student in ungraded_students:
-                    print(f"Student Name: {student._first_name} {student._last_name}")
+class BatchProcessor:
+    """
+    Applies scripted operations without any prompts.
+    Each operation is a JSON object with an "op" field, e.g.
+        {"op": "enroll", "student_id": "STU-24-339058", "course_id": "CRS-859a31", "payment_method": "GCash"}
+    The data is loaded once, every operation is applied in order, and everything is saved once
+    at the end. Failing operations are reported and skipped.
+    """
 
-            if not passed_students:
-                print("\nNo students passed this assignment.\n")
-            else:
-                print("\nPassed Students:")
-                for student in passed_students:
-                    print(f"Student Name: {student._first_name} {student._last_name}")
-                print()
-    
     @staticmethod
-    def view_all_assignments(course, student=None):
-        """
-        Displays all assignments for a specific course and optionally shows the passing status for a student.
-        """
-        assignments_for_course = [
-            assignment for assignment in AssignmentManager._assignments if assignment._course == course
-        ]
-        if not assignments_for_course:
-            print(f"No assignments found for course: {course._name}")
-            return
+    def _require(operation, *fields):
+        missing = [field for field in fields if field not in operation]
+        if missing:
+            raise BatchError(f"Missing field(s): {', '.join(missing)}.")
+        return [operation[field] for field in fields]
 
-        print(f"\n--- Assignments for Course: {course._name} ---")
-        for assignment in assignments_for_course:
-            if student:
-                passed_status = (
-                    "Passed" if student in assignment._graded_students and assignment._graded_students[student] >= 5 else "Not Passed"
-                )
-                print(
-                    f"Assignment ID: {assignment._assignment_id}, Due Date: {assignment._due_date}, "
-                    f"Passed: {passed_status}, Description: {assignment._description}"
-                )
-            else:
-                print(
-                    f"Assignment ID: {assignment._assignment_id}, Due Date: {assignment._due_date}, "
-                    f"Description: {assignment._description}"
-                )
-    
     @staticmethod
-    def list_assignments_for_student(student, course):
-        """
-        List all assignments for a given student in a specific course.
-        """
-        # Filter assignments for the specified course
-        assignments_for_course = [
-            assignment for assignment in AssignmentManager._assignments
-            if assignment._course == course
-        ]
+    def _course(course_id):
+        course = CourseManager.get_course_by_id(course_id)
+        if not course:
+            raise BatchError(f"Course {course_id} not found.")
+        return Transaction.journal(course)
 
-        if not assignments_for_course:
-            print(f"No assignments found for the course: {course._name}")
-            return
+    @staticmethod
+    def _user(user_id, user_type):
+        user = UserManager.find_user_by_id(user_id)
+        if not isinstance(user, user_type):
+            raise BatchError(f"{user_type.__name__} {user_id} not found.")
+        return Transaction.journal(user)
 
-        print(f"\n--- Assignments for {student._first_name} {student._last_name} in Course: {course._name} ---")
-        for assignment in assignments_for_course:
-            status = "Submitted" if student in assignment._submitted_students else "Not Submitted"
-            grade = assignment._graded_students.get(student, "Not Graded")
-            print(
-                f"Assignment ID: {assignment._assignment_id}\n"
-                f"Description: {assignment._description}\n"
-                f"Due Date: {assignment._due_date}\n"
-                f"Submission Status: {status}\n"
-                f"Grade: {grade}\n"
-            )
+    @staticmethod
+    def _enrollment(enrollment_id):
+        enrollment = EnrollmentManager.get_enrollment_by_id(enrollment_id)
+        if not enrollment:
+            raise BatchError(f"Enrollment {enrollment_id} not found.")
+        # Approving also updates the course roster and the student's course list
+        Transaction.journal(enrollment._course)
+        Transaction.journal(enrollment._student)
+        return Transaction.journal(enrollment)
 
     @staticmethod
-    def load_assignments():
-        """
-        Load assignments from JSON and link courses, students, and grades.
-        """
-        assignments_data = load_json("assignments.json")
-        for assignment_data in assignments_data:
-            course = CourseManager.get_course_by_id(assignment_data["course_id"])
-            if not course:
-                print(f"WARNING: Skipping assignment {assignment_data['assignment_id']} due to missing course.")
-                continue
+    def _assignment(assignment_id):
+        assignment = AssignmentManager.get_assignment_by_id(assignment_id)
+        if not assignment:
+            raise BatchError(f"Assignment {assignment_id} not found.")
+        return Transaction.journal(assignment)
 
-            if "max_grade" not in assignment_data:
-                print(f"ERROR: Assignment {assignment_data['assignment_id']} is missing 'max_grade'. Skipping.")
-                continue
+    # Operations
 
-            assignment = Assignment.from_dict(assignment_data, course)
+    @staticmethod
+    def create_course(operation):
+        name, start_date, end_date, description, capacity = BatchProcessor._require(
+            operation, "name", "start_date", "end_date", "description", "capacity"
+        )
+        course = CourseManager.create_course(name, start_date, end_date, description, int(capacity))
+        return {"course_id": course._course_id}
 
-            # Link submitted students
-            assignment._submitted_students = {
-                UserManager.find_user_by_id(student_id): status
-                for student_id, status in assignment_data["submitted_students"].items()
-                if UserManager.find_user_by_id(student_id)
-            }
+    @staticmethod
+    def assign_instructor(operation):
+        course_id, instructor_id = BatchProcessor._require(operation, "course_id", "instructor_id")
+        course = BatchProcessor._course(course_id)
+        instructor = BatchProcessor._user(instructor_id, Instructor)
+        if course._instructor:
+            raise BatchError(f"Course {course_id} already has an assigned instructor.")
+        course.assign_instructor(instructor)
+        Transaction.journal_mapping(CourseManager._applications)
+        CourseManager._applications[course._course_id] = []
+        return {}
 
-            # Link graded students
-            assignment._graded_students = {
-                UserManager.find_user_by_id(student_id): grade
-                for student_id, grade in assignment_data["graded_students"].items()
-                if UserManager.find_user_by_id(student_id)
-            }
+    @staticmethod
+    def enroll(operation):
+        student_id, course_id = BatchProcessor._require(operation, "student_id", "course_id")
+        student = BatchProcessor._user(student_id, Student)
+        course = BatchProcessor._course(course_id)
+        enrollment = EnrollmentManager.create_enrollment(student, course, operation.get("payment_method", ""))
+        if not enrollment:
+            raise BatchError(f"Student {student_id} already has an enrollment in course {course_id}.")
+        return {"enrollment_id": enrollment._enrollment_id, "payment_status": enrollment._payment_status}
+
+    @staticmethod
+    def _pending_enrollment(operation):
+        (enrollment_id,) = BatchProcessor._require(operation, "enrollment_id")
+        enrollment = BatchProcessor._enrollment(enrollment_id)
+        if enrollment._enrollment_status != "Pending":
+            raise BatchError(f"Enrollment {enrollment_id} is already {enrollment._enrollment_status.lower()}.")
+        return enrollment
+
+    @staticmethod
+    def approve(operation):
+        enrollment = BatchProcessor._pending_enrollment(operation)
+        if not enrollment.approve():  # the capacity is checked under the course lock
+            raise BatchError(f"Course {enrollment._course._course_id} is full.")
+        return {}
 
-            AssignmentManager._assignments.append(assignment)
+    @staticmethod
+    def decline(operation):
+        BatchProcessor._pending_enrollment(operation).decline()
+        return {}
 
+    @staticmethod
+    def add_assignment(operation):
+        course_id, assignment_id, due_date, description, max_grade = BatchProcessor._require(
+            operation, "course_id", "assignment_id", "due_date", "description", "max_grade"
+        )
+        BatchProcessor._course(course_id)
+        if AssignmentManager.get_assignment_by_id(assignment_id):
+            raise BatchError(f"Assignment {assignment_id} already exists.")
+        if float(max_grade) <= 0:
+            raise BatchError("Max grade must be greater than 0.")
+        AssignmentManager.add_assignment(course_id, assignment_id, due_date, description, float(max_grade))
+        return {}
 
     @staticmethod
-    def save_assignments():
+    def submit(operation):
+        student_id, assignment_id = BatchProcessor._require(operation, "student_id", "assignment_id")
+        student = BatchProcessor._user(student_id, Student)
+        assignment = BatchProcessor._assignment(assignment_id)
+        if student not in assignment._course._enrolled_students:
+            raise BatchError(f"Student {student_id} is not enrolled in course {assignment._course._course_id}.")
+        if student in assignment._submitted_students:
+            raise BatchError(f"Student {student_id} has already submitted assignment {assignment_id}.")
+        assignment.submit(student)
+        return {}
+
+    @staticmethod
+    def grade_assignment(operation):
+        assignment_id, student_id, grade = BatchProcessor._require(operation, "assignment_id", "student_id", "grade")
+        assignment = BatchProcessor._assignment(assignment_id)
+        student = BatchProcessor._user(student_id, Student)
+        grade = float(grade)
+        if student not in assignment._submitted_students:
+            raise BatchError(f"Student {student_id} has not submitted assignment {assignment_id}.")
+        if not 0 <= grade <= assignment._max_grade:
+            raise BatchError(f"Grade {grade} is outside the range 0 - {assignment._max_grade}.")
+        assignment.grade(student, grade)
+        return {}
+
+    @staticmethod
+    def grade_course(operation):
+        course_id, student_id, grade_value = BatchProcessor._require(operation, "course_id", "student_id", "grade")
+        course = BatchProcessor._course(course_id)
+        student = BatchProcessor._user(student_id, Student)
+        grade_value = float(grade_value)
+        if student not in course._enrolled_students:
+            raise BatchError(f"Student {student_id} is not enrolled in course {course_id}.")
+        if not 1.0 <= grade_value <= 5.0:
+            raise BatchError("Course grades must be between 1.0 and 5.0.")
+        with LockManager.course(course._course_id):
+            if GradeManager.find_grade(student, course):
+                raise BatchError(f"Student {student_id} already has a grade in course {course_id}.")
+            grade = GradeManager.assign_grade(student, course, grade_value)
+        return {"grade_id": grade._grade_id}
+
+    @staticmethod
+    def import_grades(operation):
         """
-        Save all assignments to JSON.
+        Bulk grades an assignment ("assignment_id") or a course ("course_id") from "scores": [[student_id, score], ...].
+        The scores must be given inline: a batch file cannot make the importer read a CSV file.
         """
-        assignments_data = [assignment.to_dict() for assignment in AssignmentManager._assignments]
-        save_json("assignments.json", assignments_data)
+        (scores,) = BatchProcessor._require(operation, "scores")
+        if not isinstance(scores, list) or not all(isinstance(row, list) for row in scores):
+            raise BatchError('"scores" must be a list of [student_id, score] pairs.')
+        try:
+            if "assignment_id" in operation:
+                BatchProcessor._assignment(operation["assignment_id"])
+                report = AssignmentManager.import_grades(operation["assignment_id"], scores)
+            else:
+                (course_id,) = BatchProcessor._require(operation, "course_id")
+                BatchProcessor._course(course_id)
+                report = GradeManager.import_grades(course_id, scores)
+        except (OSError, ValueError) as e:
+            if isinstance(e, BatchError):
+                raise
+            raise BatchError(f"Could not read the scores: {e}") from e
+        if report["errors"]:
+            raise BatchError("; ".join(f"row {error['row']} ({error['student_id']}): {error['error']}"
+                                       for error in report["errors"]))
+        return {"applied": report["applied"]}
 
-class GradeManager:
-    _grades = []
+    @staticmethod
+    def drop(operation):
+        student_id, course_id = BatchProcessor._require(operation, "student_id", "course_id")
+        student = BatchProcessor._user(student_id, Student)
+        course = BatchProcessor._course(course_id)
+        if not CourseManager.drop_student(course, student):
+            raise BatchError(f"Student {student_id} is not enrolled in course {course_id}.")
+        return {}
+
+    OPERATIONS = (
+        "create_course", "assign_instructor", "enroll", "approve", "decline",
+        "add_assignment", "submit", "grade_assignment", "grade_course", "import_grades", "drop",
+    )
 
     @staticmethod
-    def assign_grade(student, course, grade_value):
+    def validate(operation):
+        """Checks that an operation is well-formed (a known op) without looking at the data."""
+        if not isinstance(operation, dict) or operation.get("op") not in BatchProcessor.OPERATIONS:
+            raise BatchError(f"Unknown operation. Expected one of: {', '.join(BatchProcessor.OPERATIONS)}.")
+
+    @staticmethod
+    def apply(operation):
+        """Applies one operation and returns its result dict; raises BatchError if it fails."""
+        BatchProcessor.validate(operation)
+        try:
+            return getattr(BatchProcessor, operation["op"])(operation)
+        except (TypeError, ValueError) as e:
+            if isinstance(e, BatchError):
+                raise
+            raise BatchError(f"Invalid value: {e}")
+
+    @staticmethod
+    def _check_dry_run(dry_run):
+        # The record store writes every change back when it evicts or closes, so nothing would stay unsaved
+        if dry_run and RecordStore.active():
+            raise RuntimeError("Dry runs are not available while the record store is open.")
+
+    @staticmethod
+    def run(lines, dry_run=False):
         """
-        Assign a course grade to a student using a 1-5 scale.
+        Applies the JSONL operations in `lines` and saves once at the end (unless dry_run).
+        Returns one result dict per non-empty line.
         """
-        grade = Grade(student, course, grade_value)
-        GradeManager._grades.append(grade)
-        print(f"Grade assigned: {grade}")
-        return grade
+        BatchProcessor._check_dry_run(dry_run)
+        ensure_loaded()
+        results = []
+        applied = 0
+        with log_phase("batch", warn_on=("failed",)) as counters, open(os.devnull, "w") as devnull:
+            for line_number, line in enumerate(lines, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                result = {"line": line_number}
+                try:
+                    operation = json.loads(line)
+                    result["op"] = operation.get("op") if isinstance(operation, dict) else None
+                    with redirect_stdout(devnull):  # the managers narrate every step for the menus
+                        result["result"] = BatchProcessor.apply(operation)
+                    result["status"] = "ok"
+                    applied += 1
+                    counters["applied"] += 1
+                except (json.JSONDecodeError, BatchError) as e:
+                    result["status"] = "error"
+                    result["error"] = str(e)
+                    counters["failed"] += 1
+                results.append(result)
+
+            if applied and not dry_run:
+                save_all()
+        return results
+
+    @staticmethod
+    def run_atomic(lines, dry_run=False):
+        """
+        Like run(), but applies all operations as one Transaction: either every line succeeds and
+        the data is saved once, or nothing is changed. Lines after a failure are reported as rolled back.
+        """
+        BatchProcessor._check_dry_run(dry_run)
+        ensure_loaded()
+        results, operations, malformed = [], [], False
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            result = {"line": line_number, "status": "rolled_back"}
+            try:
+                operation = json.loads(line)
+                result["op"] = operation.get("op") if isinstance(operation, dict) else None
+                BatchProcessor.validate(operation)
+                operations.append(operation)
+            except (json.JSONDecodeError, BatchError) as e:
+                result.update(status="error", error=str(e))
+                malformed = True
+            results.append(result)
+        if malformed:
+            return results
+
+        transaction = Transaction(persist=not dry_run)
+        for operation in operations:
+            transaction.stage(operation)
+        try:
+            for result, outcome in zip(results, transaction.commit()):
+                result.update(status="ok", result=outcome)
+        except TransactionError as e:
+            results[e.index].update(status="error", error=str(e.__cause__))
+        return results
+
+
+class TransactionError(BatchError):
+    """Raised when a transaction is rolled back because one of its operations failed."""
+    def __init__(self, index, operation, cause):
+        super().__init__(f"Operation {index + 1} ({operation.get('op')}) failed: {cause}")
+        self.index = index
+        self.operation = operation
+
+
+class Transaction:
+    """
+    Unit of work over the batch operations (see BatchProcessor).
+    Operations are staged and checked for shape first, then applied in order while the state lock
+    is held exclusively. If any operation fails, everything the transaction changed is rolled back
+    and TransactionError is raised; otherwise the domain events of all operations are published and
+    the data is saved once.
+
+        with Transaction() as transaction:
+            transaction.stage("approve", enrollment_id="ENR-1a2b3c4d")
+            transaction.stage("grade_course", course_id="CRS-859a31", student_id="STU-24-339058", grade=1.5)
+
+    Rollback uses an undo journal: entities are copied the first time an operation resolves them,
+    registries (which operations only append to) are truncated to their old lengths, and the
+    indexes are rebuilt. Committing costs nothing extra beyond the journal copies.
+    """
+    _active = threading.local()  # journal of the transaction being applied on this thread
+
+    def __init__(self, persist=True):
+        self._persist = persist
+        self._operations = []
+        self.results = None
 
+    def stage(self, op, **fields):
+        """Stages one operation, e.g. stage("enroll", student_id=..., course_id=...). Returns the transaction."""
+        operation = dict(fields, op=op) if isinstance(op, str) else dict(op)
+        BatchProcessor.validate(operation)
+        self._operations.append(operation)
+        return self
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        # On an exception inside the block nothing was applied, so there is nothing to undo
 
     @staticmethod
-    def view_student_grades(student):
-        """View all grades assigned to a student."""
-        student_grades = [grade for grade in GradeManager._grades if grade._student == student]
-        if not student_grades:
-            print(f"No grades found for {student._first_name} {student._last_name}.")
-            return
-        for grade in student_grades:
-            print(grade)
+    def journal(entity):
+        """Records an entity's state before an operation changes it (no-op outside a transaction)."""
+        journal = getattr(Transaction._active, "journal", None)
+        if journal is not None and id(entity) not in journal:
+            journal[id(entity)] = (entity, {
+                attribute: list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+                for attribute, value in vars(entity).items()
+            })
+        return entity
 
     @staticmethod
-    def grade_course(course_id, instructor):
-        """Allows an instructor to grade all students in a course with proper grading flow."""
-        course = CourseManager.get_course_by_id(course_id)
-        if not course:
-            print("Course not found.")
-            return
+    def journal_mapping(mapping):
+        """Records a dict of lists (such as CourseManager._applications) before it changes."""
+        journal = getattr(Transaction._active, "journal", None)
+        if journal is not None and id(mapping) not in journal:
+            journal[id(mapping)] = (mapping, {key: list(value) for key, value in mapping.items()})
 
-        if course._instructor != instructor:
-            print("You are not assigned to this course.")
-            return
+    @staticmethod
+    def _restore(journal, lengths):
+        for entity, saved in journal.values():
+            if isinstance(entity, dict):
+                entity.clear()
+                entity.update(saved)
+                continue
+            for attribute, value in saved.items():
+                current = getattr(entity, attribute)
+                if isinstance(value, list) and isinstance(current, list):
+                    current[:] = value
+                elif isinstance(value, dict) and isinstance(current, dict):
+                    current.clear()
+                    current.update(value)
+                else:
+                    setattr(entity, attribute, value)
+        for (owner, attribute), length in lengths.items():
+            del getattr(owner, attribute)[length:]
+        rebuild_indexes()
+
+    def commit(self):
+        """Applies the staged operations all-or-nothing and saves once. Returns the per-operation results."""
+        ensure_loaded()
+        lengths = {}
+        with LockManager.exclusive(), RecordStore.holding(), log_phase("transaction") as counters, \
+                open(os.devnull, "w") as devnull:
+            for owner, attribute, factory in _state_attributes():
+                if factory is list:
+                    lengths[(owner, attribute)] = len(getattr(owner, attribute))
+            Transaction._active.journal = {}
+            EventBus.hold()
+            results = []
+            try:
+                with redirect_stdout(devnull):
+                    for index, operation in enumerate(self._operations):
+                        try:
+                            results.append(BatchProcessor.apply(operation))
+                        except BatchError as e:
+                            raise TransactionError(index, operation, e) from e
+            except BaseException:
+                Transaction._restore(Transaction._active.journal, lengths)
+                EventBus.discard()
+                counters["rolled_back"] = len(self._operations)
+                raise
+            finally:
+                Transaction._active.journal = None
+            counters["applied"] = len(results)
+
+        EventBus.release()
+        if self._persist:
+            save_all()
+        self.results = results
+        return results
+
+
+class ExportManager:
+    """
+    Streams rosters, gradebooks and transcripts to CSV or JSONL files.
+    Rows are produced by generators that walk the manager indexes course by course (or student
+    by student), so an institution-wide export is one linear pass and memory use does not grow
+    with the size of the data. Like the printed views, exports read without taking locks.
+    """
+    FORMATS = ("csv", "jsonl")
+    ROSTER_FIELDS = ("course_id", "course_name", "role", "user_id", "first_name", "last_name", "email")
+    GRADEBOOK_FIELDS = ("course_id", "student_id", "student_name", "item", "max_grade", "status", "grade")
+    TRANSCRIPT_FIELDS = ("student_id", "student_name", "grade_id", "course_id", "course_name", "grade")
 
-        if not course._enrolled_students:
-            print(f"No students are enrolled in the course {course._name}.")
-            return
+    @staticmethod
+    def _courses(course_ids=None):
+        if course_ids is None:
+            return RecordStore.each("courses")
+        return (course for course in map(CourseManager.get_course_by_id, course_ids) if course)
 
-        print(f"\n--- Grading Course: {course._name} ---")
-        print(f"Course ID: {course._course_id}, Course Name: {course._name}\n")
+    @staticmethod
+    def roster_rows(course_ids=None):
+        """Yields the instructor and every enrolled student of each course."""
+        for course in ExportManager._courses(course_ids):
+            members = [("Instructor", course._instructor)] if course._instructor else []
+            members.extend(("Student", student) for student in list(course._enrolled_students))
+            for role, user in members:
+                yield {
+                    "course_id": course._course_id, "course_name": course._name, "role": role,
+                    "user_id": user._id, "first_name": user._first_name, "last_name": user._last_name,
+                    "email": getattr(user, "email", None),
+                }
 
-        # Display students with their current grading status
-        for student in course._enrolled_students:
-            existing_grade = next(
-                (grade._grade_value for grade in GradeManager._grades 
-                if grade._student == student and grade._course == course),
-                "Not Yet Graded"
-            )
-            print(f"Student ID: {student._id}, Name: {student._first_name} {student._last_name}, Grade: {existing_grade}")
+    @staticmethod
+    def gradebook_rows(course_ids=None):
+        """
+        Yields one row per enrolled student and assignment of each course, followed by the
+        student's course grade (item "Course Grade").
+        """
+        for course in ExportManager._courses(course_ids):
+            assignments = AssignmentManager.assignments_for_course(course)
+            course_grades = {
+                grade._student: grade._grade_value
+                for grade in list(GradeManager._grades_by_course.get(course._course_id, ()))
+            }
+            for student in list(course._enrolled_students):
+                row = {
+                    "course_id": course._course_id, "student_id": student._id,
+                    "student_name": f"{student._first_name} {student._last_name}",
+                }
+                for assignment in assignments:
+                    grade = assignment._graded_students.get(student)
+                    if grade is not None:
+                        status = "Graded"
+                    elif student in assignment._submitted_students:
+                        status = "Submitted"
+                    else:
+                        status = "Not Submitted"
+                    yield dict(row, item=assignment._assignment_id, max_grade=assignment._max_grade,
+                               status=status, grade=grade)
+                grade = course_grades.get(student)
+                yield dict(row, item="Course Grade", max_grade=5.0,
+                           status="Graded" if grade is not None else "Not Graded", grade=grade)
 
-        print("\nChoose students to grade.")
-        
-        # Grade each student
-        for student in course._enrolled_students:
-            existing_grade = next(
-                (grade._grade_value for grade in GradeManager._grades 
-                if grade._student == student and grade._course == course),
-                None
-            )
-            if existing_grade is not None:
-                print(f"{student._first_name} {student._last_name} is already graded with {existing_grade}. Skipping...")
-                continue
+    @staticmethod
+    def transcript_rows(student_ids=None):
+        """Yields every course grade of each student (all students by default)."""
+        if student_ids is None:
+            students = (user for user in RecordStore.each("users") if isinstance(user, Student))
+        else:
+            students = (user for user in map(RecordStore.fetch_user, student_ids) if isinstance(user, Student))
+        for student in students:
+            for grade in GradeManager.grades_for_student(student._id):
+                yield {
+                    "student_id": student._id, "student_name": f"{student._first_name} {student._last_name}",
+                    "grade_id": grade._grade_id, "course_id": grade._course._course_id,
+                    "course_name": grade._course._name, "grade": grade._grade_value,
+                }
 
-            # Input grade for the student
-            try:
-                grade_value = float(input(f"Enter grade (1.0 - 5.0) for {student._first_name} {student._last_name}: "))
-                if 1.0 <= grade_value <= 5.0:
-                    GradeManager.assign_grade(student, course, grade_value)
-                else:
-                    print(f"Invalid grade. Please enter a grade between 1.0 and 5.0. Skipping {student._first_name} {student._last_name}.")
-            except ValueError:
-                print(f"Invalid input. Skipping {student._first_name} {student._last_name}.")
+    @staticmethod
+    def write(rows, fields, output, fmt="csv"):
+        """
+        Streams rows to `output` (a path, "-" for stdout, or an open file) as CSV or JSONL.
+        Returns the number of rows written.
+        """
+        if fmt not in ExportManager.FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}. Expected one of: {', '.join(ExportManager.FORMATS)}.")
+        if output == "-":
+            return ExportManager.write(rows, fields, sys.stdout, fmt)
+        if isinstance(output, str):
+            with open(output, "w", newline="", encoding="utf-8", buffering=1024 * 1024) as file:
+                return ExportManager.write(rows, fields, file, fmt)
+
+        count = 0
+        with log_phase(f"export_{fmt}") as counters:
+            if fmt == "csv":
+                writer = csv.DictWriter(output, fieldnames=fields)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in rows:
+                    output.write(json.dumps(row) + "\n")
+                    count += 1
+            counters["rows"] = count
+        return count
+
+    @staticmethod
+    def export(report, output, fmt="csv", ids=None):
+        """Exports "roster", "gradebook" or "transcripts" (optionally only for the given course/student IDs)."""
+        reports = {
+            "roster": (ExportManager.roster_rows, ExportManager.ROSTER_FIELDS),
+            "gradebook": (ExportManager.gradebook_rows, ExportManager.GRADEBOOK_FIELDS),
+            "transcripts": (ExportManager.transcript_rows, ExportManager.TRANSCRIPT_FIELDS),
+        }
+        if report not in reports:
+            raise ValueError(f"Unknown report {report!r}. Expected one of: {', '.join(reports)}.")
+        rows, fields = reports[report]
+        return ExportManager.write(rows(ids), fields, output, fmt)
+
+
+class ReportGenerator:
+    """
+    Renders end-of-term reports (a transcript per student, a summary per course) in parallel.
+    The parent process walks the indexes once and cuts the data into shards of compact work units
+    made of IDs and plain values; worker processes format the units and each writes its own shard
+    file, so no object graph is pickled and the output is written concurrently.
+    """
+    SHARD_SIZE = 500
+
+    @staticmethod
+    def _transcript_units():
+        """(student_id, name, ((course_id, course_name, grade), ...)) for every student."""
+        for user in RecordStore.each("users"):
+            if isinstance(user, Student):
+                yield (
+                    user._id, f"{user._first_name} {user._last_name}",
+                    tuple((grade._course._course_id, grade._course._name, grade._grade_value)
+                          for grade in GradeManager.grades_for_student(user._id)),
+                )
 
     @staticmethod
-    def load_grades():
+    def _course_units():
         """
-        Load grades from JSON and link students and courses.
+        (course_id, name, instructor, capacity, enrolled count, course grades,
+        ((assignment_id, max_grade, submitted count, grades), ...)) for every course.
         """
-        grades_data = load_json("grades.json")
-        print(f"DEBUG: Found {len(grades_data)} grades in the file.")
-        GradeManager._grades = []  # Clear existing grades
+        for course in RecordStore.each("courses"):
+            instructor = course._instructor
+            yield (
+                course._course_id, course._name,
+                f"{instructor._first_name} {instructor._last_name}" if instructor else "None",
+                course._capacity, len(course._enrolled_students),
+                tuple(grade._grade_value for grade in list(GradeManager._grades_by_course.get(course._course_id, ()))),
+                tuple((assignment._assignment_id, assignment._max_grade, len(assignment._submitted_students),
+                       tuple(assignment._graded_students.values()))
+                      for assignment in AssignmentManager.assignments_for_course(course)),
+            )
 
-        for grade_data in grades_data:
-            student = UserManager.find_user_by_id(grade_data["student_id"])
-            course = CourseManager.get_course_by_id(grade_data["course_id"])
+    @staticmethod
+    def _shards(units, shard_size):
+        shard = []
+        for unit in units:
+            shard.append(unit)
+            if len(shard) == shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
 
-            if not student or not course:
-                print(f"WARNING: Skipping grade {grade_data['grade_id']} due to missing student or course.")
-                continue
+    @staticmethod
+    def _average(values):
+        return f"{sum(values) / len(values):.2f}" if values else "N/A"
 
-            grade = Grade.from_dict(grade_data)
-            grade._student = student
-            grade._course = course
-            GradeManager._grades.append(grade)
+    @staticmethod
+    def render_transcripts(path, units):
+        """Writes one shard of transcripts; runs in a worker process. Returns (file name, count)."""
+        with open(path, "w", encoding="utf-8") as file:
+            for student_id, name, grades in units:
+                file.write(f"--- Transcript: {name} ({student_id}) ---\n")
+                for course_id, course_name, grade in grades:
+                    file.write(f"{course_id}  {course_name}  Grade: {grade}\n")
+                if not grades:
+                    file.write("No grades recorded.\n")
+                file.write(f"Courses graded: {len(grades)}, "
+                           f"Average grade: {ReportGenerator._average([grade for _, _, grade in grades])}\n\n")
+        return os.path.basename(path), len(units)
 
     @staticmethod
-    def save_grades():
+    def render_course_summaries(path, units):
+        """Writes one shard of course summaries; runs in a worker process. Returns (file name, count)."""
+        with open(path, "w", encoding="utf-8") as file:
+            for course_id, name, instructor, capacity, enrolled, grades, assignments in units:
+                file.write(f"--- Course Summary: {name} ({course_id}) ---\n")
+                file.write(f"Instructor: {instructor}\nEnrolled Students: {enrolled} / {capacity}\n")
+                file.write(f"Course grades posted: {len(grades)}, Average: {ReportGenerator._average(grades)}"
+                           f"{f', Range: {min(grades)} - {max(grades)}' if grades else ''}\n")
+                for assignment_id, max_grade, submitted, graded in assignments:
+                    file.write(f"  Assignment {assignment_id}: {submitted} submitted, {len(graded)} graded, "
+                               f"Average: {ReportGenerator._average(graded)} / {max_grade}\n")
+                file.write("\n")
+        return os.path.basename(path), len(units)
+
+    @staticmethod
+    def generate(output_dir, workers=None, shard_size=SHARD_SIZE):
         """
-        Save all grades to JSON.
+        Writes transcripts-NNNNN.txt and courses-NNNNN.txt shards plus report_manifest.json into output_dir.
+        workers=1 renders in this process; otherwise a process pool with `workers` processes
+        (default: one per CPU) is used. Returns the manifest.
         """
-        grades_data = [grade.to_dict() for grade in GradeManager._grades]
-        save_json("grades.json", grades_data)
+        ensure_loaded()
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = [
+            (ReportGenerator.render_transcripts, "transcripts", ReportGenerator._transcript_units()),
+            (ReportGenerator.render_course_summaries, "courses", ReportGenerator._course_units()),
+        ]
+        tasks = (
+            (render, os.path.join(output_dir, f"{prefix}-{number:05d}.txt"), shard)
+            for render, prefix, units in jobs
+            for number, shard in enumerate(ReportGenerator._shards(units, shard_size))
+        )
+
+        results = []
+        with log_phase("generate_reports") as counters:
+            if workers == 1:
+                results = [render(path, shard) for render, path, shard in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # Keep a bounded number of shards in flight so memory stays flat for any data size
+                    window = 2 * (workers or os.cpu_count() or 1)
+                    pending = set()
+                    for render, path, shard in tasks:
+                        if len(pending) >= window:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            results.extend(future.result() for future in done)
+                        pending.add(pool.submit(render, path, shard))
+                    results.extend(future.result() for future in pending)
+            results.sort()
+            counters["shards"] = len(results)
+            counters["records"] = sum(count for _, count in results)
+
+        manifest = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "shards": [{"file": name, "records": count} for name, count in results],
+        }
+        with open(os.path.join(output_dir, "report_manifest.json"), "w") as file:
+            json.dump(manifest, file, indent=4)
+        return manifest
+
 
 def general_menu():
     while True:
@@ -1573,7 +6101,8 @@ def general_menu():
                 admin = PlatformAdmin(admin_id, admin_name)
                 admin.email = email  # Adding email to admin
                 admin.password = password  # Adding password to admin
-                UserManager._users.append(admin)
+                with LockManager.shared():
+                    UserManager._add_user(admin)
                 print(f"Admin account created!\nEmail: {email}\nPassword: {password}\nID: {admin_id}")
 
             else:  # Student or Instructor
@@ -1599,7 +6128,8 @@ def general_menu():
 
                 user.email = email
                 user.password = password
-                UserManager._users.append(user)
+                with LockManager.shared():
+                    UserManager._add_user(user)
                 print(f"{account_type} account created!\nEmail: {email}\nPassword: {password}\nID: {user_id}")
 
 
@@ -1634,7 +6164,7 @@ def student_menu(student):
         print("6. View Assignments")
         print("7. Submit Assignment")
         print("8. View Assignment Grades")
-        print("9. Notifications")
+        print(f"9. Notifications ({NotificationManager.unread_count(student._id)} unread)")
         print("10. Logout")
         choice = input("Enter your choice: ")
         
@@ -1701,9 +6231,7 @@ def student_menu(student):
             AssignmentManager.list_assignments_for_student(student, course)
 
             # Step 3: Handle no assignments case
-            assignments_for_course = [
-                assignment for assignment in AssignmentManager._assignments if assignment._course == course
-            ]
+            assignments_for_course = AssignmentManager.assignments_for_course(course)
             if not assignments_for_course:
                 print("There are no assignments available for this course.")
                 continue
@@ -1737,7 +6265,7 @@ def student_menu(student):
                 AssignmentManager.view_assignment_grades(student, course)
 
         elif choice == "9":
-            print("Feature not implemented: Notifications will be handled later.")
+            NotificationManager.view_notifications(student)
         elif choice == "10":
             print("Logging out...")
             break
@@ -1769,7 +6297,8 @@ def instructor_menu(instructor):
         print("7. View Passed Assignment")
         print("8. Grade Assignment")
         print("9. Grade Course")
-        print("10. Logout")
+        print("10. Import Grades from CSV")
+        print("11. Logout")
         choice = input("Enter your choice: ")
 
         if choice == "1":
@@ -1836,7 +6365,27 @@ def instructor_menu(instructor):
             GradeManager.grade_course(course_id, instructor)
 
 
-        elif choice == "10": # Log out
+        elif choice == "10":  # Import Grades from CSV
+            target_id = input("Enter Assignment ID or Course ID: ").strip()
+            path = input("Enter CSV file path (student_id,score per line): ").strip()
+            assignment = AssignmentManager.get_assignment_by_id(target_id)
+            try:
+                if assignment and assignment._course._instructor != instructor:
+                    print("You are not assigned to this course.")
+                    report = None
+                elif assignment:
+                    report = AssignmentManager.import_grades(target_id, path)
+                else:
+                    report = GradeManager.import_grades(target_id, path, instructor)
+            except OSError as e:
+                print(f"Could not read {path}: {e}")
+                report = None
+            if report:
+                for error in report["errors"]:
+                    print(f"Row {error['row']} ({error['student_id']}): {error['error']}")
+
+
+        elif choice == "11": # Log out
             print("Logging out...")
             break
         else:
@@ -1852,7 +6401,8 @@ def admin_menu(admin):
         print("5. Assign Instructor to Course")
         print("6. Approve/Reject Student Enrollments")
         print("7. Drop Student/Instructor")
-        print("8. Logout")
+        print("8. Performance Stats")
+        print("9. Logout")
         choice = input("Enter your choice: ")
 
         if choice == "1":  # Create Course
@@ -1886,7 +6436,8 @@ def admin_menu(admin):
                     course.assign_instructor(instructor)
                     print(f"Instructor {instructor._first_name} {instructor._last_name} assigned to course {course._name}.")
                     # Clear applications after assigning
-                    CourseManager._applications[course._course_id] = []
+                    with LockManager.course(course._course_id):
+                        CourseManager._applications[course._course_id] = []
                 else:
                     print("Instructor not found.")
 
@@ -1906,7 +6457,10 @@ def admin_menu(admin):
         elif choice == "7":  # Drop Student/Instructor
             PlatformAdmin.drop_user_menu()
 
-        elif choice == "8":  # Logout
+        elif choice == "8":  # Performance Stats
+            PerformanceMonitor.menu()
+
+        elif choice == "9":  # Logout
             print("Logging out...")
             break  # Exits the loop cleanly
 
@@ -1915,43 +6469,221 @@ def admin_menu(admin):
 
 
 
-def main():
+def run_batch(path, dry_run=False, results_path=None, atomic=False):
+    """Runs a JSONL batch file ("-" for stdin) and writes one JSON result per line."""
+    if dry_run and RecordStore.active():
+        print("--dry-run is not available with --record-store: its changes would be written back.", file=sys.stderr)
+        return 2
+    run = BatchProcessor.run_atomic if atomic else BatchProcessor.run
+    if path == "-":
+        results = run(sys.stdin, dry_run)
+    else:
+        with open(path, "r") as file:
+            results = run(file, dry_run)
+
+    output = open(results_path, "w") if results_path else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+    finally:
+        if results_path:
+            output.close()
+
+    failed = sum(1 for result in results if result["status"] != "ok")
+    print(f"Batch finished: {len(results) - failed} applied, {failed} not applied"
+          f"{' (dry run, nothing saved)' if dry_run else ''}.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def run_export(report, output, fmt=None, ids=None):
+    """Exports a report from the saved data; the format defaults to the output file's extension."""
+    if fmt is None:
+        fmt = "jsonl" if output.endswith(".jsonl") else "csv"
+    ensure_loaded()
+    count = ExportManager.export(report, output, fmt, ids)
+    print(f"Exported {count} {report} row(s).", file=sys.stderr)
+    return 0
+
+
+def run_reports(output_dir, workers=None, shard_size=ReportGenerator.SHARD_SIZE):
+    """Generates the end-of-term transcripts and course summaries into output_dir."""
+    manifest = ReportGenerator.generate(output_dir, workers, shard_size)
+    records = sum(shard["records"] for shard in manifest["shards"])
+    print(f"Wrote {records} report(s) in {len(manifest['shards'])} shard(s) to {output_dir}.", file=sys.stderr)
+    return 0
+
+
+def run_fsck(repair=False, verbose=False):
+    """Checks (and optionally repairs) the data files; exits with 1 if problems remain."""
+    result = IntegrityChecker.check(repair)
+    if verbose:
+        for issue in result["issues"]:
+            print(json.dumps(issue))
+    for problem, count in sorted(result["counts"].items()):
+        print(f"{count:>8}  {problem}", file=sys.stderr)
+    if result["repaired"]:
+        print(f"Repaired: {', '.join(result['repaired'])}", file=sys.stderr)
+    if result["failed"]:
+        print(f"Could not rewrite: {', '.join(result['failed'])}", file=sys.stderr)
+        return 1
+    if not result["issues"]:
+        print("No integrity problems found.", file=sys.stderr)
+    return 1 if result["issues"] and not result["repaired"] else 0
+
+
+def run_calendar(date=None, days=7):
+    """Prints the courses running on date (default today), the deadlines of the next days and the overdue count."""
+    if RecordStore.active():
+        print("The calendar needs every course in memory; run it without --record-store.", file=sys.stderr)
+        return 2
+    ensure_loaded()
+    courses = DateIndex.active_courses(date)
+    upcoming = DateIndex.upcoming_assignments(days, date)
+    overdue = DateIndex.overdue_assignments(date)
+    for course in courses:
+        print(f"course\t{course._course_id}\t{course._start_date}-{course._end_date}\t{course._name}")
+    for assignment in upcoming:
+        print(f"due\t{assignment._assignment_id}\t{assignment._due_date}\t{assignment._course._course_id}")
+    print(f"{len(courses)} active course(s), {len(upcoming)} assignment(s) due within {days} day(s), "
+          f"{len(overdue)} past due.", file=sys.stderr)
+    return 0
+
+
+def run_store(action):
+    """Builds records.db from the JSON data files, or exports it back to them."""
+    if action == "build":
+        counts = RecordStore.build()
+        print(f"Built {RecordStore.FILENAME}: " + ", ".join(f"{name}={count}" for name, count in counts.items()),
+              file=sys.stderr)
+    else:
+        RecordStore.open()
+        written = RecordStore.export_json()
+        RecordStore.close()
+        if not written:
+            print(f"Could not write every JSON data file from {RecordStore.FILENAME}.", file=sys.stderr)
+            return 1
+        print(f"Exported {RecordStore.FILENAME} to the JSON data files.", file=sys.stderr)
+    return 0
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="E-Learning Platform. Runs the interactive menus by default.")
+    parser.add_argument("--data", help="data folder (default: Case3_json next to this file, or $CASESTUDY3_DATA)")
+    parser.add_argument("--tenant", help="use this tenant's data folder under $CASESTUDY3_TENANTS (default: tenants/)")
+    parser.add_argument("--log-level", help="console log level (default: WARNING)")
+    parser.add_argument("--log-file", help="also write structured JSON logs to this file")
+    parser.add_argument("--compression", choices=("none", "gzip", "lzma"),
+                        help="format for saved data files (default: $CASESTUDY3_COMPRESSION or none)")
+    parser.add_argument("--compact", action="store_true", help="save JSON without indentation")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="poll the data files and apply changes made by other programs (interactive session)")
+    parser.add_argument("--shared", action="store_true",
+                        help="coordinate with other processes using this data folder and merge their saves "
+                             "(or set CASESTUDY3_SHARED=1; not with --record-store)")
+    parser.add_argument("--record-store", action="store_true",
+                        help="fetch entities on demand from records.db (built from the JSON files if missing; "
+                             "or set CASESTUDY3_RECORD_STORE=1)")
+    subcommands = parser.add_subparsers(dest="command")
+
+    batch = subcommands.add_parser("batch", help="apply JSONL operations non-interactively",
+                                   description=f"Operations: {', '.join(BatchProcessor.OPERATIONS)}.")
+    batch.add_argument("file", help="JSONL file with one operation per line, or - for stdin")
+    batch.add_argument("--dry-run", action="store_true", help="apply the operations but do not save")
+    batch.add_argument("--results", help="write per-operation results here instead of stdout")
+    batch.add_argument("--atomic", action="store_true", help="apply all operations or none (one transaction)")
+
+    export = subcommands.add_parser("export", help="stream a roster, gradebook or transcripts to CSV/JSONL")
+    export.add_argument("report", choices=("roster", "gradebook", "transcripts"))
+    export.add_argument("output", help="output file, or - for stdout")
+    export.add_argument("--format", choices=ExportManager.FORMATS, help="default: from the output extension, else csv")
+    export.add_argument("--id", dest="ids", action="append",
+                        help="only this course ID (roster, gradebook) or student ID (transcripts); repeatable")
+
+    fsck = subcommands.add_parser("fsck", help="check references across the data files")
+    fsck.add_argument("--repair", action="store_true", help="remove dangling references and rewrite the files")
+    fsck.add_argument("--verbose", action="store_true", help="print every problem as a JSON line")
+
+    reports = subcommands.add_parser("reports", help="render transcripts and course summaries in parallel")
+    reports.add_argument("output_dir", help="folder for the shard files and report_manifest.json")
+    reports.add_argument("--workers", type=int, help="worker processes (default: one per CPU; 1 = no pool)")
+    reports.add_argument("--shard-size", type=int, default=ReportGenerator.SHARD_SIZE,
+                         help=f"records per shard file (default: {ReportGenerator.SHARD_SIZE})")
+
+    calendar = subcommands.add_parser("calendar", help="list active courses and upcoming deadlines")
+    calendar.add_argument("--date", type=_date_argument, help="MM/DD/YYYY (default: today)")
+    calendar.add_argument("--days", type=int, default=7, help="deadline window in days (default: 7)")
+
+    store = subcommands.add_parser("store", help="convert between the JSON files and the on-demand record store")
+    store.add_argument("action", choices=("build", "export"),
+                       help="build records.db from the JSON files, or write the JSON files from records.db")
+
+    layout = subcommands.add_parser("layout", help="switch enrollments, assignments and grades between one file "
+                                                   "each and one shard per course")
+    layout.add_argument("layout", choices=("sharded", "flat"))
+    args = parser.parse_args(argv)
+    args.shared = args.shared or os.environ.get("CASESTUDY3_SHARED") == "1"
+    args.record_store = args.record_store or os.environ.get("CASESTUDY3_RECORD_STORE") == "1"
+    if args.shared and args.record_store:
+        parser.error("--shared (CASESTUDY3_SHARED=1) cannot be combined with --record-store "
+                     "(CASESTUDY3_RECORD_STORE=1): other processes' saves can only be merged into the JSON files")
+    return args
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    configure_logging(args.log_level, args.log_file)
+    if args.data:
+        set_data_folder(args.data)
+    elif args.tenant:
+        set_data_folder(TenantManager.folder(args.tenant))
+    if args.compression or args.compact:
+        set_storage_format(args.compression or COMPRESSION, args.compact or COMPACT_JSON)
+    if args.command == "store":
+        return run_store(args.action)
+    if args.command == "layout":
+        try:
+            ShardStore.convert(args.layout)
+        except OSError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Data folder converted to the {args.layout} layout.", file=sys.stderr)
+        return 0
+    if args.record_store:
+        RecordStore.open()
+    elif args.shared:
+        SharedAccess.enable()
+
+    if args.command == "batch":
+        return run_batch(args.file, args.dry_run, args.results, args.atomic)
+    if args.command == "export":
+        return run_export(args.report, args.output, args.format, args.ids)
+    if args.command == "fsck":
+        return run_fsck(args.repair, args.verbose)
+    if args.command == "reports":
+        return run_reports(args.output_dir, args.workers, args.shard_size)
+    if args.command == "calendar":
+        return run_calendar(args.date, args.days)
+
     print("Welcome to the E-Learning Platform!")
 
-    # Debugging: Check the current working directory and save folder
-    print(f"DEBUG: Current Working Directory: {os.getcwd()}")
-    print(f"DEBUG: JSON Save Folder: {SAVE_FOLDER}")
+    # Opt-in instrumentation of the manager methods (also available from the admin menu)
+    if os.environ.get("CASESTUDY3_PROFILE") == "1":
+        PerformanceMonitor.enable()
 
-    # Debugging: Check JSON file names and intended paths
-    print("\nDEBUG: JSON Files:")
-    print(f"Users File: {os.path.join(SAVE_FOLDER, 'users.json')}")
-    print(f"Courses File: {os.path.join(SAVE_FOLDER, 'courses.json')}")
-    print(f"Enrollments File: {os.path.join(SAVE_FOLDER, 'enrollments.json')}")
-    print(f"Assignments File: {os.path.join(SAVE_FOLDER, 'assignments.json')}")
-    print(f"Grades File: {os.path.join(SAVE_FOLDER, 'grades.json')}")
+    logger.debug("Current Working Directory: %s", os.getcwd())
+    logger.debug("JSON Save Folder: %s", SAVE_FOLDER)
 
     # Load data at the beginning
-    print("\nDEBUG: Loading Data...")
-    UserManager.load_users()
-    CourseManager.load_courses()
-    EnrollmentManager.load_enrollments()
-    AssignmentManager.load_assignments()
-    GradeManager.load_grades()
-
-    # Debugging: Confirmation that loading is complete
-    print("\nDEBUG: Data Loaded Successfully.")
+    ensure_loaded()
+    if args.watch:
+        HotReloader.watch(args.watch)
 
     try:
         general_menu()  # Main program logic (this handles menu inputs)
     finally:
         # Save data before exiting
-        print("\nDEBUG: Saving Data...")
-        UserManager.save_users()
-        CourseManager.save_courses()
-        EnrollmentManager.save_enrollments()
-        AssignmentManager.save_assignments()
-        GradeManager.save_grades()
-        print("DEBUG: Data Saved Successfully.")
+        HotReloader.stop()
+        save_all()
 
     print("Exiting program. Goodbye!")
 
@@ -1961,4 +6693,8 @@ def main():
 
 # Entry Point
 if __name__ == "__main__":
-    main()
+    try:
+        sys.exit(main())
+    except DataFileError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,220 @@
+"""
+Benchmark suite for the E-Learning Platform managers.
+
+For every requested dataset size a synthetic dataset is generated (see generate_dataset.py)
+and measured in a fresh worker process, so peak memory is reported per size.
+Each measurement reports operations per second; results are written as JSON.
+
+Usage:
+    python benchmark.py --rows 1000 10000 100000 --results bench_results.json
+"""
+import argparse
+import builtins
+import contextlib
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import generate_dataset
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DATA_FILES = ["users.json", "courses.json", "enrollments.json", "assignments.json", "grades.json"]
+
+
+@contextlib.contextmanager
+def scripted_input(answer):
+    """Answers every input() prompt with the same text (payment option, grade value)."""
+    original = builtins.input
+    builtins.input = lambda prompt="": answer
+    try:
+        yield
+    finally:
+        builtins.input = original
+
+
+def timed(operation, inputs, budget):
+    """
+    Runs operation(item) for each item until the inputs or the time budget run out.
+    Returns (operations, seconds).
+    """
+    operations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    for item in inputs:
+        operation(item)
+        operations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            break
+    return operations, elapsed
+
+
+def record(results, name, operations, seconds, rows=None):
+    results[name] = {
+        "operations": operations,
+        "seconds": round(seconds, 6),
+        "ops_per_sec": round(operations / seconds, 2) if seconds else None,
+    }
+    if rows is not None:
+        results[name]["rows"] = rows
+        results[name]["rows_per_sec"] = round(rows / seconds, 2) if seconds else None
+
+
+def run_worker(data_folder, budget, sample):
+    """Measures every benchmarked operation against one dataset; returns the results dict."""
+    devnull = open(os.devnull, "w")
+    with contextlib.redirect_stdout(devnull):
+        import CaseStudy3 as platform
+    platform.set_data_folder(data_folder)
+    rng = random.Random(0)
+    results = {}
+
+    loaders = [
+        ("load_users", platform.UserManager.load_users, lambda: platform.UserManager._users),
+        ("load_courses", platform.CourseManager.load_courses, lambda: platform.CourseManager._courses),
+        ("load_enrollments", platform.EnrollmentManager.load_enrollments, lambda: platform.EnrollmentManager._enrollments),
+        ("load_assignments", platform.AssignmentManager.load_assignments, lambda: platform.AssignmentManager._assignments),
+        ("load_grades", platform.GradeManager.load_grades, lambda: platform.GradeManager._grades),
+    ]
+    with contextlib.redirect_stdout(devnull):
+        for name, loader, loaded in loaders:
+            start = time.perf_counter()
+            loader()
+            record(results, name, 1, time.perf_counter() - start, rows=len(loaded()))
+
+    users = list(platform.UserManager._users)
+    students = [user for user in users if isinstance(user, platform.Student)]
+    courses = list(platform.CourseManager._courses)
+    graded_courses = [course for course in courses if course._instructor and course._enrolled_students]
+
+    def sample_of(population):
+        return [rng.choice(population) for _ in range(sample)] if population else []
+
+    with contextlib.redirect_stdout(devnull):
+        record(results, "login", *timed(
+            lambda user: platform.UserManager.login(user.email, user.password), sample_of(users), budget))
+        record(results, "find_user_by_id", *timed(
+            lambda user: platform.UserManager.find_user_by_id(user._id), sample_of(users), budget))
+
+        with scripted_input("1"):
+            pairs = [(student, rng.choice(courses)) for student in sample_of(students)] if courses else []
+            record(results, "create_enrollment", *timed(
+                lambda pair: platform.EnrollmentManager.create_enrollment(*pair), pairs, budget))
+
+        with scripted_input("3.0"):
+            record(results, "grade_course", *timed(
+                lambda course: platform.GradeManager.grade_course(course._course_id, course._instructor),
+                graded_courses[:sample], budget))
+
+        record(results, "view_all_courses", *timed(
+            lambda _: platform.CourseManager.view_all_courses(), range(sample), budget))
+        record(results, "view_all_users", *timed(
+            lambda _: platform.UserManager.view_all_users(), range(sample), budget))
+        record(results, "view_users_in_course", *timed(
+            lambda course: platform.CourseManager.view_users_in_course(course._course_id), sample_of(courses), budget))
+        record(results, "view_passed_assignments", *timed(
+            platform.AssignmentManager.view_passed_assignments, sample_of(courses), budget))
+        record(results, "view_student_grades", *timed(
+            platform.GradeManager.view_student_grades, sample_of(students), budget))
+
+    # Save into a scratch folder so the generated dataset stays untouched
+    scratch = tempfile.mkdtemp(prefix="bench_save_")
+    platform.set_data_folder(scratch)
+    savers = [
+        ("save_users", platform.UserManager.save_users, len(platform.UserManager._users)),
+        ("save_courses", platform.CourseManager.save_courses, len(platform.CourseManager._courses)),
+        ("save_enrollments", platform.EnrollmentManager.save_enrollments, len(platform.EnrollmentManager._enrollments)),
+        ("save_assignments", platform.AssignmentManager.save_assignments, len(platform.AssignmentManager._assignments)),
+        ("save_grades", platform.GradeManager.save_grades, len(platform.GradeManager._grades)),
+    ]
+    try:
+        with contextlib.redirect_stdout(devnull):
+            for name, saver, rows in savers:
+                start = time.perf_counter()
+                saver()
+                record(results, name, 1, time.perf_counter() - start, rows=rows)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+        devnull.close()
+
+    # ru_maxrss is reported in kilobytes on Linux
+    return {
+        "operations": results,
+        "peak_memory_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+    }
+
+
+def benchmark_size(rows, data_root, budget, sample):
+    """Generates (if needed) and measures one dataset size in a separate worker process."""
+    data_folder = os.path.join(data_root, f"rows_{rows}")
+    if not all(os.path.exists(os.path.join(data_folder, name)) for name in DATA_FILES):
+        print(f"Generating dataset with ~{rows} rows in {data_folder}...")
+        generate_dataset.generate(rows, data_folder)
+
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as handle:
+        result_path = handle.name
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", data_folder,
+             "--worker-result", result_path, "--budget", str(budget), "--sample", str(sample)],
+            check=True,
+        )
+        with open(result_path) as handle:
+            result = json.load(handle)
+    finally:
+        os.remove(result_path)
+    result["rows"] = sum(result["operations"][name]["rows"] for name in
+                         ("load_users", "load_courses", "load_enrollments", "load_assignments", "load_grades"))
+    return result
+
+
+def print_report(report):
+    for size in report["sizes"]:
+        print(f"\n--- {size['rows']} rows (peak memory {size['peak_memory_mb']} MB) ---")
+        for name, stats in size["operations"].items():
+            line = f"{name:<26}{stats['operations']:>8} ops {stats['seconds']:>11.4f} s"
+            if stats["ops_per_sec"] is not None:
+                line += f" {stats['ops_per_sec']:>14.2f} ops/s"
+            if "rows_per_sec" in stats and stats["rows_per_sec"] is not None:
+                line += f" {stats['rows_per_sec']:>14.2f} rows/s"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the E-Learning Platform managers at several dataset sizes.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="dataset sizes in rows (default: 1000 10000 100000)")
+    parser.add_argument("--data-root", default="bench_data", help="folder for generated datasets")
+    parser.add_argument("--results", default="bench_results.json", help="machine-readable results file")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds spent per repeated operation")
+    parser.add_argument("--sample", type=int, default=1000, help="maximum repetitions per repeated operation")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args.budget, args.sample)
+        with open(args.worker_result, "w") as handle:
+            json.dump(result, handle)
+        return
+
+    report = {
+        "python": sys.version.split()[0],
+        "budget_seconds": args.budget,
+        "sample": args.sample,
+        "sizes": [benchmark_size(rows, args.data_root, args.budget, args.sample) for rows in args.rows],
+    }
+    with open(args.results, "w") as handle:
+        json.dump(report, handle, indent=4)
+    print_report(report)
+    print(f"\nResults written to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
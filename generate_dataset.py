@@ -0,0 +1,224 @@
+"""
+Synthetic dataset generator for the E-Learning Platform.
+
+Writes users.json, courses.json, enrollments.json, assignments.json and grades.json in the
+same layout as Case3_json/, at any size. Course membership is computed arithmetically instead
+of being kept in memory, so even 10^7-row datasets are generated in constant memory.
+
+Usage:
+    python generate_dataset.py --rows 100000 --output bench_data/rows_100000
+"""
+import argparse
+import json
+import os
+
+ENROLLMENTS_PER_STUDENT = 3
+STUDENTS_PER_COURSE = 40
+COURSES_PER_INSTRUCTOR = 4
+ASSIGNMENTS_PER_COURSE = 4
+COURSE_CAPACITY = 50
+
+# Roughly 1 user + 3 enrollments + 1.5 grades + course/assignment rows per student
+ROWS_PER_STUDENT = 6
+
+ADMIN_EMAIL = "admin@platform.com"
+ADMIN_PASSWORD = "admin"
+
+FIRST_NAMES = ["Angel", "Marc", "Kian", "Gem", "Hasmin", "Prince", "Rafael", "Dmitri", "Charlotte", "Luis"]
+LAST_NAMES = ["Angulo", "Alvienth", "Cadungog", "Martinez", "Idsla", "Saniel", "Salilagiua", "Belandres", "Carmona", "Palma"]
+PLACES = ["Kabacan", "Davao", "Cebu", "Manila", "Iloilo"]
+
+
+class DatasetShape:
+    """
+    Derives entity counts from the requested number of rows and answers membership questions
+    (which courses a student takes, which students a course has) without storing them.
+    """
+    def __init__(self, rows, seed=0):
+        self.students = max(1, rows // ROWS_PER_STUDENT)
+        self.courses = max(ENROLLMENTS_PER_STUDENT, self.students * ENROLLMENTS_PER_STUDENT // STUDENTS_PER_COURSE)
+        self.instructors = max(1, self.courses // COURSES_PER_INSTRUCTOR)
+        self.seed = seed
+        # Distance between a student's courses; keeps each student's courses distinct
+        self.stride = max(1, self.courses // ENROLLMENTS_PER_STUDENT)
+        # Upper bound on members per course, so every approved enrollment fits
+        members_per_slot = -(-self.students // self.courses)
+        self.capacity = max(COURSE_CAPACITY, ENROLLMENTS_PER_STUDENT * members_per_slot)
+
+    def roll(self, *values):
+        """Deterministic pseudo-random number in [0, 100) for the given values."""
+        h = self.seed + 0x9E3779B1
+        for value in values:
+            h = (h ^ value) * 0x01000193 & 0xFFFFFFFF
+        return (h >> 8) % 100
+
+    def courses_of_student(self, student):
+        return [(student + slot * self.stride) % self.courses for slot in range(ENROLLMENTS_PER_STUDENT)]
+
+    def students_of_course(self, course):
+        """Yields (student, slot) pairs for every student whose slot maps to this course."""
+        for slot in range(ENROLLMENTS_PER_STUDENT):
+            first = (course - slot * self.stride) % self.courses
+            for student in range(first, self.students, self.courses):
+                yield student, slot
+
+    def is_approved(self, student, course):
+        return self.roll(student, course, 1) < 80
+
+    def approved_students_of_course(self, course):
+        return [student for student, _ in self.students_of_course(course) if self.is_approved(student, course)]
+
+
+def student_id(index):
+    return f"STU-24-{index:06d}"
+
+
+def instructor_id(index):
+    return f"INS-24-{index:06d}"
+
+
+def course_id(index):
+    return f"CRS-{index:06x}"
+
+
+def person_fields(index, kind):
+    return {
+        "first_name": FIRST_NAMES[index % len(FIRST_NAMES)],
+        "last_name": LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)],
+        "age": 18 + index % 40,
+        "sex": "Male" if index % 2 else "Female",
+        "birthdate": f"{1 + index % 12:02d}/{1 + index % 28:02d}/{1970 + index % 35}",
+        "place_of_birth": PLACES[index % len(PLACES)],
+        "email": f"{kind}{index}@platform.com",
+        "password": f"pw{index}",
+    }
+
+
+class JsonArrayWriter:
+    """Streams records into a JSON array file formatted like save_json (indent=4)."""
+    def __init__(self, path):
+        self._file = open(path, "w", buffering=1024 * 1024)
+        self._file.write("[")
+        self._first = True
+        self.count = 0
+
+    def write(self, record):
+        text = json.dumps(record, indent=4).replace("\n", "\n    ")
+        self._file.write("\n    " if self._first else ",\n    ")
+        self._file.write(text)
+        self._first = False
+        self.count += 1
+
+    def close(self):
+        self._file.write("\n]" if not self._first else "]")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def generate(rows, output, seed=0):
+    """Generates a dataset of roughly `rows` rows into the `output` folder and returns row counts."""
+    shape = DatasetShape(rows, seed)
+    os.makedirs(output, exist_ok=True)
+    counts = {}
+
+    with JsonArrayWriter(os.path.join(output, "users.json")) as users:
+        users.write({"id": "ADM-24-000000", "type": "Admin", "name": "Admin",
+                     "email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+        for index in range(shape.instructors):
+            users.write({
+                "id": instructor_id(index),
+                **person_fields(index, "instructor"),
+                "type": "Instructor",
+                "assigned_courses": [course_id(c) for c in range(index, shape.courses, shape.instructors)],
+            })
+        for index in range(shape.students):
+            users.write({
+                "id": student_id(index),
+                **person_fields(index, "student"),
+                "type": "Student",
+                "enrolled_courses": [
+                    course_id(c) for c in shape.courses_of_student(index) if shape.is_approved(index, c)
+                ],
+            })
+        counts["users"] = users.count
+
+    with JsonArrayWriter(os.path.join(output, "courses.json")) as courses:
+        for index in range(shape.courses):
+            courses.write({
+                "course_id": course_id(index),
+                "name": f"Course {index}",
+                "start_date": f"{1 + index % 12:02d}/01/2024",
+                "end_date": f"{1 + index % 12:02d}/28/2025",
+                "description": f"Generated course number {index}",
+                "capacity": shape.capacity,
+                "enrolled_students": [student_id(s) for s in shape.approved_students_of_course(index)],
+                "instructor": instructor_id(index % shape.instructors),
+            })
+        counts["courses"] = courses.count
+
+    with JsonArrayWriter(os.path.join(output, "enrollments.json")) as enrollments, \
+            JsonArrayWriter(os.path.join(output, "grades.json")) as grades:
+        for index in range(shape.students):
+            for c in shape.courses_of_student(index):
+                approved = shape.is_approved(index, c)
+                enrollments.write({
+                    "enrollment_id": f"ENR-{enrollments.count:08x}",
+                    "student_id": student_id(index),
+                    "course_id": course_id(c),
+                    "payment_status": "Paid" if approved or shape.roll(index, c, 2) < 50 else "Pending",
+                    "enrollment_status": "Approved" if approved else "Pending",
+                })
+                if approved and shape.roll(index, c, 3) < 50:
+                    grades.write({
+                        "grade_id": f"GRD-{grades.count:08x}",
+                        "student_id": student_id(index),
+                        "course_id": course_id(c),
+                        "grade_value": float(1 + shape.roll(index, c, 4) % 5),
+                    })
+        counts["enrollments"] = enrollments.count
+        counts["grades"] = grades.count
+
+    with JsonArrayWriter(os.path.join(output, "assignments.json")) as assignments:
+        for index in range(shape.courses):
+            members = shape.approved_students_of_course(index)
+            for number in range(ASSIGNMENTS_PER_COURSE):
+                submitted = [s for s in members if shape.roll(s, index, 10 + number) < 70]
+                assignments.write({
+                    "assignment_id": f"ASS-{index:06x}-{number + 1:02d}",
+                    "course_id": course_id(index),
+                    "due_date": f"{1 + (index + number) % 12:02d}/{1 + number * 7:02d}/2024",
+                    "description": f"Assignment {number + 1} of course {index}",
+                    "max_grade": 10.0,
+                    "submitted_students": {student_id(s): "Submitted" for s in submitted},
+                    "graded_students": {
+                        student_id(s): float(shape.roll(s, index, 20 + number) % 11)
+                        for s in submitted if shape.roll(s, index, 30 + number) < 60
+                    },
+                })
+        counts["assignments"] = assignments.count
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic E-Learning Platform dataset.")
+    parser.add_argument("--rows", type=int, default=10_000, help="approximate total number of rows (default: 10000)")
+    parser.add_argument("--output", help="output folder (default: bench_data/rows_<ROWS>)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated statuses and scores")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join("bench_data", f"rows_{args.rows}")
+    counts = generate(args.rows, output, args.seed)
+    print(f"Dataset written to {output}:")
+    for name, count in counts.items():
+        print(f"  {name}: {count}")
+    print(f"  total: {sum(counts.values())}")
+
+
+if __name__ == "__main__":
+    main()
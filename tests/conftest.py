@@ -0,0 +1,49 @@
+"""Shared fixtures: every test works on its own generated data folder and starts from an empty state."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CaseStudy3 as platform  # noqa: E402
+import generate_dataset  # noqa: E402
+
+
+@pytest.fixture
+def data_folder(tmp_path):
+    """A small generated dataset, set as the data folder; nothing is loaded yet."""
+    folder = str(tmp_path / "data")
+    generate_dataset.generate(600, folder)
+    previous = platform.SAVE_FOLDER
+    platform.reset_state()
+    platform.set_data_folder(folder)
+    yield folder
+    platform.reset_state()
+    platform.set_data_folder(previous)
+
+
+@pytest.fixture
+def loaded(data_folder):
+    """data_folder, loaded."""
+    platform.ensure_loaded()
+    return data_folder
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """Answers input() prompts with the given texts, in order."""
+    def script(*texts):
+        replies = iter(texts)
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(replies))
+    return script
+
+
+def students():
+    return [user for user in platform.UserManager._users if isinstance(user, platform.Student)]
+
+
+def submitted_assignment():
+    """An assignment with a submission, and one student who submitted it."""
+    assignment = next(a for a in platform.AssignmentManager._assignments if a._submitted_students)
+    return assignment, next(iter(assignment._submitted_students))
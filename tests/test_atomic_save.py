@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+import CaseStudy3 as platform
+
+
+def test_backup_generations_rotate(data_folder, monkeypatch):
+    monkeypatch.setattr(platform, "BACKUP_GENERATIONS", 2)
+    for version in range(1, 4):
+        assert platform.save_json("sample.json", {"version": version})
+    path = os.path.join(data_folder, "sample.json")
+    assert platform._read_json(path) == {"version": 3}
+    assert platform._read_json(path + ".1") == {"version": 2}
+    assert platform._read_json(path + ".2") == {"version": 1}
+    assert not os.path.exists(path + ".3")
+
+
+def test_a_failed_write_leaves_the_old_file(data_folder, monkeypatch):
+    assert platform.save_json("sample.json", {"version": 1})
+
+    def crash(descriptor):
+        raise OSError(5, "Input/output error")
+    monkeypatch.setattr(os, "fsync", crash)
+    assert not platform.save_json("sample.json", {"version": 2})
+    assert platform.load_json("sample.json") == {"version": 1}
+    assert not [name for name in os.listdir(data_folder) if name.endswith(".tmp")]
+
+
+def test_a_corrupt_file_is_recovered_from_its_backup(data_folder):
+    assert platform.save_json("sample.json", {"version": 1})
+    assert platform.save_json("sample.json", {"version": 2})
+    with open(os.path.join(data_folder, "sample.json"), "w") as file:
+        file.write('{"version": ')
+    assert platform.load_json("sample.json") == {"version": 1}
+
+
+def test_a_corrupt_file_without_a_usable_backup_is_not_replaced(data_folder):
+    path = os.path.join(data_folder, "users.json")
+    with open(path, "r+") as file:
+        file.truncate(100)
+    with open(path + ".1", "w") as file:
+        file.write("[")  # an unreadable backup does not help either
+    with pytest.raises(platform.DataFileError, match="no readable backup"):
+        platform.ensure_loaded()
+    assert not platform._loaded
+    assert os.path.getsize(path) == 100
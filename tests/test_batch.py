@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+import CaseStudy3 as platform
+from conftest import submitted_assignment
+
+
+def run(*operations, **options):
+    return platform.BatchProcessor.run([json.dumps(operation) for operation in operations], **options)
+
+
+def test_failing_operations_are_reported_and_the_rest_applied(loaded):
+    assignment, student = submitted_assignment()
+    results = run(
+        {"op": "no_such_op"},
+        {"op": "enroll", "student_id": student._id},
+        {"op": "import_grades", "assignment_id": assignment._assignment_id, "scores": "abc"},
+        {"op": "import_grades", "assignment_id": assignment._assignment_id, "scores": ["abc"]},
+        {"op": "import_grades", "assignment_id": assignment._assignment_id, "scores": [[student._id, 7]]},
+    )
+    assert [result["status"] for result in results] == ["error", "error", "error", "error", "ok"]
+    assert "Missing field(s): course_id" in results[1]["error"]
+    assert "must be a list" in results[2]["error"]
+    assert assignment._graded_students[student] == 7
+
+
+def test_scores_are_never_read_from_a_path(loaded, tmp_path):
+    assignment, student = submitted_assignment()
+    scores = tmp_path / "scores.csv"
+    scores.write_text(f"student_id,score\n{student._id},5\n")
+    (result,) = run({"op": "import_grades", "assignment_id": assignment._assignment_id, "scores": str(scores)})
+    assert result["status"] == "error"
+    assert assignment._graded_students.get(student) != 5
+
+
+def test_unreadable_scores_become_batch_errors(loaded, monkeypatch):
+    assignment, _ = submitted_assignment()
+
+    def unreadable(source):
+        raise FileNotFoundError(2, "No such file or directory", "scores.csv")
+
+    monkeypatch.setattr(platform, "read_score_rows", unreadable)
+    (result,) = run({"op": "import_grades", "assignment_id": assignment._assignment_id, "scores": []})
+    assert result["status"] == "error"
+    assert "Could not read the scores" in result["error"]
+
+
+def test_invalid_rows_reject_the_whole_import(loaded):
+    assignment, student = submitted_assignment()
+    before = dict(assignment._graded_students)
+    (result,) = run({"op": "import_grades", "assignment_id": assignment._assignment_id,
+                     "scores": [[student._id, 5], ["STU-nobody", 5]]})
+    assert result["status"] == "error"
+    assert "Student not found" in result["error"]
+    assert assignment._graded_students == before
+
+
+def test_dry_run_does_not_save(loaded):
+    with open(f"{loaded}/courses.json") as file:
+        before = file.read()
+    (result,) = run({"op": "create_course", "name": "Dry", "start_date": "01/01/2025", "end_date": "02/01/2025",
+                     "description": "", "capacity": 5}, dry_run=True)
+    assert result["status"] == "ok"
+    with open(f"{loaded}/courses.json") as file:
+        assert file.read() == before
+
+
+@pytest.mark.parametrize("grade", [-50, "NaN", None])
+def test_assignment_grades_outside_the_range_are_rejected(loaded, grade):
+    assignment, student = submitted_assignment()
+    if grade is None:
+        grade = assignment._max_grade + 1
+    before = assignment._graded_students.get(student)
+    (result,) = run({"op": "grade_assignment", "assignment_id": assignment._assignment_id,
+                     "student_id": student._id, "grade": grade})
+    assert result["status"] == "error" and "outside the range" in result["error"]
+    assert assignment._graded_students.get(student) == before
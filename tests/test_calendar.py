@@ -0,0 +1,49 @@
+import pytest
+
+import CaseStudy3 as platform
+from conftest import students
+
+
+def day(text):
+    return platform.parse_date_ordinal(text)
+
+
+def middle_day():
+    days = sorted(filter(None, (day(a._due_date) for a in platform.AssignmentManager._assignments)))
+    return days[len(days) // 2]
+
+
+def test_queries_match_a_scan(loaded):
+    today = middle_day()
+    courses = platform.CourseManager._courses
+    assignments = platform.AssignmentManager._assignments
+    assert set(platform.DateIndex.active_courses(today)) == {
+        c for c in courses if day(c._start_date) and day(c._end_date) and day(c._start_date) <= today <= day(c._end_date)
+    }
+    assert set(platform.DateIndex.upcoming_assignments(7, today)) == {
+        a for a in assignments if day(a._due_date) and today <= day(a._due_date) <= today + 7
+    }
+    assert set(platform.DateIndex.overdue_assignments(today)) == {
+        a for a in assignments if day(a._due_date) and day(a._due_date) < today
+    }
+
+
+def test_overdue_work_of_a_student(loaded):
+    today = middle_day()
+    overdue = platform.DateIndex.overdue_assignments(today)
+    checked = 0
+    for student in students():
+        expected = [a for a in overdue if a._course in student._enrolled_courses and student not in a._submitted_students]
+        found = platform.DateIndex.overdue_assignments(today, student)
+        assert set(found) == set(expected)
+        assert [day(a._due_date) for a in found] == sorted(day(a._due_date) for a in found)
+        checked += bool(found)
+    assert checked
+
+
+def test_invalid_dates_are_usage_errors(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        platform.parse_arguments(["calendar", "--date", "13/45/2024"])
+    assert exit_info.value.code == 2
+    assert "invalid date '13/45/2024'" in capsys.readouterr().err
+    assert platform.parse_arguments(["calendar", "--date", "02/29/2024"]).date == "02/29/2024"
@@ -0,0 +1,72 @@
+import CaseStudy3 as platform
+from conftest import students
+
+
+def test_enrollments_are_found_by_id(loaded, answers):
+    enrollment = platform.EnrollmentManager._enrollments[-1]
+    assert platform.EnrollmentManager.get_enrollment_by_id(enrollment._enrollment_id) is enrollment
+    assert platform.EnrollmentManager.get_enrollment_by_id("ENR-missing") is None
+
+    student = students()[0]
+    course = next(c for c in platform.CourseManager._courses if not platform.EnrollmentManager._has_enrollment(student, c))
+    answers("1")
+    created = platform.EnrollmentManager.create_enrollment(student, course)
+    assert platform.EnrollmentManager.get_enrollment_by_id(created._enrollment_id) is created
+
+
+def test_view_enrollments_by_course_lists_only_that_course(loaded, capsys):
+    pending = next(e for e in platform.EnrollmentManager._enrollments if e._enrollment_status == "Pending")
+    course = pending._course
+    platform.EnrollmentManager.view_enrollments_by_course(course)
+    shown = capsys.readouterr().out
+    expected = [e for e in platform.EnrollmentManager._enrollments
+                if e._course is course and e._enrollment_status == "Pending"]
+    assert shown.count("Enrollment ID:") == len(expected)
+    assert pending._enrollment_id in shown
+
+
+def test_removing_a_course_cascades_through_the_indexes(loaded):
+    course = next(c for c in platform.CourseManager._courses if platform.EnrollmentManager._enrollments_by_course.get(c._course_id))
+    enrollment_ids = [e._enrollment_id for e in platform.EnrollmentManager._enrollments_by_course[course._course_id]]
+    roster = list(course._enrolled_students)
+
+    platform.CourseManager.remove_courses([course._course_id])
+
+    assert course._course_id not in platform.CourseManager._courses_by_id
+    assert all(platform.EnrollmentManager.get_enrollment_by_id(e) is None for e in enrollment_ids)
+    assert not any(e._course is course for e in platform.EnrollmentManager._enrollments)
+    assert not any(a._course is course for a in platform.AssignmentManager._assignments)
+    assert not any(g._course is course for g in platform.GradeManager._grades)
+    assert all(course not in student._enrolled_courses for student in roster)
+
+
+def test_rebuilt_indexes_match_the_registry(loaded):
+    platform.rebuild_indexes()
+    assert platform.EnrollmentManager._enrollments_by_id == {
+        e._enrollment_id: e for e in platform.EnrollmentManager._enrollments
+    }
+
+
+class Unscannable(list):
+    """A registry that fails the test if anything walks it."""
+    def __iter__(self):
+        raise AssertionError("the whole registry was scanned")
+
+
+def test_removing_a_student_does_not_scan_the_registries(loaded):
+    student = next(s for s in students() if platform.EnrollmentManager._enrollments_by_student.get(s._id)
+                   and platform.GradeManager._grades_by_student.get(s._id))
+    registries = ((platform.UserManager, "_users"), (platform.EnrollmentManager, "_enrollments"),
+                  (platform.GradeManager, "_grades"))
+    for owner, attribute in registries:
+        setattr(owner, attribute, Unscannable(getattr(owner, attribute)))
+    try:
+        assert platform.UserManager.remove_users([student._id]) == [student]
+    finally:
+        for owner, attribute in registries:
+            setattr(owner, attribute, list(list.__iter__(getattr(owner, attribute))))
+
+    users = platform.UserManager._users
+    assert student not in users and platform.UserManager._user_positions == {id(u): i for i, u in enumerate(users)}
+    assert not any(e._student is student for e in platform.EnrollmentManager._enrollments)
+    assert not any(g._student is student for g in platform.GradeManager._grades)
@@ -0,0 +1,42 @@
+import json
+import os
+
+import pytest
+
+import CaseStudy3 as platform
+
+
+@pytest.fixture
+def tracked(loaded):
+    platform.HotReloader.track()
+    yield loaded
+    platform.HotReloader.stop()
+
+
+def edit(folder, filename, change):
+    """Rewrites a data file the way another program would: change(rows) returns the new rows."""
+    path = os.path.join(folder, filename)
+    with open(path) as file:
+        rows = json.load(file)
+    with open(path, "w") as file:
+        json.dump(change(rows), file)
+
+
+def test_poll_applies_external_adds_changes_and_removals(tracked):
+    course = platform.CourseManager._courses[0]
+    grade = platform.GradeManager._grades[-1]
+    student = dict(next(u for u in platform.UserManager._users if isinstance(u, platform.Student)).to_dict(),
+                   id="STU-24-external", email="external@platform.com", enrolled_courses=[])
+
+    edit(tracked, "users.json", lambda rows: rows + [student])
+    edit(tracked, "courses.json", lambda rows: [dict(row, name="Renamed") if row["course_id"] == course._course_id
+                                                else row for row in rows])
+    edit(tracked, "grades.json", lambda rows: [row for row in rows if row["grade_id"] != grade._grade_id])
+    assert platform.HotReloader.poll() == 3
+
+    added = platform.UserManager._users_by_id["STU-24-external"]
+    assert isinstance(added, platform.Student) and added in platform.UserManager._users
+    assert platform.CourseManager._courses_by_id[course._course_id] is course and course._name == "Renamed"
+    assert grade not in platform.GradeManager._grades
+    assert grade not in platform.GradeManager._grades_by_student.get(grade._student._id, ())
+    assert platform.HotReloader.poll() == 0  # the new versions are the baseline now
@@ -0,0 +1,50 @@
+import json
+import os
+
+import CaseStudy3 as platform
+
+
+def add_rows(folder, filename, *rows):
+    path = os.path.join(folder, filename)
+    with open(path) as file:
+        data = json.load(file)
+    with open(path, "w") as file:
+        json.dump(data + list(rows), file)
+
+
+def orphan_enrollment(folder):
+    add_rows(folder, "enrollments.json", {
+        "enrollment_id": "ENR-orphan", "student_id": "STU-24-000000", "course_id": "CRS-missing",
+        "payment_status": "Paid", "enrollment_status": "Approved",
+    })
+
+
+def test_repairs_that_cannot_be_written_fail(data_folder, monkeypatch, capsys):
+    orphan_enrollment(data_folder)
+
+    def broken(source, target):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "replace", broken)
+    result = platform.IntegrityChecker.check(repair=True)
+    assert result["repaired"] == [] and result["failed"] == ["enrollments.json"]
+
+    assert platform.run_fsck(repair=True) == 1
+    assert "Could not rewrite: enrollments.json" in capsys.readouterr().err
+
+
+def test_orphans_are_found_and_repaired(data_folder, capsys):
+    orphan_enrollment(data_folder)
+    add_rows(data_folder, "grades.json", {
+        "grade_id": "GRD-orphan", "student_id": "STU-missing", "course_id": "CRS-000000", "grade_value": 2.0,
+    })
+    issues = platform.IntegrityChecker.check()["issues"]
+    assert {(issue["file"], issue["record"], issue["reference"]) for issue in issues} >= {
+        ("enrollments.json", "ENR-orphan", "CRS-missing"), ("grades.json", "GRD-orphan", "STU-missing")}
+
+    assert platform.run_fsck(repair=True) == 0
+    assert "Repaired: " in capsys.readouterr().err
+    assert not platform.IntegrityChecker.check()["issues"]
+    for filename, key, record in (("enrollments.json", "enrollment_id", "ENR-orphan"),
+                                  ("grades.json", "grade_id", "GRD-orphan")):
+        with open(os.path.join(data_folder, filename)) as file:
+            assert record not in {row[key] for row in json.load(file)}
@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+import CaseStudy3 as platform
+
+
+def loaded_state():
+    registries = (platform.UserManager._users, platform.CourseManager._courses, platform.EnrollmentManager._enrollments,
+                  platform.AssignmentManager._assignments, platform.GradeManager._grades)
+    return [sorted(json.dumps(entry.to_dict(), sort_keys=True) for entry in registry) for registry in registries]
+
+
+@pytest.mark.parametrize("layout", ["flat", "sharded"])
+def test_every_load_executor_loads_the_same_state(data_folder, monkeypatch, layout):
+    if layout == "sharded":
+        platform.ShardStore.convert("sharded")
+    states = {}
+    for executor in ("serial", "thread", "process"):
+        monkeypatch.setattr(platform, "LOAD_EXECUTOR", executor)
+        platform.reset_state()
+        platform.load_all()
+        states[executor] = loaded_state()
+    assert all(states["serial"])
+    assert states["thread"] == states["serial"] and states["process"] == states["serial"]
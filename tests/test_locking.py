@@ -0,0 +1,66 @@
+import sys
+import threading
+
+import pytest
+
+import CaseStudy3 as platform
+from conftest import students
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """Switches threads far more often than usual so that races show up."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def in_threads(function, arguments):
+    """Runs function(argument) for every argument, each in its own thread, all released at once."""
+    barrier = threading.Barrier(len(arguments))
+    results = [None] * len(arguments)
+
+    def work(index, argument):
+        barrier.wait()
+        results[index] = function(argument)
+    threads = [threading.Thread(target=work, args=item) for item in enumerate(arguments)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def new_course(capacity):
+    return platform.CourseManager.create_course("Locking", "01/01/2025", "06/30/2025", "Locking test", capacity)
+
+
+def test_concurrent_enrollments_of_a_student_create_one(loaded):
+    course, student = new_course(50), students()[0]
+    created = in_threads(lambda _: platform.EnrollmentManager.create_enrollment(student, course, "PayPal"), range(16))
+    assert sum(enrollment is not None for enrollment in created) == 1
+    assert len(platform.EnrollmentManager._enrollments_by_course[course._course_id]) == 1
+
+
+def test_concurrent_approvals_respect_the_capacity(loaded):
+    course = new_course(5)
+    enrollments = [platform.EnrollmentManager.create_enrollment(student, course, "PayPal") for student in students()[:20]]
+    approved = in_threads(lambda enrollment: enrollment.approve(), enrollments)
+    assert sum(approved) == 5
+    assert len(course._enrolled_students) == 5
+    assert {e._student for e in enrollments if e.is_approved()} == set(course._enrolled_students)
+
+    batch = platform.BatchProcessor.run(['{"op": "approve", "enrollment_id": "%s"}' % e._enrollment_id
+                                         for e in enrollments if not e.is_approved()][:1])
+    assert batch[0]["status"] == "error" and "is full" in batch[0]["error"]
+
+
+def test_concurrent_submissions_are_all_recorded(loaded):
+    assignment = next(a for a in platform.AssignmentManager._assignments
+                      if any(s not in a._submitted_students for s in a._course._enrolled_students))
+    submitters = [s for s in assignment._course._enrolled_students if s not in assignment._submitted_students]
+    in_threads(assignment.submit, submitters + submitters)
+    assert all(assignment._submitted_students[student] == "Submitted" for student in submitters)
+    for student in submitters:
+        assert assignment in platform.AssignmentManager._submissions_by_student[student._id]
@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+
+import CaseStudy3 as platform
+
+
+@pytest.fixture
+def monitor():
+    yield platform.PerformanceMonitor
+    platform.PerformanceMonitor.disable()
+    platform.PerformanceMonitor.reset()
+
+
+def test_methods_that_prompt_are_not_instrumented(monitor):
+    prompting = monitor.prompting_methods()
+    assert {"create_enrollment", "grade_course", "drop_student_menu"} <= prompting
+    assert "view_student_grades" not in prompting
+
+    monitor.enable()
+    assert not hasattr(platform.EnrollmentManager.create_enrollment, "__wrapped__")
+    assert not hasattr(platform.GradeManager.grade_course, "__wrapped__")
+    assert hasattr(platform.GradeManager.view_student_grades, "__wrapped__")
+
+
+def test_instrumented_calls_are_counted(loaded, monitor):
+    monitor.enable()
+    platform.CourseManager.view_all_courses()
+    (row,) = [row for row in monitor.report() if row["method"] == "CourseManager.view_all_courses"]
+    assert row["calls"] == 1
+
+
+def test_export_goes_to_the_chosen_file_outside_the_data_folder(loaded, monitor, tmp_path):
+    with pytest.raises(ValueError):
+        monitor.export_json(os.path.join(loaded, "performance_stats.json"))
+    assert not os.path.exists(os.path.join(loaded, "performance_stats.json"))
+
+    path = monitor.export_json(str(tmp_path / "stats.json"))
+    with open(path) as file:
+        assert "methods" in json.load(file)
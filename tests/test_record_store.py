@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+
+import pytest
+
+import CaseStudy3 as platform
+from conftest import students, submitted_assignment
+
+
+def exported(report, path):
+    platform.ExportManager.export(report, str(path), "csv")
+    with open(path, newline="") as file:
+        return sorted(tuple(row.values()) for row in csv.DictReader(file))
+
+
+def test_export_walks_the_whole_store(loaded, tmp_path):
+    expected = {report: exported(report, tmp_path / f"{report}.csv") for report in ("roster", "transcripts")}
+    platform.RecordStore.open()
+    try:
+        for report, rows in expected.items():
+            assert rows and exported(report, tmp_path / f"store-{report}.csv") == rows
+    finally:
+        platform.RecordStore.close()
+
+
+def test_reports_cover_every_stored_record(loaded, tmp_path):
+    expected = platform.ReportGenerator.generate(str(tmp_path / "json"), 1)
+    platform.RecordStore.open()
+    try:
+        manifest = platform.ReportGenerator.generate(str(tmp_path / "store"), 1)
+    finally:
+        platform.RecordStore.close()
+    assert manifest["shards"]
+    assert sum(shard["records"] for shard in manifest["shards"]) == \
+        sum(shard["records"] for shard in expected["shards"])
+
+
+def test_enrollments_are_fetched_by_id(loaded, capsys):
+    enrollment_id = platform.EnrollmentManager._enrollments[-1]._enrollment_id
+    platform.RecordStore.open()
+    try:
+        assert not platform.EnrollmentManager._enrollments
+        enrollment = platform.EnrollmentManager.get_enrollment_by_id(enrollment_id)
+        assert enrollment is not None and enrollment._enrollment_id == enrollment_id
+        assert platform.EnrollmentManager.get_enrollment_by_id("no-such-id") is None
+    finally:
+        platform.RecordStore.close()
+    assert "Enrollment not found." in capsys.readouterr().out
+
+
+def test_calendar_refuses_the_record_store(data_folder, capsys):
+    platform.RecordStore.open()
+    try:
+        assert platform.run_calendar() == 2
+        with pytest.raises(RuntimeError):
+            platform.DateIndex.active_courses()
+    finally:
+        platform.RecordStore.close()
+    assert "--record-store" in capsys.readouterr().err
+
+
+def test_build_and_export_round_trip(data_folder):
+    originals = {}
+    for name in ("users", "courses", "enrollments", "assignments", "grades"):
+        with open(os.path.join(data_folder, f"{name}.json")) as file:
+            originals[name] = json.load(file)
+    platform.RecordStore.build()
+    for name in originals:
+        os.remove(os.path.join(data_folder, f"{name}.json"))
+    platform.RecordStore.open()
+    assert platform.RecordStore.export_json()
+    platform.RecordStore.close()
+    for name, records in originals.items():
+        with open(os.path.join(data_folder, f"{name}.json")) as file:
+            assert sorted(map(json.dumps, json.load(file))) == sorted(map(json.dumps, records)), name
+
+
+def test_store_export_reports_failed_writes(data_folder, monkeypatch, capsys):
+    platform.RecordStore.build()
+
+    def broken(source, target):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "replace", broken)
+    assert platform.run_store("export") == 1
+    assert "Could not write" in capsys.readouterr().err
+
+
+def test_a_rolled_back_transaction_writes_nothing_back(loaded, monkeypatch):
+    assignment, student = submitted_assignment()
+    assignment_id, student_id = assignment._assignment_id, student._id
+    before = assignment._graded_students.get(student)
+    other = next(s for s in students() if s is not student and s._enrolled_courses)
+    course_id = next(c._course_id for c in platform.CourseManager._courses if c not in other._enrolled_courses)
+    monkeypatch.setattr(platform.RecordStore, "CAPACITY", 2)
+    platform.RecordStore.open()
+    try:
+        transaction = platform.Transaction()
+        transaction.stage("grade_assignment", assignment_id=assignment_id, student_id=student_id,
+                          grade=0 if before else 1)
+        transaction.stage("drop", student_id=other._id, course_id=course_id)
+        with pytest.raises(platform.TransactionError):
+            transaction.commit()
+        platform.RecordStore.flush()
+        with platform.RecordStore._guard:
+            row = platform.RecordStore._get("assignments/" + assignment_id)
+    finally:
+        platform.RecordStore.close()
+    assert row["graded_students"].get(student_id) == before
+
+
+def test_dry_runs_are_refused(data_folder, capsys):
+    platform.RecordStore.open()
+    try:
+        with pytest.raises(RuntimeError):
+            platform.BatchProcessor.run([], dry_run=True)
+        assert platform.run_batch("-", dry_run=True) == 2
+    finally:
+        platform.RecordStore.close()
+    assert "--dry-run" in capsys.readouterr().err
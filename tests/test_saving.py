@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+import CaseStudy3 as platform
+from conftest import students
+
+
+@pytest.fixture
+def failing_writes(monkeypatch):
+    """Makes every atomic rename fail, as on a full or read-only disk; call it with False to heal the disk."""
+    original = os.replace
+
+    def broken(source, target):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "replace", broken)
+
+    def set_failing(failing):
+        monkeypatch.setattr(os, "replace", broken if failing else original)
+    return set_failing
+
+
+def saved_inboxes(folder):
+    with open(os.path.join(folder, "notifications.json")) as file:
+        return json.load(file)
+
+
+def test_save_json_text_reports_failures(loaded, failing_writes):
+    assert platform.save_json_text("users.json", "[]") is False
+    failing_writes(False)
+    assert platform.save_json_text("scratch.json", "[]") is True
+
+
+def test_failed_notification_save_keeps_the_changes(loaded, failing_writes):
+    student = students()[0]
+    platform.NotificationManager.notify([student._id], "test", "Hello")
+    assert platform.NotificationManager.save_notifications() is False
+    assert platform.NotificationManager._dirty
+
+    failing_writes(False)
+    assert platform.NotificationManager.save_notifications() is True
+    assert not platform.NotificationManager._dirty
+    assert saved_inboxes(loaded)[student._id]
+
+
+def test_scheduler_keeps_failed_collections_pending(loaded, failing_writes, monkeypatch):
+    monkeypatch.setattr(platform.SaveScheduler, "DELAY", 3600)
+    removed = students()[0]
+    platform.UserManager.remove_student(removed._id)
+    assert "users" in platform.SaveScheduler.pending()
+
+    assert platform.SaveScheduler.flush() is False
+    assert "users" in platform.SaveScheduler.pending()  # not written, so still pending
+
+    failing_writes(False)
+    assert platform.SaveScheduler.flush() is True
+    assert not platform.SaveScheduler.pending()
+    with open(os.path.join(loaded, "users.json")) as file:
+        assert removed._id not in {row["id"] for row in json.load(file)}
+
+
+def test_save_all_reports_and_keeps_failures(loaded, failing_writes):
+    assert platform.save_all() is False
+    assert set(platform.SaveScheduler.pending()) >= {"users", "courses"}
+    failing_writes(False)
+    assert platform.save_all() is True
+    assert not platform.SaveScheduler.pending()
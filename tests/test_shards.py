@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+import CaseStudy3 as platform
+
+
+@pytest.fixture
+def sharded(data_folder):
+    """data_folder converted to the sharded layout, reloaded and saved once."""
+    platform.ShardStore.convert("sharded")
+    platform.reset_state()
+    platform.ensure_loaded()
+    platform.ShardStore.save()
+    return data_folder
+
+
+@pytest.fixture
+def encoded(monkeypatch):
+    """Records the course IDs whose shards are encoded."""
+    course_ids = []
+    encode = platform.ShardStore._encode
+
+    def spy(course_id):
+        course_ids.append(course_id)
+        return encode(course_id)
+    monkeypatch.setattr(platform.ShardStore, "_encode", staticmethod(spy))
+    return course_ids
+
+
+def records():
+    return {
+        name: sorted(json.dumps(obj.to_dict(), sort_keys=True) for obj in objects)
+        for name, objects in (("enrollments", platform.EnrollmentManager._enrollments),
+                              ("assignments", platform.AssignmentManager._assignments),
+                              ("grades", platform.GradeManager._grades))
+    }
+
+
+def unsubmitted():
+    for assignment in platform.AssignmentManager._assignments:
+        for student in assignment._course._enrolled_students:
+            if student not in assignment._submitted_students:
+                return assignment, student
+    raise AssertionError("every enrolled student has submitted")
+
+
+def shard_of(folder, course_id):
+    with open(os.path.join(folder, platform.ShardStore._shard_name(course_id))) as file:
+        return json.load(file)
+
+
+def test_shards_round_trip(sharded):
+    expected = records()
+    platform.reset_state()
+    platform.ensure_loaded()
+    assert records() == expected
+
+
+def test_only_touched_shards_are_encoded(sharded, encoded):
+    assignment, student = unsubmitted()
+    assignment.submit(student)
+    assert platform.ShardStore.save()
+    course_id = assignment._course._course_id
+    assert encoded == [course_id]
+    rows = shard_of(sharded, course_id)["assignments"]
+    assert student._id in next(row for row in rows if row["assignment_id"] == assignment._assignment_id)["submitted_students"]
+
+    expected = records()
+    platform.reset_state()
+    platform.ensure_loaded()
+    assert records() == expected
+
+
+def test_failed_shard_writes_are_retried(sharded, monkeypatch):
+    assignment, student = unsubmitted()
+    assignment.submit(student)
+    original = os.replace
+
+    def broken(source, target):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "replace", broken)
+    assert not platform.ShardStore.save()
+    monkeypatch.setattr(os, "replace", original)
+
+    assert platform.ShardStore.save()
+    rows = shard_of(sharded, assignment._course._course_id)["assignments"]
+    assert student._id in next(row for row in rows if row["assignment_id"] == assignment._assignment_id)["submitted_students"]
+
+
+@pytest.mark.parametrize("layout", ["sharded", "flat"])
+def test_a_failed_conversion_keeps_the_old_layout(data_folder, layout, monkeypatch):
+    if layout == "flat":
+        platform.ShardStore.convert("sharded")
+    platform.ensure_loaded()
+    expected = records()
+    original = os.replace
+
+    def broken(source, target):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "replace", broken)
+    with pytest.raises(OSError, match="old files were kept"):
+        platform.ShardStore.convert(layout)
+    monkeypatch.setattr(os, "replace", original)
+
+    assert platform.ShardStore.enabled() == (layout == "flat")
+    platform.reset_state()
+    platform.ensure_loaded()
+    assert records() == expected
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import CaseStudy3 as platform
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OTHER_PROCESS = """
+import sys
+import CaseStudy3 as platform
+platform.set_data_folder(sys.argv[1])
+platform.SharedAccess.enable()
+platform.ensure_loaded()
+platform.CourseManager.create_course("Theirs", "01/01/2025", "06/30/2025", "Created elsewhere", 10)
+sys.exit(0 if platform.save_all() else 1)
+"""
+
+
+@pytest.fixture
+def shared(data_folder):
+    platform.SharedAccess.enable()
+    platform.ensure_loaded()
+    yield data_folder
+    platform.SharedAccess._enabled = False
+
+
+def saved_course_names(folder):
+    with open(os.path.join(folder, "courses.json")) as file:
+        return {row["name"] for row in json.load(file)}
+
+
+def test_saves_of_another_process_are_merged(shared):
+    ours = platform.CourseManager.create_course("Ours", "01/01/2025", "06/30/2025", "Created here", 10)
+    subprocess.run([sys.executable, "-c", OTHER_PROCESS, shared], cwd=ROOT, check=True, capture_output=True)
+    assert "Theirs" in saved_course_names(shared) and "Ours" not in saved_course_names(shared)
+
+    assert platform.save_all()
+    assert {"Ours", "Theirs"} <= saved_course_names(shared)
+    assert platform.CourseManager.get_course_by_id(ours._course_id) is ours
+    assert any(course._name == "Theirs" for course in platform.CourseManager._courses)
+
+
+@pytest.mark.parametrize("argv, environ", [
+    (["--shared", "--record-store", "calendar"], {}),
+    (["--record-store", "calendar"], {"CASESTUDY3_SHARED": "1"}),
+])
+def test_shared_access_is_refused_with_the_record_store(argv, environ, monkeypatch, capsys):
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    with pytest.raises(SystemExit) as exit_info:
+        platform.parse_arguments(argv)
+    assert exit_info.value.code == 2
+    assert "cannot be combined with --record-store" in capsys.readouterr().err
@@ -0,0 +1,72 @@
+import pytest
+
+import CaseStudy3 as platform
+from conftest import students
+
+
+def full_snapshot():
+    with platform.LockManager.exclusive(readonly=True):
+        version = platform.LockManager.version()
+        changes = platform.SnapshotManager._copy_changes(None, set(), set())
+    return platform.SnapshotManager._assemble(version, None, *changes)
+
+
+def assert_same(snapshot, expected):
+    assert dict(snapshot.users) == dict(expected.users)
+    assert dict(snapshot.courses) == dict(expected.courses)
+    assert dict(snapshot.assignments) == dict(expected.assignments)
+    for course_id in expected.courses:
+        assert snapshot.enrollments_for_course(course_id) == expected.enrollments_for_course(course_id)
+        assert snapshot.grades_for_course(course_id) == expected.grades_for_course(course_id)
+        assert snapshot.assignments_for_course(course_id) == expected.assignments_for_course(course_id)
+    for student in students():
+        assert sorted(snapshot.grades_for_student(student._id)) == sorted(expected.grades_for_student(student._id))
+
+
+def test_snapshot_is_reused_until_something_changes(loaded):
+    snapshot = platform.SnapshotManager.take()
+    assert platform.SnapshotManager.take() is snapshot
+    with pytest.raises(AttributeError):
+        snapshot.version = 0
+
+
+def test_incremental_snapshot_matches_a_full_copy(loaded, answers):
+    platform.SnapshotManager.take()
+    student, other = students()[:2]
+    course = next(c for c in platform.CourseManager._courses if c not in student._enrolled_courses)
+    answers("1")
+    platform.EnrollmentManager.create_enrollment(student, course)
+    platform.GradeManager.assign_grade(other, other._enrolled_courses[0], 4.0)
+    platform.AssignmentManager._assignments[0].submit(student)
+    platform.CourseManager.create_course("New", "01/01/2025", "02/01/2025", "Added later", 10)
+    newcomer = platform.Student("New", "Student", 20, "Female", "01/01/2004", "Davao")
+    newcomer.email, newcomer.password = "new@platform.com", "new"
+    with platform.LockManager.shared():
+        platform.UserManager._add_user(newcomer)
+
+    assert_same(platform.SnapshotManager.take(), full_snapshot())
+
+
+def test_untouched_partitions_are_shared(loaded):
+    before = platform.SnapshotManager.take()
+    student = students()[0]
+    course = student._enrolled_courses[0]
+    platform.GradeManager.assign_grade(student, course, 3.0)
+
+    after = platform.SnapshotManager.take()
+    assert after is not before
+    assert after.users is before.users
+    untouched = next(c._course_id for c in platform.CourseManager._courses if c is not course)
+    assert after.enrollments_for_course(untouched) is before.enrollments_for_course(untouched)
+    assert after.grades_for_course(untouched) is before.grades_for_course(untouched)
+    assert len(after.grades_for_course(course._course_id)) == len(before.grades_for_course(course._course_id)) + 1
+    assert_same(after, full_snapshot())
+
+
+def test_structural_change_rebuilds_everything(loaded):
+    platform.SnapshotManager.take()
+    removed = students()[0]
+    platform.UserManager.remove_users([removed._id])
+    snapshot = platform.SnapshotManager.take()
+    assert removed._id not in snapshot.users
+    assert_same(snapshot, full_snapshot())
@@ -0,0 +1,99 @@
+import atexit
+import json
+import os
+import subprocess
+import sys
+from collections import OrderedDict
+
+import pytest
+
+import CaseStudy3 as platform
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def tenants(data_folder, tmp_path):
+    """Tenants under tmp_path/tenants with room for two cached tenants."""
+    root, capacity = platform.TenantManager.ROOT, platform.TenantManager.CAPACITY
+    platform.TenantManager.configure(str(tmp_path / "tenants"), 2)
+    yield tmp_path / "tenants"
+    platform.TenantManager.configure(root, capacity)
+    platform.TenantManager._cache = OrderedDict()
+    platform.TenantManager._unsaved = set()
+    platform.TenantManager._active = platform.TenantManager._clean_version = None
+    atexit.unregister(platform.TenantManager.save_all)
+    platform.TenantManager._exit_hook = False
+
+
+def create_course(name):
+    return platform.CourseManager.create_course(name, "01/01/2025", "06/30/2025", "Tenant test", 10)
+
+
+def saved_course_names(folder):
+    with open(os.path.join(folder, "courses.json")) as file:
+        return {row["name"] for row in json.load(file)}
+
+
+def visit(*tenant_ids):
+    for tenant_id in tenant_ids:
+        with platform.TenantManager.use(tenant_id):
+            pass
+
+
+def test_evicted_tenants_are_saved_first(tenants):
+    with platform.TenantManager.use("a"):
+        course = create_course("Kept")
+    visit("b", "c")
+    assert "a" not in platform.TenantManager.cached()
+    assert saved_course_names(tenants / "a") == {"Kept"}
+
+    with platform.TenantManager.use("a"):
+        assert platform.CourseManager.get_course_by_id(course._course_id)._name == "Kept"
+    assert not os.path.exists(tenants / "b" / "courses.json")  # unchanged tenants are not written
+
+
+def test_tenants_that_cannot_be_saved_stay_cached(tenants, monkeypatch):
+    with platform.TenantManager.use("a"):
+        create_course("Kept")
+    visit("b")
+    original = os.replace
+
+    def broken(source, target):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "replace", broken)
+    visit("c")
+    assert "a" in platform.TenantManager.cached()
+
+    monkeypatch.setattr(os, "replace", original)
+    visit("d")
+    assert "a" not in platform.TenantManager.cached()
+    assert saved_course_names(tenants / "a") == {"Kept"}
+
+
+def test_save_all_writes_every_changed_tenant(tenants):
+    with platform.TenantManager.use("a"):
+        create_course("Cached")
+    with platform.TenantManager.use("b"):
+        create_course("Active")
+    assert "a" in platform.TenantManager.cached()
+    assert platform.TenantManager.save_all()
+    assert saved_course_names(tenants / "a") == {"Cached"}
+    assert saved_course_names(tenants / "b") == {"Active"}
+    assert platform.TenantManager.active() == "b"
+    assert platform.CourseManager._courses[-1]._name == "Active"
+
+
+EXITING_PROCESS = """
+import CaseStudy3 as platform
+with platform.TenantManager.use("a"):
+    platform.CourseManager.create_course("Kept", "01/01/2025", "06/30/2025", "Saved at exit", 10)
+with platform.TenantManager.use("b"):
+    pass
+"""
+
+
+def test_tenants_are_saved_at_exit(tmp_path):
+    environment = dict(os.environ, CASESTUDY3_TENANTS=str(tmp_path))
+    subprocess.run([sys.executable, "-c", EXITING_PROCESS], cwd=ROOT, env=environment, check=True, capture_output=True)
+    assert saved_course_names(tmp_path / "a") == {"Kept"}
@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+import CaseStudy3 as platform
+from conftest import submitted_assignment
+
+COURSE = {"name": "Staged", "start_date": "01/01/2025", "end_date": "06/30/2025",
+          "description": "Transaction test", "capacity": 10}
+
+
+def saved_course_names(folder):
+    with open(os.path.join(folder, "courses.json")) as file:
+        return {row["name"] for row in json.load(file)}
+
+
+def test_a_failing_operation_rolls_everything_back(loaded):
+    assignment, student = submitted_assignment()
+    grades = dict(assignment._graded_students)
+    courses = list(platform.CourseManager._courses)
+    score = 1 if grades.get(student) != 1 else 2
+
+    transaction = platform.Transaction()
+    transaction.stage("create_course", **COURSE)
+    transaction.stage("import_grades", assignment_id=assignment._assignment_id, scores=[[student._id, score]])
+    transaction.stage("approve", enrollment_id="ENR-missing")
+    with pytest.raises(platform.TransactionError) as error:
+        transaction.commit()
+
+    assert error.value.index == 2
+    assert platform.CourseManager._courses == courses
+    assert len(platform.CourseManager._courses_by_id) == len({c._course_id for c in courses})
+    assert assignment._graded_students == grades
+    assert "Staged" not in saved_course_names(loaded)
+
+
+def test_a_committed_transaction_is_applied_and_saved(loaded):
+    assignment, student = submitted_assignment()
+    with platform.Transaction() as transaction:
+        transaction.stage("create_course", **COURSE)
+        transaction.stage("import_grades", assignment_id=assignment._assignment_id, scores=[[student._id, 3]])
+    assert len(transaction.results) == 2
+    assert assignment._graded_students[student] == 3
+    assert "Staged" in saved_course_names(loaded)